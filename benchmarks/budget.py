@@ -0,0 +1,115 @@
+# benchmarks/budget.py
+"""
+Замеры API-запросов и сравнение с бюджетами из benchmarks/baseline.json.
+
+Бюджет задаётся на эндпоинт и масштаб (число событий):
+    {"10000": {"events-list": {"max_queries": 2, "p99_ms": 60, "peak_kb": 900}}}
+Запросы сверяются точно (больше бюджета — регрессия), время и память —
+с допуском BENCH_TOLERANCE (по умолчанию 1.25, то есть +25%).
+Все три значения обязательны: замер без бюджета (или бюджет без p99_ms/peak_kb)
+тоже валит прогон, иначе регрессия прошла бы незамеченной.
+
+BENCH_UPDATE_BASELINE=1 перезаписывает baseline.json текущими замерами
+(время и память — с запасом BENCH_HEADROOM, по умолчанию 1.5). Записывать
+на эталонном стенде для каждого масштаба:
+    BENCH_UPDATE_BASELINE=1 BENCH_SCALES=10000,100000,1000000 pytest benchmarks/test_api.py
+"""
+import json
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+TOLERANCE = float(os.getenv("BENCH_TOLERANCE", "1.25"))
+HEADROOM = float(os.getenv("BENCH_HEADROOM", "1.5"))
+UPDATE_BASELINE = os.getenv("BENCH_UPDATE_BASELINE") == "1"
+
+BUDGET_KEYS = ("max_queries", "p99_ms", "peak_kb")
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(call, runs=30, warmup=3):
+    """
+    call() выполняет один запрос и возвращает ответ.
+    Возвращает p50/p99 (мс), максимум SQL-запросов на вызов и пик памяти (КБ, tracemalloc).
+    """
+    # Ответы закрываем: выгрузки отдаются FileResponse из хранилища
+    for _ in range(warmup):
+        call().close()
+
+    timings = []
+    queries = 0
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = call()
+            timings.append((time.perf_counter() - started) * 1000)
+        response.close()
+        queries = max(queries, len(ctx.captured_queries))
+
+    # Память меряем отдельным прогоном: tracemalloc заметно замедляет код
+    tracemalloc.start()
+    try:
+        call().close()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "status": response.status_code,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "max_queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+class Baseline:
+    def __init__(self, path=BASELINE_PATH):
+        self.path = path
+        self.data = json.loads(path.read_text()) if path.exists() else {}
+        self.results = {}
+
+    def check(self, scale, name, result):
+        """
+        Возвращает список нарушений бюджета (пустой — всё в порядке).
+        """
+        self.results.setdefault(str(scale), {})[name] = result
+        if UPDATE_BASELINE:
+            return []
+
+        budget = self.data.get(str(scale), {}).get(name, {})
+        missing = [key for key in BUDGET_KEYS if key not in budget]
+        if missing:
+            return [f"no budget for {', '.join(missing)}: record it with BENCH_UPDATE_BASELINE=1"]
+
+        problems = []
+        if result["max_queries"] > budget["max_queries"]:
+            problems.append(f"queries {result['max_queries']} > {budget['max_queries']}")
+        for key in ("p99_ms", "peak_kb"):
+            if result[key] > budget[key] * TOLERANCE:
+                problems.append(f"{key} {result[key]} > {budget[key]} x {TOLERANCE}")
+        return problems
+
+    def save(self):
+        data = dict(self.data)
+        for scale, endpoints in self.results.items():
+            data.setdefault(scale, {})
+            for name, result in endpoints.items():
+                data[scale][name] = {
+                    "max_queries": result["max_queries"],
+                    "p99_ms": round(result["p99_ms"] * HEADROOM, 1),
+                    "peak_kb": round(result["peak_kb"] * HEADROOM, 1),
+                }
+        self.path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
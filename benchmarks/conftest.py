@@ -0,0 +1,26 @@
+# benchmarks/conftest.py
+# Бенчмарки используют те же фабрики и фикстуры, что и tests/.
+# Запуск: pytest benchmarks (по умолчанию pytest их не собирает, см. pytest.ini)
+import pytest
+from pytest_factoryboy import register
+
+from tests.conftest import api_client, fake_weather, media_root, reset_process_caches  # noqa: F401
+from tests.factories import UserFactory, VenueFactory, EventFactory
+
+register(UserFactory)
+register(VenueFactory)
+register(EventFactory)
+
+
+@pytest.fixture(scope="session")
+def api_baseline():
+    """
+    Бюджеты API из benchmarks/baseline.json. С BENCH_UPDATE_BASELINE=1
+    в конце сессии файл перезаписывается текущими замерами.
+    """
+    from benchmarks.budget import UPDATE_BASELINE, Baseline
+
+    baseline = Baseline()
+    yield baseline
+    if UPDATE_BASELINE:
+        baseline.save()
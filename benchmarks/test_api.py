@@ -0,0 +1,140 @@
+# benchmarks/test_api.py
+# Латентность (p50/p99), число SQL-запросов и пик памяти основных эндпоинтов API
+# на наборах из BENCH_SCALES событий (по умолчанию 10000; полный прогон: BENCH_SCALES=10000,100000,1000000).
+# Превышение бюджетов из benchmarks/baseline.json валит тест (см. benchmarks/budget.py).
+import os
+from datetime import timedelta
+from io import BytesIO
+
+import openpyxl
+import pytest
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from events.models import Event, EventStatus
+from venues.models import Venue
+
+from benchmarks.budget import measure
+
+SCALES = [int(scale) for scale in os.getenv("BENCH_SCALES", "10000").split(",")]
+BATCH_SIZE = 10000
+IMPORT_ROWS = 20
+IMPORT_RUNS = 10
+IMPORT_WARMUP = 3
+
+User = get_user_model()
+
+
+def seed(scale):
+    """
+    Быстрое наполнение через bulk_create, без сигналов.
+    Около 100 событий на площадку, 1% событий с "Jazz" в названии (для поиска),
+    10% — черновики (не видны анонимам).
+    """
+    author = User.objects.create_superuser("bench-admin", "[email protected]", "password123")
+    venues = Venue.objects.bulk_create(
+        Venue(name=f"Bench Venue {i}", location=Point(37.0 + (i % 100) / 100, 55.0 + (i // 100) / 100))
+        for i in range(max(10, scale // 100))
+    )
+
+    now = timezone.now()
+    for offset in range(0, scale, BATCH_SIZE):
+        Event.objects.bulk_create([
+            Event(
+                title=f"{'Jazz' if i % 100 == 0 else 'Concert'} {i}",
+                description="Benchmark event",
+                publish_at=now - timedelta(days=1),
+                start_at=now + timedelta(hours=i % 5000),
+                end_at=now + timedelta(hours=i % 5000 + 2),
+                venue_id=venues[i % len(venues)].id,
+                author_id=author.id,
+                rating=i % 26,
+                status=EventStatus.DRAFT if i % 10 == 9 else EventStatus.PUBLISHED,
+            )
+            for i in range(offset, min(offset + BATCH_SIZE, scale))
+        ], batch_size=BATCH_SIZE)
+
+    event = Event.objects.filter(status=EventStatus.PUBLISHED).order_by("id").first()
+    return {"scale": scale, "admin": author, "venues": venues, "event": event}
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda scale: f"{scale}-events")
+def dataset(request, django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        data = seed(request.param)
+        yield data
+        tables = ", ".join(connection.ops.quote_name(model._meta.db_table) for model in (Event, Venue))
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+        User.objects.filter(username="bench-admin").delete()
+
+
+def _import_file(venues, round_no):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["title", "description", "publish_at", "start_at", "end_at", "venue_name", "coords", "rating"])
+    for i in range(IMPORT_ROWS):
+        ws.append([f"Imported {round_no}-{i}", "", "", "2030-01-01 10:00:00", "2030-01-01 12:00:00", venues[i % len(venues)].name, "", 5])
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def _import_files(venues):
+    """
+    Свой файл на каждый прогон measure (разминка, замеры, прогон с tracemalloc):
+    повтор того же файла пошёл бы по короткому пути завершённого EventImport
+    и ничего бы не создавал. Файлы собираются заранее, вне замера.
+    """
+    return iter([_import_file(venues, round_no) for round_no in range(IMPORT_RUNS + IMPORT_WARMUP + 1)])
+
+
+def _import(client, data):
+    payload = BytesIO(next(data["import_files"]))
+    payload.name = "events.xlsx"
+    client.force_authenticate(user=data["admin"])
+    try:
+        return client.post(reverse("events-import-xlsx"), {"file": payload}, format="multipart")
+    finally:
+        client.force_authenticate(user=None)
+
+
+ENDPOINTS = {
+    "events-list": lambda client, data: client.get(reverse("events-list")),
+    "events-list-page-50": lambda client, data: client.get(reverse("events-list"), {"page": 50}),
+    "events-detail": lambda client, data: client.get(reverse("events-detail", args=[data["event"].id])),
+    "events-search": lambda client, data: client.get(reverse("events-list"), {"search": "Jazz"}),
+    "events-filter-range": lambda client, data: client.get(
+        reverse("events-list"), {"rating_min": 20, "start_from": timezone.now().isoformat(), "ordering": "-start_at"}
+    ),
+    "events-filter-near": lambda client, data: client.get(
+        reverse("events-list"), {"near": "55.05,37.05", "radius_km": 5, "ordering": "distance"}
+    ),
+    "venues-list": lambda client, data: client.get(reverse("venues-list")),
+    "events-export-xlsx": lambda client, data: client.get(reverse("events-export-xlsx"), {"venue": data["venues"][0].id}),
+    "events-import-xlsx": _import,
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", list(ENDPOINTS))
+def test_api_budget(name, dataset, api_baseline, settings):
+    settings.VENUES_PUBLIC_READ_ACCESS = True
+    client = APIClient()
+    data = dict(dataset)
+    call = ENDPOINTS[name]
+
+    if name == "events-import-xlsx":
+        data["import_files"] = _import_files(dataset["venues"])
+        result = measure(lambda: call(client, data), runs=IMPORT_RUNS, warmup=IMPORT_WARMUP)
+    else:
+        result = measure(lambda: call(client, data))
+
+    assert result["status"] < 400, result
+    problems = api_baseline.check(dataset["scale"], name, result)
+    assert not problems, f"{name} @ {dataset['scale']}: {'; '.join(problems)} ({result})"
+
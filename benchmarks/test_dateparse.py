@@ -0,0 +1,78 @@
+# benchmarks/test_dateparse.py
+# Разбор дат импорта: прежний parse_excel_date (strptime + make_aware на каждое значение)
+# против events/dateparse.py. Значения — как в типичном файле: немного уникальных дат,
+# много повторов, часть — только дата.
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+from django.utils.timezone import make_aware
+
+from events.dateparse import parse_datetime_string, parse_import_datetime
+
+ROWS = 100_000
+UNIQUE = 500
+
+
+def legacy_parse_excel_date(value):
+    if not value:
+        return None
+    dt = value
+    if isinstance(value, str):
+        try:
+            dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            try:
+                dt = datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                return None
+    if isinstance(dt, datetime):
+        if dt.tzinfo is None:
+            return make_aware(dt)
+        return dt
+    return None
+
+
+def _values():
+    values = []
+    for i in range(ROWS):
+        day = i % UNIQUE
+        month, day = day // 28 % 12 + 1, day % 28 + 1
+        if i % 4 == 0:
+            values.append(f"2026-{month:02d}-{day:02d}")
+        else:
+            values.append(f"2026-{month:02d}-{day:02d} {i % 24:02d}:00:00")
+    return values
+
+
+VALUES = _values()
+
+
+def _parse_all(parse, *args):
+    return [parse(value, *args) for value in VALUES]
+
+
+def _per_row(benchmark):
+    benchmark.extra_info["rows"] = ROWS
+    benchmark.extra_info["per_row_us"] = benchmark.stats.stats.mean / ROWS * 1_000_000
+
+
+def test_legacy_parse_excel_date(benchmark):
+    result = benchmark(_parse_all, legacy_parse_excel_date)
+    assert result[1] is not None
+    _per_row(benchmark)
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "warm"])
+def test_parse_import_datetime(benchmark, cached):
+    # Зона берётся один раз на файл, как в parse_event_row
+    tz = timezone.get_current_timezone()
+
+    def run():
+        if not cached:
+            parse_datetime_string.cache_clear()
+        return _parse_all(parse_import_datetime, tz)
+
+    result = benchmark(run)
+    assert result == _parse_all(legacy_parse_excel_date)
+    _per_row(benchmark)
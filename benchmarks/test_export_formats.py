@@ -0,0 +1,60 @@
+# benchmarks/test_export_formats.py
+# Пропускная способность выгрузки по форматам на одном и том же наборе событий.
+import pytest
+from django.contrib.gis.geos import Point
+
+from events.exports import build_parquet, stream_csv
+from events.models import Event, EventStatus
+from events.xlsx_services import export_events_to_xlsx
+from venues.models import Venue
+
+ROWS = 20000
+
+
+@pytest.fixture
+def events(user_factory, event_factory):
+    author = user_factory()
+    venues = Venue.objects.bulk_create(
+        Venue(name=f"Venue {i}", location=Point(37.0 + i / 100, 55.0)) for i in range(100)
+    )
+    Event.objects.bulk_create(
+        (
+            event_factory.build(venue=venues[i % len(venues)], author=author, status=EventStatus.PUBLISHED)
+            for i in range(ROWS)
+        ),
+        batch_size=5000,
+    )
+    return Event.objects.select_related("venue", "author").order_by("start_at")
+
+
+def _xlsx(qs):
+    return len(export_events_to_xlsx(qs).content)
+
+
+def _csv(qs):
+    return sum(len(chunk.encode()) for chunk in stream_csv(qs))
+
+
+def _parquet(qs):
+    output = build_parquet(qs)
+    try:
+        output.seek(0, 2)
+        return output.tell()
+    finally:
+        output.close()
+
+
+FORMATS = {"xlsx": _xlsx, "csv": _csv, "parquet": _parquet}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("export_format", list(FORMATS))
+def test_export_throughput(benchmark, events, export_format):
+    if export_format == "parquet":
+        pytest.importorskip("pyarrow")
+
+    size = benchmark.pedantic(FORMATS[export_format], args=(events,), rounds=3)
+
+    benchmark.extra_info["rows"] = ROWS
+    benchmark.extra_info["bytes"] = size
+    benchmark.extra_info["rows_per_s"] = round(ROWS / benchmark.stats.stats.mean)
@@ -0,0 +1,63 @@
+# benchmarks/test_venue_serialization.py
+import pytest
+from django.contrib.gis.geos import Point
+
+from events.models import Event
+from events.serializers import EventListSerializer
+from venues.models import Venue
+from venues.serializers import VenueSerializer
+from venues.services import with_venue_coordinates
+
+ROWS = 2000
+
+
+@pytest.fixture
+def venues():
+    return Venue.objects.bulk_create(
+        Venue(name=f"Venue {i}", location=Point(37.0 + i / ROWS, 55.0 + i / ROWS))
+        for i in range(ROWS)
+    )
+
+
+@pytest.fixture
+def events(venues, user_factory, event_factory):
+    author = user_factory()
+    return Event.objects.bulk_create(
+        event_factory.build(venue=venue, author=author) for venue in venues
+    )
+
+
+def _per_row(benchmark):
+    benchmark.extra_info["rows"] = ROWS
+    benchmark.extra_info["per_row_us"] = benchmark.stats.stats.mean / ROWS * 1_000_000
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lean", [False, True], ids=["geos", "lean"])
+def test_venue_list_serialization(benchmark, venues, lean):
+    """
+    Площадки: location из EWKB через GEOS против ST_Y/ST_X в SQL.
+    """
+    qs = Venue.objects.with_coordinates() if lean else Venue.objects.all()
+
+    data = benchmark(lambda: VenueSerializer(list(qs.all()), many=True).data)
+
+    assert len(data) == ROWS
+    _per_row(benchmark)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lean", [False, True], ids=["geos", "lean"])
+def test_event_list_nested_venue_serialization(benchmark, events, lean):
+    """
+    Список мероприятий с вложенной площадкой — основной горячий путь /api/events/.
+    """
+    qs = Event.objects.select_related("venue", "author")
+    if lean:
+        qs = with_venue_coordinates(qs)
+
+    data = benchmark(lambda: EventListSerializer(list(qs.all()), many=True).data)
+
+    assert len(data) == ROWS
+    assert data[0]["venue"]["location"]["latitude"]
+    _per_row(benchmark)
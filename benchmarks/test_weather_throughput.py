@@ -0,0 +1,88 @@
+# benchmarks/test_weather_throughput.py
+# Пропускная способность сбора погоды на заглушке Open-Meteo (weather/fake_provider.py).
+# Задержку провайдера можно задать через WEATHER_BENCH_LATENCY_MS (по умолчанию 0 —
+# меряется только наш код: HTTP-клиент, разбор ответа, запись в БД).
+import os
+from datetime import timedelta
+
+import pytest
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+
+from events.models import Event
+from venues.models import Venue
+from weather.models import WeatherSnapshot
+from weather.tasks import set_event_weather_forecast_task, update_weather_snapshots
+
+SCALES = [10, 1000, 10000]
+LATENCY = float(os.getenv("WEATHER_BENCH_LATENCY_MS", "0")) / 1000
+
+
+def _rounds(count):
+    # 10k площадок — это десятки секунд на раунд, одного замера достаточно
+    return 5 if count <= 10 else 1
+
+
+@pytest.fixture
+def make_venues():
+    def make(count):
+        return Venue.objects.bulk_create(
+            Venue(name=f"Venue {i}", location=Point(20.0 + (i % 1000) / 10, 40.0 + (i // 1000) / 10))
+            for i in range(count)
+        )
+    return make
+
+
+def _report(benchmark, fake_weather, count):
+    benchmark.extra_info["venues"] = count
+    benchmark.extra_info["per_venue_ms"] = benchmark.stats.stats.mean / count * 1000
+    benchmark.extra_info["provider_requests"] = fake_weather.behaviour.requests
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", SCALES)
+def test_update_weather_snapshots(benchmark, fake_weather, make_venues, count):
+    """
+    Часовая задача: текущая погода для каждой площадки.
+    """
+    fake_weather.behaviour.latency = LATENCY
+    make_venues(count)
+
+    results = benchmark.pedantic(
+        update_weather_snapshots,
+        setup=lambda: WeatherSnapshot.objects.all().delete(),
+        rounds=_rounds(count),
+    )
+
+    assert len(results) == count
+    assert WeatherSnapshot.objects.count() == count
+    _report(benchmark, fake_weather, count)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", SCALES)
+def test_event_forecast_tasks(benchmark, fake_weather, make_venues, user_factory, event_factory, count):
+    """
+    Прогноз на время события: по задаче на каждое событие, как их выполняет воркер weather-io.
+    """
+    fake_weather.behaviour.latency = LATENCY
+    author = user_factory()
+    start_at = timezone.now() + timedelta(days=1)
+    events = Event.objects.bulk_create(
+        event_factory.build(venue=venue, author=author, start_at=start_at, end_at=start_at + timedelta(hours=2))
+        for venue in make_venues(count)
+    )
+    event_ids = [event.id for event in events]
+
+    def reset():
+        Event.objects.filter(id__in=event_ids).update(weather=None)
+        WeatherSnapshot.objects.all().delete()
+
+    def run():
+        for event_id in event_ids:
+            set_event_weather_forecast_task(event_id)
+
+    benchmark.pedantic(run, setup=reset, rounds=_rounds(count))
+
+    assert Event.objects.filter(id__in=event_ids, weather__isnull=False).count() == count
+    _report(benchmark, fake_weather, count)
@@ -13,6 +13,7 @@ import os
 from pathlib import Path
 
 from celery.schedules import crontab
+from kombu import Queue
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -77,7 +78,7 @@ REST_FRAMEWORK = {
 
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.OrderingFilter",
+        "core.filters.OrderingFilter",
         "rest_framework.filters.SearchFilter",
     ],
 }
@@ -121,6 +122,24 @@ if os.name == 'nt':
     GDAL_LIBRARY_PATH = r"C:\Users\Alex\AppData\Local\Programs\OSGeo4W\bin\gdal312.dll"
     GEOS_LIBRARY_PATH = r"C:\Users\Alex\AppData\Local\Programs\OSGeo4W\bin\geos_c.dll"
 
+# Cache
+# Общий для web и воркеров кэш в Redis. Без REDIS_CACHE_URL (локально, в тестах)
+# используется кэш в памяти процесса.
+REDIS_CACHE_URL = os.getenv("REDIS_CACHE_URL")
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -137,9 +156,97 @@ CELERY_BEAT_SCHEDULE = {
     "publish-scheduled-events-every-minute": {
         "task": "events.tasks.publish_scheduled_events_task",
         "schedule": crontab(minute="*/1"), # Каждую минуту
+        # Не выполняем запуск, простоявший в очереди дольше следующего
+        "options": {"expires": 55},
     },
+    "cleanup-exports-every-hour": {
+        "task": "events.tasks.cleanup_exports_task",
+        "schedule": crontab(minute=30),
+    },
+}
+
+# Очереди по типу нагрузки: долгий сбор погоды и рассылки не должны
+# задерживать публикацию по расписанию. Каждую очередь обслуживает свой
+# воркер со своей concurrency (см. docker-compose.yml).
+CELERY_TASK_QUEUES = (
+    Queue("default"),
+    Queue("publish"),
+    Queue("weather-io"),
+    Queue("mail"),
+    Queue("images"),
+)
+CELERY_TASK_DEFAULT_QUEUE = "default"
+
+# В Redis-транспорте 0 — наивысший приоритет, 9 — наименьший.
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    "priority_steps": list(range(10)),
+    "sep": ":",
+    "queue_order_strategy": "priority",
 }
 
+CELERY_TASK_ROUTES = {
+    "events.tasks.publish_scheduled_events_task": {"queue": "publish", "priority": 0},
+    "events.tasks.send_event_notification_task": {"queue": "mail"},
+    "events.tasks.generate_event_previews_task": {"queue": "images"},
+    "events.tasks.build_export_task": {"queue": "default", "priority": 7},
+    "events.tasks.cleanup_exports_task": {"queue": "default", "priority": 9},
+    "weather.tasks.set_event_weather_forecast_task": {"queue": "weather-io", "priority": 3},
+    "weather.tasks.update_weather_snapshots": {"queue": "weather-io", "priority": 7},
+}
+
+# Подтверждаем задачу после выполнения и берём по одной: упавший воркер
+# не теряет задачи, а длинная задача не держит за собой чужую очередь.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+CELERY_TASK_ANNOTATIONS = {
+    "events.tasks.publish_scheduled_events_task": {"soft_time_limit": 45, "time_limit": 55},
+    # Повторная доставка письма после падения воркера хуже, чем потеря одной рассылки
+    "events.tasks.send_event_notification_task": {"acks_late": False, "soft_time_limit": 60, "time_limit": 90},
+    "events.tasks.generate_event_previews_task": {"soft_time_limit": 120, "time_limit": 150},
+    "events.tasks.build_export_task": {"soft_time_limit": 15 * 60, "time_limit": 16 * 60},
+    "weather.tasks.set_event_weather_forecast_task": {"soft_time_limit": 30, "time_limit": 45},
+    "weather.tasks.update_weather_snapshots": {"soft_time_limit": 50 * 60, "time_limit": 55 * 60},
+}
+
+# Через сколько секунд после последнего изменения события запрашивается прогноз.
+# Все более ранние запросы за это окно отменяются.
+WEATHER_FORECAST_COALESCE_SECONDS = int(os.getenv("WEATHER_FORECAST_COALESCE_SECONDS", "10"))
+
+# Сколько секунд чтения API не ставят повторную задачу прогноза для того же события.
+# Заодно ограничивает частоту повторных запросов, если прогноз на дату недоступен.
+WEATHER_FORECAST_PENDING_SECONDS = int(os.getenv("WEATHER_FORECAST_PENDING_SECONDS", "60"))
+
+# На сколько дней вперёд (включая сегодня) Open-Meteo отдаёт прогноз.
+# Даты за этим горизонтом в запрос не попадают.
+WEATHER_FORECAST_DAYS = int(os.getenv("WEATHER_FORECAST_DAYS", "16"))
+
+# Адрес Open-Meteo. Для нагрузочных тестов можно указать локальную заглушку:
+# python manage.py fake_weather_server, WEATHER_API_URL=http://localhost:8765/v1/forecast
+WEATHER_API_URL = os.getenv("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Предохранитель погодного API (weather/breaker.py): после THRESHOLD ошибок
+# за FAILURE_WINDOW секунд запросы не отправляются RECOVERY_SECONDS секунд.
+WEATHER_BREAKER_FAILURE_THRESHOLD = int(os.getenv("WEATHER_BREAKER_FAILURE_THRESHOLD", "5"))
+WEATHER_BREAKER_FAILURE_WINDOW = int(os.getenv("WEATHER_BREAKER_FAILURE_WINDOW", "60"))
+WEATHER_BREAKER_RECOVERY_SECONDS = int(os.getenv("WEATHER_BREAKER_RECOVERY_SECONDS", "60"))
+
+# Кэш выгрузок мероприятий (events/export_cache.py).
+# Выгрузки больше EXPORT_ASYNC_ROWS строк собираются только в Celery,
+# клиент получает 202 и повторяет запрос по ссылке.
+EXPORT_ASYNC_ROWS = int(os.getenv("EXPORT_ASYNC_ROWS", "10000"))
+EXPORT_CACHE_TIMEOUT = int(os.getenv("EXPORT_CACHE_TIMEOUT", str(60 * 60 * 24)))
+EXPORT_PENDING_SECONDS = int(os.getenv("EXPORT_PENDING_SECONDS", str(10 * 60)))
+EXPORT_RETRY_AFTER = int(os.getenv("EXPORT_RETRY_AFTER", "10"))
+
+# Сколько процессов проверяют строки большого XLSX-импорта (events/parsing.py).
+# 0 — по числу ядер, но не больше IMPORT_VALIDATION_MAX_WORKERS.
+# Пул один на веб-воркер и переиспользуется между импортами.
+IMPORT_VALIDATION_WORKERS = int(os.getenv("IMPORT_VALIDATION_WORKERS", "0"))
+IMPORT_VALIDATION_MAX_WORKERS = int(os.getenv("IMPORT_VALIDATION_MAX_WORKERS", "4"))
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -185,6 +292,10 @@ else:
     EMAIL_HOST_PASSWORD = os.getenv("MAILERSEND_KEY")
     DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# Сколько секунд процесс (web/worker) держит в памяти настройки рассылки.
+# В процессе, где настройки сохранили, кэш сбрасывается сразу сигналом.
+EMAIL_NOTIFICATION_CONFIG_TTL = int(os.getenv("EMAIL_NOTIFICATION_CONFIG_TTL", "60"))
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 STATIC_URL = 'static/'
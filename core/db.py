@@ -0,0 +1,60 @@
+# core/db.py
+"""
+Помощники для массовой записи в PostgreSQL в обход ORM (сиды, импорт).
+Сигналы моделей здесь не срабатывают — побочные эффекты вызывающий код делает сам.
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def _columns(model, fields):
+    return [model._meta.get_field(name).column for name in fields]
+
+
+def reserve_ids(model, count, using=DEFAULT_DB_ALIAS):
+    """
+    Забирает count значений из последовательности первичного ключа модели.
+    Нужна, когда id строк известны до вставки (например, чтобы сразу
+    записать связанные строки через COPY).
+    """
+    if count <= 0:
+        return []
+    opts = model._meta
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [opts.db_table, opts.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _adapt(value):
+    # GEOS-геометрия уходит в COPY как EWKT: PostGIS принимает его текстом
+    ewkt = getattr(value, "ewkt", None)
+    return ewkt if ewkt is not None else value
+
+
+def copy_into(table, columns, rows, using=DEFAULT_DB_ALIAS):
+    """
+    COPY table (columns) FROM STDIN (psycopg 3) для произвольной таблицы,
+    например временной staging-таблицы. Возвращает число записанных строк.
+    """
+    connection = connections[using]
+    quoted = ", ".join(connection.ops.quote_name(column) for column in columns)
+    sql = f"COPY {connection.ops.quote_name(table)} ({quoted}) FROM STDIN"
+
+    count = 0
+    with connection.cursor() as cursor:
+        with cursor.copy(sql) as copy:
+            for row in rows:
+                copy.write_row([_adapt(value) for value in row])
+                count += 1
+    return count
+
+
+def copy_rows(model, fields, rows, using=DEFAULT_DB_ALIAS):
+    """
+    Записывает rows (последовательности значений в порядке fields) в таблицу модели
+    через COPY ... FROM STDIN. Поля — имена или attname полей модели.
+    Возвращает число записанных строк.
+    """
+    return copy_into(model._meta.db_table, _columns(model, fields), rows, using=using)
@@ -0,0 +1,119 @@
+# core/dispatch.py
+import logging
+import threading
+import weakref
+
+from celery import current_app
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class TaskOutbox:
+    """
+    Накопитель задач Celery для одной транзакции.
+    На транзакцию регистрируется один on_commit-колбэк, который после коммита
+    отправляет все накопленные намерения одной пачкой, дедуплицируя их
+    по (имя задачи, аргументы).
+
+    Откаты обрабатывает сам Django: колбэки, зарегистрированные внутри откаченной
+    точки сохранения, он выбрасывает. Поэтому к каждому намерению регистрируется
+    пустая отметка, а outbox держит на неё только слабую ссылку: выброшенная
+    отметка сразу освобождается (подсчёт ссылок CPython), и намерение не уходит.
+    Так же outbox узнаёт, что его собственный колбэк выброшен или уже выполнен:
+    в enqueue_on_commit тогда создаётся новый.
+    """
+
+    def __init__(self, using):
+        self.using = using
+        self.intents = []
+
+    def add(self, task, args, kwargs):
+        def pending():
+            pass
+
+        self.intents.append(((task, args, kwargs), weakref.ref(pending)))
+        transaction.on_commit(pending, using=self.using)
+
+    def flush(self):
+        intents, seen = [], set()
+        for intent, marker in self.intents:
+            if marker() is None:
+                # Отметку выбросил откат точки сохранения
+                continue
+            task, args, kwargs = intent
+            try:
+                key = (task.name, args, tuple(sorted(kwargs.items())))
+                if key in seen:
+                    continue
+                seen.add(key)
+            except TypeError:
+                # Нехэшируемые аргументы (списки, словари) не дедуплицируем
+                pass
+            intents.append(intent)
+
+        self.intents = []
+        if intents:
+            send_batch(intents)
+
+
+def send_batch(intents):
+    """
+    Отправляет список (task, args, kwargs) через одно соединение с брокером.
+    """
+    app = current_app
+    if app.conf.task_always_eager:
+        for task, args, kwargs in intents:
+            task.apply_async(args=args, kwargs=kwargs)
+        return
+
+    with app.producer_or_acquire() as producer:
+        for task, args, kwargs in intents:
+            task.apply_async(args=args, kwargs=kwargs, producer=producer)
+
+    logger.debug("Dispatched %d task(s) after commit", len(intents))
+
+
+def _get_outbox(using):
+    """
+    outbox текущей транзакции. Пока Django держит его колбэк flush, слабая ссылка
+    на колбэк жива; после коммита, отката или отката точки сохранения,
+    в которой он был зарегистрирован, — нет.
+    """
+    if not hasattr(_local, "outboxes"):
+        _local.outboxes = {}
+
+    registered = _local.outboxes.get(using)
+    if registered is not None:
+        callback, outbox = registered
+        if callback() is not None:
+            return outbox
+
+    outbox = TaskOutbox(using)
+
+    def flush():
+        outbox.flush()
+
+    _local.outboxes[using] = (weakref.ref(flush), outbox)
+    # robust=True: недоступный брокер не должен ронять уже закоммиченный запрос.
+    transaction.on_commit(flush, using=using, robust=True)
+    return outbox
+
+
+def enqueue_on_commit(task, *args, using=None, **kwargs):
+    """
+    Ставит задачу в очередь только после успешного коммита текущей транзакции.
+    Вне транзакции (autocommit) задача отправляется сразу.
+    Повторные вызовы с теми же аргументами внутри транзакции схлопываются в один,
+    задачи из откаченного вложенного atomic не отправляются.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = transaction.get_connection(using)
+
+    if not connection.in_atomic_block:
+        send_batch([(task, args, kwargs)])
+        return
+
+    _get_outbox(using).add(task, args, kwargs)
@@ -0,0 +1,25 @@
+# core/filters.py
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import filters
+
+
+class OrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter, который пропускает сортировку по аннотации, которой нет в запросе.
+    Например, distance добавляет только фильтр near: ?ordering=distance без near
+    сортирует по умолчанию, а не падает с FieldError.
+    """
+
+    def remove_invalid_fields(self, queryset, fields, view, request):
+        terms = super().remove_invalid_fields(queryset, fields, view, request)
+        return [term for term in terms if not self._missing_annotation(queryset, term.lstrip("-"))]
+
+    @staticmethod
+    def _missing_annotation(queryset, name):
+        if "__" in name or name in queryset.query.annotations:
+            return False
+        try:
+            queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return True
+        return False
@@ -0,0 +1,91 @@
+# core/management/commands/bench_queues.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tasks import queue_latency_probe
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет задержку в очередях Celery под смешанной нагрузкой. "
+        "Нагружает фоновые очереди долгими задачами и измеряет, сколько ждут "
+        "короткие задачи в целевой очереди. Нужны запущенные воркеры."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--probe-queue', default='publish', help='Очередь, задержку которой меряем')
+        parser.add_argument(
+            '--load-queues',
+            default='weather-io,mail',
+            help='Очереди с фоновой нагрузкой (через запятую)'
+        )
+        parser.add_argument('--load-tasks', type=int, default=200, help='Фоновых задач на каждую очередь')
+        parser.add_argument('--load-work', type=float, default=0.5, help='Длительность фоновой задачи, сек')
+        parser.add_argument('--samples', type=int, default=50, help='Количество замеров')
+        parser.add_argument('--interval', type=float, default=0.1, help='Пауза между замерами, сек')
+        parser.add_argument('--timeout', type=float, default=300, help='Сколько ждать результатов, сек')
+        parser.add_argument(
+            '--shared',
+            action='store_true',
+            help='Слать всё в одну очередь default (для сравнения с раздельной маршрутизацией)'
+        )
+
+    def handle(self, *args, **options):
+        probe_queue = 'default' if options['shared'] else options['probe_queue']
+        load_queues = [q.strip() for q in options['load_queues'].split(',') if q.strip()]
+        if options['shared']:
+            load_queues = ['default'] * len(load_queues)
+
+        self.stdout.write(f"Фоновая нагрузка: {options['load_tasks']} задач × {len(load_queues)} очередей")
+        background = []
+        for queue in load_queues:
+            for _ in range(options['load_tasks']):
+                background.append(
+                    queue_latency_probe.apply_async(
+                        args=(time.time(), options['load_work']),
+                        queue=queue,
+                    )
+                )
+
+        self.stdout.write(f"Замеры в очереди '{probe_queue}': {options['samples']}")
+        probes = []
+        for _ in range(options['samples']):
+            probes.append(
+                queue_latency_probe.apply_async(
+                    args=(time.time(), 0.0),
+                    queue=probe_queue,
+                    priority=0,
+                )
+            )
+            time.sleep(options['interval'])
+
+        deadline = time.monotonic() + options['timeout']
+        latencies = []
+        for result in probes:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError('Не дождались результатов замеров, проверьте, что воркеры запущены.')
+            latencies.append(result.get(timeout=remaining))
+
+        self._report(f"Очередь {probe_queue}", latencies)
+
+        for result in background:
+            result.forget()
+
+    def _report(self, label, latencies):
+        ms = [v * 1000 for v in latencies]
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: n={len(ms)} "
+            f"p50={statistics.median(ms):.1f}ms "
+            f"p95={percentile(ms, 95):.1f}ms "
+            f"p99={percentile(ms, 99):.1f}ms "
+            f"max={max(ms):.1f}ms"
+        ))
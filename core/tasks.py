@@ -0,0 +1,16 @@
+# core/tasks.py
+import time
+
+from celery import shared_task
+
+
+@shared_task(ignore_result=False)
+def queue_latency_probe(sent_at, work_seconds=0.0):
+    """
+    Служебная задача для bench_queues: возвращает, сколько секунд она ждала в очереди.
+    work_seconds имитирует полезную нагрузку, чтобы занять воркер.
+    """
+    started_at = time.time()
+    if work_seconds:
+        time.sleep(work_seconds)
+    return started_at - sent_at
@@ -1,7 +1,7 @@
 # events/admin.py
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Event, EventImage, EmailNotificationConfig
+from .models import Event, EventImage, EventImport, EmailNotificationConfig
 
 # Inline позволяет добавлять картинки прямо на странице редактирования События
 class EventImageInline(admin.TabularInline):
@@ -47,6 +47,16 @@ class EventAdmin(admin.ModelAdmin):
         return "Нет фото"
     preview_thumb.short_description = "Обложка"
 
+@admin.register(EventImport)
+class EventImportAdmin(admin.ModelAdmin):
+    list_display = ('checksum', 'author', 'status', 'last_line', 'created_count', 'skipped_count', 'updated_at')
+    list_filter = ('status',)
+    readonly_fields = ('author', 'checksum', 'last_line', 'created_count', 'skipped_count', 'errors', 'started_at', 'updated_at')
+
+    def has_add_permission(self, request):
+        # Чекпоинты создаёт только импорт; удалить запись — значит начать файл заново
+        return False
+
 @admin.register(EmailNotificationConfig)
 class EmailNotificationConfigAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
@@ -0,0 +1,107 @@
+# events/bulk.py
+import threading
+from contextlib import contextmanager
+
+from core.dispatch import enqueue_on_commit
+
+from .models import Event, EventStatus
+from .notifications import get_notification_config
+
+_state = threading.local()
+
+
+class EventBulkBatch:
+    """
+    Собирает id событий и картинок, затронутых массовой записью,
+    чтобы выполнить побочные эффекты сигналов один раз в конце.
+    """
+
+    def __init__(self):
+        self.event_ids = set()
+        self.notify_ids = set()
+        self.reset_weather_ids = set()
+        self.image_event_ids = set()
+
+    def add_events(self, events, notify=False, reset_weather=False):
+        """
+        events — экземпляры Event или их id.
+        notify: событие только что опубликовано, нужно письмо.
+        reset_weather: изменились дата или площадка, старый прогноз больше не актуален.
+        """
+        ids = {getattr(e, "pk", e) for e in events}
+        self.event_ids |= ids
+        if notify:
+            self.notify_ids |= ids
+        if reset_weather:
+            self.reset_weather_ids |= ids
+
+    def add_images(self, images):
+        """
+        images — экземпляры EventImage или id событий, к которым добавили картинки.
+        """
+        self.image_event_ids |= {getattr(i, "event_id", i) for i in images}
+
+    def flush(self):
+        if self.reset_weather_ids:
+            Event.objects.filter(id__in=self.reset_weather_ids).update(weather=None)
+
+        if self.event_ids:
+            self._dispatch_tasks()
+
+        if self.image_event_ids:
+            self._generate_previews()
+
+    def _dispatch_tasks(self):
+        from weather.tasks import set_event_weather_forecast_task
+        from .tasks import send_event_notification_task
+
+        published = Event.objects.filter(
+            id__in=self.event_ids,
+            status=EventStatus.PUBLISHED,
+        ).values_list("id", "weather_id")
+
+        notify = get_notification_config() is not None
+        for event_id, weather_id in published:
+            if weather_id is None:
+                enqueue_on_commit(set_event_weather_forecast_task, event_id)
+            if notify and event_id in self.notify_ids:
+                enqueue_on_commit(send_event_notification_task, event_id)
+
+    def _generate_previews(self):
+        from .tasks import generate_event_previews_task
+
+        # Ресайз картинок — CPU-работа, отдаём её в очередь images
+        enqueue_on_commit(generate_event_previews_task, tuple(sorted(self.image_event_ids)))
+
+
+def get_active_batch():
+    return getattr(_state, "batch", None)
+
+
+@contextmanager
+def suspend_event_signals():
+    """
+    Отключает построчные обработчики сигналов Event/EventImage.
+
+    Внутри блока можно писать через save(), bulk_create() или update():
+    затронутые строки регистрируются в batch (сигналами автоматически,
+    для bulk-операций — через batch.add_events()/add_images()),
+    а погода, письма и превью обрабатываются одним шагом на выходе.
+    При исключении побочные эффекты не выполняются.
+
+        with suspend_event_signals() as batch:
+            created = Event.objects.bulk_create(objs)
+            batch.add_events(created, notify=True)
+    """
+    batch = get_active_batch()
+    if batch is not None:
+        # Вложенный блок работает на общий batch внешнего
+        yield batch
+        return
+
+    batch = _state.batch = EventBulkBatch()
+    try:
+        yield batch
+    finally:
+        _state.batch = None
+    batch.flush()
@@ -0,0 +1,116 @@
+# events/dateparse.py
+"""
+Разбор дат из ячеек импорта (XLSX, CSV).
+
+Большинство значений — ISO-строки вида '2026-01-01 10:00:00' или '2026-01-01',
+их разбирает datetime.fromisoformat без исключений в нормальном пути.
+Остальные форматы проверяются заранее скомпилированными регулярками,
+числа считаются серийными датами Excel. В файле одни и те же даты
+повторяются, поэтому разбор строки запоминается (lru_cache).
+"""
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+# День 0 серийных дат Excel с учётом ложного 29.02.1900
+EXCEL_EPOCH = datetime(1899, 12, 30)
+# 1970-01-01: меньшие числа в ячейке даты — это не дата, а, например, рейтинг или
+# ошибка в колонке (5 иначе превратилось бы в 04.01.1900)
+MIN_EXCEL_SERIAL = 25569
+# 9999-12-31 — максимум Excel
+MAX_EXCEL_SERIAL = 2958465
+
+PARSE_CACHE_SIZE = 4096
+
+_TIME = r"(?:[ T](?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?)?"
+
+# Дополнительные форматы, которые встречаются в выгрузках партнёров
+EXTRA_FORMATS = [
+    # 31.12.2026, 31.12.2026 18:30, 31.12.2026 18:30:00
+    re.compile(r"(?P<day>\d{1,2})\.(?P<month>\d{1,2})\.(?P<year>\d{4})" + _TIME),
+    # 31/12/2026 18:30
+    re.compile(r"(?P<day>\d{1,2})/(?P<month>\d{1,2})/(?P<year>\d{4})" + _TIME),
+    # 2026/12/31 18:30
+    re.compile(r"(?P<year>\d{4})/(?P<month>\d{1,2})/(?P<day>\d{1,2})" + _TIME),
+]
+
+
+def _from_match(match):
+    parts = match.groupdict()
+    return datetime(
+        int(parts["year"]),
+        int(parts["month"]),
+        int(parts["day"]),
+        int(parts["hour"] or 0),
+        int(parts["minute"] or 0),
+        int(parts["second"] or 0),
+    )
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_datetime_string(value):
+    """
+    Строка -> datetime (naive, если в строке нет смещения) или None.
+    """
+    value = value.strip()
+    if not value:
+        return None
+
+    # Быстрый путь: ISO 8601 начинается с года
+    if value[:4].isdigit():
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+
+    for pattern in EXTRA_FORMATS:
+        match = pattern.fullmatch(value)
+        if match:
+            try:
+                return _from_match(match)
+            except ValueError:
+                return None
+    return None
+
+
+def from_excel_serial(value):
+    """
+    Серийный номер Excel (дни с 30.12.1899, дробная часть — время) -> naive datetime.
+    Даты раньше 1970 года не принимаются.
+    """
+    if not MIN_EXCEL_SERIAL <= value <= MAX_EXCEL_SERIAL:
+        return None
+    # Округляем до секунды: в float дробная часть дня хранится неточно
+    return EXCEL_EPOCH + timedelta(seconds=round(value * 86400))
+
+
+def parse_import_datetime(value, tz=None):
+    """
+    Значение ячейки (datetime, date, число или строка) -> aware datetime или None.
+    Naive-значения считаются временем в tz (по умолчанию — текущая зона Django).
+    tz лучше получить один раз на весь файл и передавать сюда.
+    """
+    if value is None or value == "":
+        return None
+
+    if isinstance(value, datetime):
+        dt = value
+    elif isinstance(value, str):
+        dt = parse_datetime_string(value)
+    elif isinstance(value, bool):
+        return None
+    elif isinstance(value, (int, float)):
+        dt = from_excel_serial(value)
+    elif isinstance(value, date):
+        dt = datetime(value.year, value.month, value.day)
+    else:
+        return None
+
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        # Для zoneinfo это то же, что make_aware, но без проверок на каждое значение
+        return dt.replace(tzinfo=tz or timezone.get_current_timezone())
+    return dt
@@ -0,0 +1,222 @@
+# events/export_cache.py
+"""
+Кэш готовых выгрузок мероприятий.
+
+Ключ выгрузки — нормализованные параметры фильтра (только те, что читают
+фильтры EventViewSet, остальные параметры запроса игнорируются) + область видимости
+(суперпользователь видит все статусы) + формат. Версия данных — max(updated_at)
+и количество строк отфильтрованного QuerySet: любое изменение, добавление
+или удаление подходящего события даёт новую версию и, значит, новый файл.
+Файлы лежат в default_storage (exports/<ключ>-<версия>.<расширение>),
+поэтому свежая выгрузка отдаётся без повторной сборки. Актуальный файл ключа
+записан в кэше на EXPORT_CACHE_TIMEOUT; файлы без такой записи удаляет
+cleanup_exports (периодическая задача cleanup_exports_task).
+Переименование площадки updated_at события не меняет — такие правки
+попадут в выгрузку со следующим изменением самих событий.
+"""
+import hashlib
+import tempfile
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.settings import api_settings
+
+from .exports import build_parquet, stream_csv
+from .filters import EventFilter
+from .xlsx_services import build_xlsx
+
+# Параметры, от которых зависит содержимое выгрузки: фильтры EventFilter
+# (включая near/radius_km/bbox), поиск и сортировка. Прочие в ключ не попадают,
+# иначе произвольный ?x=1, ?x=2, ... собирал бы каждый раз новый файл.
+EXPORT_PARAMS = frozenset(EventFilter.base_filters) | {api_settings.SEARCH_PARAM, api_settings.ORDERING_PARAM}
+
+EXPORT_EXTENSIONS = {"xlsx": "xlsx", "csv": "csv", "parquet": "parquet"}
+EXPORT_CONTENT_TYPES = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+EXPORT_DIR = "exports"
+
+
+@dataclass(frozen=True)
+class ExportEntry:
+    key: str
+    version: str
+    rows: int
+    export_format: str
+
+    @property
+    def path(self):
+        return f"{EXPORT_DIR}/{self.key}-{self.version}.{EXPORT_EXTENSIONS[self.export_format]}"
+
+    @property
+    def filename(self):
+        return f"events_export.{EXPORT_EXTENSIONS[self.export_format]}"
+
+
+def normalize_params(query_params):
+    """
+    Строка запроса только из EXPORT_PARAMS, с отсортированными ключами и значениями:
+    ?b=2&a=1 и ?a=1&b=2 дают одну и ту же выгрузку.
+    """
+    items = []
+    for name, values in sorted(query_params.lists()):
+        if name not in EXPORT_PARAMS:
+            continue
+        items.extend((name, value) for value in sorted(values) if value != "")
+    return urlencode(items)
+
+
+def export_scope(user):
+    return "admin" if user.is_authenticated and user.is_superuser else "public"
+
+
+def make_key(normalized, scope, export_format):
+    raw = f"{scope}|{export_format}|{normalized}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def data_version(queryset):
+    """
+    (версия, количество строк) для отфильтрованного QuerySet — один агрегирующий запрос.
+    """
+    stats = queryset.order_by().aggregate(last_update=Max("updated_at"), rows=Count("id"))
+    last_update = stats["last_update"].isoformat() if stats["last_update"] else "-"
+    version = hashlib.sha1(f"{last_update}|{stats['rows']}".encode("utf-8")).hexdigest()[:16]
+    return version, stats["rows"]
+
+
+def get_export_entry(queryset, query_params, user, export_format):
+    key = make_key(normalize_params(query_params), export_scope(user), export_format)
+    version, rows = data_version(queryset)
+    return ExportEntry(key=key, version=version, rows=rows, export_format=export_format)
+
+
+def current_path_key(key):
+    return f"events:exports:{key}"
+
+
+def pending_key(entry):
+    return f"events:exports:pending:{entry.key}:{entry.version}"
+
+
+def fresh_export_path(entry):
+    """
+    Путь к собранному файлу текущей версии или None. Источник истины — запись
+    в кэше: файл без неё считается мусором и будет удалён cleanup_exports.
+    Хранилище может сохранить файл под другим именем (exports/<ключ>-<версия>_abc1234.xlsx),
+    если параллельная сборка заняла entry.path, поэтому сверяем префикс версии.
+    """
+    path = cache.get(current_path_key(entry.key))
+    stem, extension = entry.path.rsplit(".", 1)
+    if path and path.startswith(stem) and path.endswith(f".{extension}"):
+        return path
+    return None
+
+
+def _content(queryset, export_format):
+    if export_format == "xlsx":
+        return ContentFile(build_xlsx(queryset))
+    if export_format == "parquet":
+        return File(build_parquet(queryset))
+
+    output = tempfile.TemporaryFile()
+    for line in stream_csv(queryset):
+        output.write(line.encode("utf-8"))
+    output.seek(0)
+    return File(output)
+
+
+def build_export(queryset, entry):
+    """
+    Собирает выгрузку, кладёт её в хранилище и удаляет файл предыдущей версии.
+    Возвращает имя, под которым файл сохранён: при параллельной сборке
+    хранилище выбирает свободное имя вместо entry.path.
+    """
+    content = _content(queryset, entry.export_format)
+    try:
+        path = default_storage.save(entry.path, content)
+    finally:
+        content.close()
+
+    timeout = getattr(settings, "EXPORT_CACHE_TIMEOUT", 60 * 60 * 24)
+    previous = cache.get(current_path_key(entry.key))
+    cache.set(current_path_key(entry.key), path, timeout=timeout)
+    if previous and previous != path:
+        default_storage.delete(previous)
+    return path
+
+
+def cleanup_exports(grace_seconds=None):
+    """
+    Удаляет файлы выгрузок, на которые больше не указывает кэш: старые версии,
+    ключи с истёкшим EXPORT_CACHE_TIMEOUT. Файлы моложе grace_seconds не трогаем —
+    их могли только что сохранить и ещё не записать в кэш.
+    Возвращает количество удалённых файлов.
+    """
+    if grace_seconds is None:
+        grace_seconds = getattr(settings, "EXPORT_PENDING_SECONDS", 10 * 60)
+
+    try:
+        _, names = default_storage.listdir(EXPORT_DIR)
+    except FileNotFoundError:
+        return 0
+
+    paths = {name: f"{EXPORT_DIR}/{name}" for name in names}
+    pointers = cache.get_many([current_path_key(name.split("-", 1)[0]) for name in names])
+    live = set(pointers.values())
+    cutoff = timezone.now() - timedelta(seconds=grace_seconds)
+
+    removed = 0
+    for name, path in paths.items():
+        if path in live:
+            continue
+        try:
+            if default_storage.get_modified_time(path) > cutoff:
+                continue
+        except (FileNotFoundError, NotImplementedError):
+            pass
+        default_storage.delete(path)
+        removed += 1
+    return removed
+
+
+def request_export(entry, query_string, user):
+    """
+    Ставит сборку выгрузки в Celery, если она ещё не поставлена для этой версии.
+    """
+    from .tasks import build_export_task
+
+    timeout = getattr(settings, "EXPORT_PENDING_SECONDS", 10 * 60)
+    if cache.add(pending_key(entry), True, timeout=timeout):
+        build_export_task.delay(query_string, user.pk if user.is_authenticated else None, entry.export_format)
+
+
+def export_queryset(query_string, user):
+    """
+    Тот же QuerySet, что получает EventViewSet.export для этих параметров и пользователя.
+    Нужен воркеру, у которого нет исходного запроса.
+    """
+    from rest_framework.request import Request
+
+    from .views import EventViewSet
+
+    http_request = HttpRequest()
+    http_request.method = "GET"
+    http_request.GET = QueryDict(query_string)
+    request = Request(http_request)
+    request.user = user
+
+    view = EventViewSet(request=request, action="export", format_kwarg=None, args=(), kwargs={})
+    return view.filter_queryset(view.get_queryset())
@@ -0,0 +1,100 @@
+# events/exports.py
+"""
+Выгрузка мероприятий в CSV и Parquet (те же колонки, что и в XLSX-экспорте).
+Строки читаются серверным курсором пачками по EXPORT_CHUNK_SIZE,
+поэтому память не зависит от размера выгрузки.
+"""
+import csv
+import tempfile
+
+EXPORT_CHUNK_SIZE = 5000
+
+# (заголовок, поле для values_list)
+EXPORT_COLUMNS = [
+    ("Дата публикации", "publish_at"),
+    ("Дата начала", "start_at"),
+    ("Дата завершения", "end_at"),
+    ("Место проведения", "venue__name"),
+    ("Рейтинг", "rating"),
+]
+EXPORT_HEADERS = [header for header, _ in EXPORT_COLUMNS]
+
+# Для Parquet — машинные имена колонок
+PARQUET_NAMES = ["publish_at", "start_at", "end_at", "venue", "rating"]
+
+
+def export_rows(queryset):
+    """
+    Кортежи значений в порядке EXPORT_COLUMNS, без создания моделей.
+    iterator() на PostgreSQL идёт через серверный курсор.
+    """
+    fields = [field for _, field in EXPORT_COLUMNS]
+    return queryset.select_related(None).values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def _format_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M") if value else ""
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: writerow() сразу возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset):
+    """
+    Генератор строк CSV для StreamingHttpResponse.
+    BOM в начале — чтобы Excel открыл UTF-8 без вопросов.
+    """
+    writer = csv.writer(_Echo())
+    yield "﻿" + writer.writerow(EXPORT_HEADERS)
+    for publish_at, start_at, end_at, venue, rating in export_rows(queryset):
+        yield writer.writerow([
+            _format_datetime(publish_at),
+            _format_datetime(start_at),
+            _format_datetime(end_at),
+            venue,
+            rating,
+        ])
+
+
+def build_parquet(queryset, batch_rows=EXPORT_CHUNK_SIZE):
+    """
+    Пишет выгрузку в Parquet пачками RecordBatch во временный файл
+    (Parquet пишет футер в конце, поэтому отдать его потоком нельзя).
+    Возвращает открытый файл, позиция — в начале.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("publish_at", pa.timestamp("us", tz="UTC")),
+        ("start_at", pa.timestamp("us", tz="UTC")),
+        ("end_at", pa.timestamp("us", tz="UTC")),
+        ("venue", pa.string()),
+        ("rating", pa.int16()),
+    ])
+
+    output = tempfile.TemporaryFile()
+    with pq.ParquetWriter(output, schema, compression="snappy") as writer:
+        columns = [[] for _ in PARQUET_NAMES]
+        for row in export_rows(queryset):
+            for column, value in zip(columns, row):
+                column.append(value)
+            if len(columns[0]) >= batch_rows:
+                writer.write_batch(pa.RecordBatch.from_arrays(
+                    [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                    schema=schema,
+                ))
+                columns = [[] for _ in PARQUET_NAMES]
+        # Пустая выгрузка — валидный файл только со схемой
+        if columns[0]:
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+
+    output.seek(0)
+    return output
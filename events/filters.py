@@ -2,9 +2,12 @@
 import django_filters
 from .models import Event
 
+from venues.filters import SpatialFilterSet
 from venues.models import Venue
 
-class EventFilter(django_filters.FilterSet):
+class EventFilter(SpatialFilterSet):
+    location_field = "venue__location"
+
     start_from = django_filters.IsoDateTimeFilter(field_name="start_at", lookup_expr="gte")
     start_to = django_filters.IsoDateTimeFilter(field_name="start_at", lookup_expr="lte")
 
@@ -0,0 +1,205 @@
+# events/ingest.py
+"""
+Массовый импорт мероприятий через PostgreSQL COPY (ночные выгрузки партнёров).
+
+Строки файла проверяются в Python (parse_event_row, в том числе длина
+названия и площадки — staging-таблица text, а Event и Venue нет) и потоком
+пишутся COPY во временную staging-таблицу. Площадки находятся и создаются одним запросом на всю выгрузку,
+события переносятся в таблицу Event одним INSERT ... SELECT.
+Отклонённые строки возвращаются с номерами строк файла, как в import_events_from_xlsx.
+События с уже существующим import_key пропускаются (ON CONFLICT DO NOTHING),
+поэтому повторная загрузка той же выгрузки дубликатов не создаёт.
+
+Сигналы Event не срабатывают: импортированные события — черновики,
+погода и рассылки для них не нужны.
+"""
+import csv
+import io
+import zipfile
+
+import openpyxl
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.db import copy_into
+from venues.models import Venue
+from venues.tiles import invalidate_tiles
+from .models import Event, EventStatus
+from .parsing import make_import_key, parse_event_row
+
+STAGING_TABLE = "event_ingest_staging"
+# Порядок совпадает с кортежем parse_event_row, в конце — import_key
+STAGING_COLUMNS = [
+    "line_no", "title", "description", "publish_at", "start_at", "end_at",
+    "venue_name", "lon", "lat", "rating", "import_key",
+]
+
+STAGING_DDL = f"""
+CREATE TEMPORARY TABLE {STAGING_TABLE} (
+    line_no integer PRIMARY KEY,
+    title text NOT NULL,
+    description text NOT NULL,
+    publish_at timestamptz,
+    start_at timestamptz NOT NULL,
+    end_at timestamptz NOT NULL,
+    venue_name text NOT NULL,
+    lon double precision,
+    lat double precision,
+    rating smallint NOT NULL,
+    import_key text NOT NULL,
+    venue_id bigint
+) ON COMMIT DROP
+"""
+
+# Площадки, которых ещё нет, создаём по первой строке с координатами
+CREATE_VENUES_SQL = f"""
+INSERT INTO {{venue}} (name, location)
+SELECT DISTINCT ON (lower(s.venue_name))
+    s.venue_name, ST_SetSRID(ST_MakePoint(s.lon, s.lat), 4326)
+FROM {STAGING_TABLE} s
+WHERE s.lon IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM {{venue}} v WHERE lower(v.name) = lower(s.venue_name))
+ORDER BY lower(s.venue_name), s.line_no
+ON CONFLICT (name) DO NOTHING
+"""
+
+# lower(name) обслуживается индексом venue_name_lower_idx
+RESOLVE_VENUES_SQL = f"""
+UPDATE {STAGING_TABLE} s
+SET venue_id = v.id
+FROM (
+    SELECT lower(name) AS name_lower, min(id) AS id
+    FROM {{venue}}
+    WHERE lower(name) IN (SELECT lower(venue_name) FROM {STAGING_TABLE})
+    GROUP BY lower(name)
+) v
+WHERE lower(s.venue_name) = v.name_lower
+"""
+
+UNRESOLVED_SQL = f"""
+SELECT line_no, venue_name FROM {STAGING_TABLE} WHERE venue_id IS NULL ORDER BY line_no
+"""
+
+MERGE_SQL = f"""
+INSERT INTO {{event}} (
+    title, description, publish_at, start_at, end_at,
+    venue_id, author_id, rating, status, import_key, created_at, updated_at
+)
+SELECT
+    s.title, s.description, s.publish_at, s.start_at, s.end_at,
+    s.venue_id, %(author_id)s, s.rating, %(status)s, s.import_key, %(now)s, %(now)s
+FROM {STAGING_TABLE} s
+WHERE s.venue_id IS NOT NULL
+ORDER BY s.line_no
+ON CONFLICT (import_key) DO NOTHING
+"""
+
+
+def ingest_event_rows(rows, user):
+    """
+    rows — итерируемое (номер строки, значения). Возвращает {"created", "skipped", "staged", "errors"}.
+    Всё выполняется в одной транзакции: либо все принятые строки, либо ничего.
+    """
+    errors = []
+
+    def valid_rows():
+        tz = timezone.get_current_timezone()
+        for line_no, row in rows:
+            if not row or not row[0]:
+                continue
+            try:
+                values = parse_event_row(line_no, row, tz)
+            except ValueError as e:
+                errors.append((line_no, str(e)))
+                continue
+            # title, start_at, venue_name
+            yield values + (make_import_key(values[1], values[4], values[6]),)
+
+    tables = {
+        "venue": connection.ops.quote_name(Venue._meta.db_table),
+        "event": connection.ops.quote_name(Event._meta.db_table),
+    }
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+            cursor.execute(STAGING_DDL)
+
+        staged = copy_into(STAGING_TABLE, STAGING_COLUMNS, valid_rows())
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+            cursor.execute(CREATE_VENUES_SQL.format(**tables))
+            venues_created = cursor.rowcount
+            cursor.execute(RESOLVE_VENUES_SQL.format(**tables))
+
+            cursor.execute(UNRESOLVED_SQL)
+            unresolved = cursor.fetchall()
+            for line_no, venue_name in unresolved:
+                errors.append((line_no, f"Venue '{venue_name}' not found and no coords"))
+
+            cursor.execute(MERGE_SQL.format(**tables), {
+                "author_id": user.pk,
+                "status": EventStatus.DRAFT,
+                "now": timezone.now(),
+            })
+            created = cursor.rowcount
+            # Строки, чей import_key уже есть в таблице (повторная загрузка)
+            skipped = staged - len(unresolved) - created
+
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+    if venues_created:
+        # Площадки вставлены SQL-ом, post_save не было
+        invalidate_tiles()
+
+    return {
+        "created": created,
+        "skipped": skipped,
+        "staged": staged,
+        "errors": [f"Row {line_no}: {message}" for line_no, message in sorted(errors)],
+    }
+
+
+def iter_xlsx_rows(file_obj):
+    # read_only: openpyxl читает лист потоком, не держа весь файл в памяти
+    wb = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+    try:
+        yield from enumerate(wb.active.iter_rows(min_row=2, values_only=True), start=2)
+    finally:
+        wb.close()
+
+
+def iter_csv_rows(file_obj, encoding="utf-8-sig"):
+    """
+    CSV с заголовком и теми же колонками, что и XLSX. Разделитель — запятая или точка с запятой.
+    """
+    if isinstance(file_obj, io.TextIOBase):
+        text = file_obj
+    else:
+        # UploadedFile Django — обёртка, TextIOWrapper нужен сам бинарный поток
+        text = io.TextIOWrapper(getattr(file_obj, "file", file_obj), encoding=encoding, newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(text, dialect)
+    next(reader, None)
+    for line_no, row in enumerate(reader, start=2):
+        yield line_no, [value if value != "" else None for value in row]
+
+
+def ingest_events_from_xlsx(file_obj, user):
+    try:
+        return ingest_event_rows(iter_xlsx_rows(file_obj), user)
+    except (zipfile.BadZipFile, OSError):
+        return {"created": 0, "errors": ["Файл поврежден или не является корректным XLSX."]}
+
+
+def ingest_events_from_csv(file_obj, user):
+    try:
+        return ingest_event_rows(iter_csv_rows(file_obj), user)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return {"created": 0, "errors": [f"Некорректный CSV: {e}"]}
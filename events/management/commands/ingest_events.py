@@ -0,0 +1,38 @@
+# events/management/commands/ingest_events.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from events.ingest import ingest_events_from_csv, ingest_events_from_xlsx
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Массовый импорт мероприятий из XLSX/CSV через COPY (ночные выгрузки партнёров)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу .xlsx или .csv")
+        parser.add_argument(
+            "--author",
+            help="username автора событий (по умолчанию — первый суперпользователь)",
+        )
+
+    def handle(self, *args, **options):
+        if options["author"]:
+            author = User.objects.filter(username=options["author"]).first()
+        else:
+            author = User.objects.filter(is_superuser=True).first()
+        if author is None:
+            raise CommandError("Автор не найден")
+
+        path = options["path"]
+        ingest = ingest_events_from_csv if path.lower().endswith(".csv") else ingest_events_from_xlsx
+        with open(path, "rb") as file_obj:
+            result = ingest(file_obj, author)
+
+        for error in result["errors"]:
+            self.stdout.write(self.style.WARNING(error))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Создано {result['created']} событий, уже было: {result.get('skipped', 0)}, "
+            f"отклонено строк: {len(result['errors'])}"
+        ))
@@ -1,14 +1,24 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.db import transaction
 from django.utils import timezone
-from faker import Faker
-import random
-from datetime import timedelta
+import multiprocessing
+import time
+from core.db import copy_rows, reserve_ids
 from venues.models import Venue
+from venues.tiles import invalidate_tiles
+from events.bulk import suspend_event_signals
 from events.models import Event, EventImage, EventStatus
+from events.seeding import (
+    EVENT_FIELDS,
+    IMAGE_FIELDS,
+    generate_event_rows,
+    generate_venue_rows,
+    image_rows,
+)
 
 User = get_user_model()
-fake = Faker('ru_RU') 
 
 class Command(BaseCommand):
     help = 'Заполняет БД тестовыми местами и событиями'
@@ -26,6 +36,29 @@ class Command(BaseCommand):
             default=50,
             help='Количество событий для создания'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Массовый режим для нагрузочных тестов: пачки bulk_create/COPY, '
+                 'без погоды, писем и превью'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Размер пачки событий'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Сколько процессов генерируют данные'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Писать через COPY FROM STDIN вместо bulk_create (только с --bulk)'
+        )
 
     def handle(self, *args, **options):
         venues_count = options['venues']
@@ -42,69 +75,99 @@ class Command(BaseCommand):
             self.stdout.write(self.style.ERROR(f'Ошибка поиска пользователя: {e}'))
             return
 
-        self.stdout.write('Создаём места проведения...')
-        venues = []
-        
-        city_coords = [
-            (55.7558, 37.6173, 'Москва'),
-            (59.9343, 30.3351, 'Санкт-Петербург'),
-            (56.8389, 60.6057, 'Екатеринбург'),
-            (55.0084, 82.9357, 'Новосибирск'),
-            (43.1155, 131.8855, 'Владивосток'),
-            (56.0105, 92.8525, 'Красноярск')
-        ]
-
-        for i in range(venues_count):
-            city_data = random.choice(city_coords)
-            lat = city_data[0] + random.uniform(-0.1, 0.1)
-            lon = city_data[1] + random.uniform(-0.1, 0.1)
-            
-            venue = Venue.objects.create(
-                name=f"{fake.company()} ({city_data[2]})",
-                location=f'POINT({lon} {lat})'
-            )
-            venues.append(venue)
-            
-        self.stdout.write(self.style.SUCCESS(f'✓ Создано {venues_count} мест'))
-
-        # 2. Создаём события
-        self.stdout.write('Создаём события...')
-        
-        event_types = [
-            'Концерт', 'Выставка', 'Конференция', 'Фестиваль',
-            'Мастер-класс', 'Спектакль', 'Семинар', 'Воркшоп'
-        ]
-        
-        for i in range(events_count):
-            days_offset_start = random.randint(-60, 60)
-            days_offset_end = days_offset_start + random.randint(1, 7)
-            days_offset_publish = days_offset_start - random.randint(1, 14)
-            
-            start_datetime = timezone.now() + timedelta(days=days_offset_start, hours=random.randint(10, 20))
-            end_datetime = start_datetime + timedelta(hours=random.randint(2, 8))
-            publish_datetime = timezone.now() + timedelta(days=days_offset_publish)
-            
-            status = EventStatus.DRAFT if publish_datetime > timezone.now() else EventStatus.PUBLISHED
-            
-            event = Event.objects.create(
-                title=f"{random.choice(event_types)}: {fake.catch_phrase()}",
-                description=fake.text(max_nb_chars=500),
-                publish_at=publish_datetime,
-                start_at=start_datetime,
-                end_at=end_datetime,
-                author=author,
-                venue=random.choice(venues),
-                rating=random.randint(0, 25),
-                status=status
-            )
-            
-            for j in range(random.randint(1, 3)):
-                EventImage.objects.create(
-                    event=event,
-                    image=f'events/test_image/test_image_{random.randint(1,10)}.jpg'
-                )
+        if options['bulk']:
+            self.seed_bulk(author, venues_count, events_count, options)
+            return
 
-        self.stdout.write(self.style.SUCCESS(f'✓ Создано {events_count} событий'))
+        # Те же пачки bulk_create, что и в --bulk, но сигналы не пропускаются:
+        # погода, письма и превью запускаются одним шагом после создания всех событий.
+        with suspend_event_signals() as batch:
+            self.seed_bulk(author, venues_count, events_count, dict(options, copy=False), batch=batch)
         self.stdout.write(
             self.style.SUCCESS('Готово! Данные заполнены.')
         )
+
+
+    def seed_bulk(self, author, venues_count, events_count, options, batch=None):
+        """
+        Строки генерируются пачками (в --workers процессах), пока основной процесс
+        пишет предыдущие пачки. Без batch сигналы не срабатывают: для тестовых данных
+        в --bulk не нужны ни прогнозы, ни письма, ни превью. С batch (EventBulkBatch
+        из suspend_event_signals) созданные события и картинки регистрируются в нём.
+        """
+        batch_size = max(1, options['batch_size'])
+        workers = max(1, options['workers'])
+        use_copy = options['copy']
+        now = timezone.now()
+        started = time.perf_counter()
+
+        self.stdout.write('Создаём места проведения...')
+        seed = int(now.timestamp())
+        venue_rows = generate_venue_rows(venues_count, seed=seed)
+        venues = Venue.objects.bulk_create(
+            (Venue(name=name, location=Point(lon, lat, srid=4326)) for name, lon, lat in venue_rows),
+            batch_size=batch_size,
+        )
+        # bulk_create не шлёт post_save: кэш тайлов сбрасываем сами
+        invalidate_tiles()
+        venue_ids = [venue.id for venue in venues]
+        self.stdout.write(self.style.SUCCESS(f'✓ Создано {len(venue_ids)} мест'))
+
+        tasks = []
+        for number, offset in enumerate(range(0, events_count, batch_size)):
+            count = min(batch_size, events_count - offset)
+            tasks.append((seed + number, count, venue_ids, author.id, now.timestamp(),
+                          (EventStatus.DRAFT.value, EventStatus.PUBLISHED.value)))
+
+        self.stdout.write(f'Создаём события ({"COPY" if use_copy else "bulk_create"}, процессов: {workers})...')
+        created = 0
+        images = 0
+
+        if workers > 1:
+            pool = multiprocessing.get_context().Pool(workers)
+            batches = pool.imap(generate_event_rows, tasks)
+        else:
+            pool = None
+            batches = map(generate_event_rows, tasks)
+
+        try:
+            for number, (rows, image_counts) in enumerate(batches):
+                with transaction.atomic():
+                    event_ids = self.write_events(rows, use_copy)
+                    image_data = list(image_rows(event_ids, image_counts, now, seed=number))
+                    if use_copy:
+                        copy_rows(EventImage, IMAGE_FIELDS, image_data)
+                    else:
+                        EventImage.objects.bulk_create(
+                            (EventImage(**dict(zip(IMAGE_FIELDS, row))) for row in image_data),
+                            batch_size=batch_size,
+                        )
+                if batch is not None:
+                    batch.add_events(event_ids, notify=True)
+                    batch.add_images(event_ids)
+                created += len(rows)
+                images += len(image_data)
+                rate = created / (time.perf_counter() - started)
+                self.stdout.write(f'  {created}/{events_count} событий, {rate:,.0f} событий/с')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Создано {created} событий и {images} картинок за {elapsed:.1f} с '
+            f'({created / elapsed:,.0f} событий/с)'
+        ))
+
+    def write_events(self, rows, use_copy):
+        if use_copy:
+            event_ids = reserve_ids(Event, len(rows))
+            copy_rows(Event, ["id", *EVENT_FIELDS], ([event_id, *row] for event_id, row in zip(event_ids, rows)))
+            return event_ids
+
+        events = Event.objects.bulk_create(
+            (Event(**dict(zip(EVENT_FIELDS, row))) for row in rows),
+            batch_size=len(rows),
+        )
+        return [event.id for event in events]
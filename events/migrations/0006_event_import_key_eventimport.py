@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_alter_event_options_alter_eventimage_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='import_key',
+            field=models.CharField(blank=True, editable=False, max_length=40, null=True, unique=True, verbose_name='Ключ импорта'),
+        ),
+        migrations.CreateModel(
+            name='EventImport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(max_length=64, verbose_name='SHA-256 файла')),
+                ('status', models.CharField(choices=[('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='RUNNING', max_length=16, verbose_name='Статус')),
+                ('last_line', models.PositiveIntegerField(default=0, verbose_name='Последняя записанная строка')),
+                ('created_count', models.PositiveIntegerField(default=0, verbose_name='Создано')),
+                ('skipped_count', models.PositiveIntegerField(default=0, verbose_name='Пропущено (уже были)')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='Ошибки')),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event_imports', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+            ],
+            options={
+                'verbose_name': 'Импорт мероприятий',
+                'verbose_name_plural': 'Импорты мероприятий',
+                'constraints': [models.UniqueConstraint(fields=('author', 'checksum'), name='event_import_author_checksum')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_event_import_key_eventimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='external_id',
+            field=models.CharField(blank=True, max_length=64, null=True, unique=True, verbose_name='Внешний ID'),
+        ),
+    ]
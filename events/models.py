@@ -15,6 +15,10 @@ class EventStatus(models.TextChoices):
     DELETED = "DELETED", "Deleted"
 
 
+# Поля, от которых зависит прогноз погоды события (см. events/signals.py)
+SCHEDULE_FIELDS = ("start_at", "venue_id")
+
+
 class Event(models.Model):
     title = models.CharField(max_length=255, verbose_name="Название")
     description = models.TextField(blank=True, verbose_name="Описание")
@@ -67,6 +71,26 @@ class Event(models.Model):
         verbose_name="Погода",
     )
 
+    # Естественный ключ строки импорта (название + начало + площадка), см. events/parsing.py.
+    # Повторная загрузка того же файла не создаёт дубликатов: INSERT ... ON CONFLICT DO NOTHING.
+    import_key = models.CharField(
+        max_length=40,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+        verbose_name="Ключ импорта",
+    )
+
+    # Идентификатор события в каталоге партнёра, по нему работает импорт в режиме sync
+    external_id = models.CharField(
+        max_length=64,
+        null=True,
+        blank=True,
+        unique=True,
+        verbose_name="Внешний ID",
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -88,6 +112,16 @@ class Event(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Начало и площадка из БД: при массовой записи сигнал сравнивает с ними,
+        # не перечитывая строку. Отложенные (defer/only) поля не запоминаем
+        instance._loaded_values = {
+            name: instance.__dict__[name] for name in SCHEDULE_FIELDS if name in instance.__dict__
+        }
+        return instance
+
 
 class EventImage(models.Model):
     event = models.ForeignKey(
@@ -105,6 +139,49 @@ class EventImage(models.Model):
     def __str__(self):
         return f"Image for event_id={self.event_id}"
 
+class EventImportStatus(models.TextChoices):
+    RUNNING = "RUNNING", "Running"
+    DONE = "DONE", "Done"
+    FAILED = "FAILED", "Failed"
+
+
+class EventImport(models.Model):
+    """
+    Чекпоинт импорта XLSX-файла. Файл узнаётся по SHA-256 содержимого:
+    если прошлая загрузка того же файла прервалась, импорт продолжается
+    со строки после last_line, а не с начала.
+    """
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="event_imports",
+        verbose_name="Автор",
+    )
+    checksum = models.CharField(max_length=64, verbose_name="SHA-256 файла")
+    status = models.CharField(
+        max_length=16,
+        choices=EventImportStatus.choices,
+        default=EventImportStatus.RUNNING,
+        verbose_name="Статус",
+    )
+    last_line = models.PositiveIntegerField(default=0, verbose_name="Последняя записанная строка")
+    created_count = models.PositiveIntegerField(default=0, verbose_name="Создано")
+    skipped_count = models.PositiveIntegerField(default=0, verbose_name="Пропущено (уже были)")
+    errors = models.JSONField(default=list, blank=True, verbose_name="Ошибки")
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Импорт мероприятий"
+        verbose_name_plural = "Импорты мероприятий"
+        constraints = [
+            models.UniqueConstraint(fields=["author", "checksum"], name="event_import_author_checksum"),
+        ]
+
+    def __str__(self):
+        return f"Import {self.checksum[:12]} ({self.status})"
+
+
 class EmailNotificationConfig(models.Model):
     """
     Настройки для автоматической рассылки при публикации мероприятия.
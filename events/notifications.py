@@ -0,0 +1,146 @@
+# events/notifications.py
+import threading
+import time
+from collections import OrderedDict
+from string import Formatter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import EmailNotificationConfig
+
+TEMPLATE_FIELDS = frozenset({"title", "venue", "date", "description"})
+
+_formatter = Formatter()
+
+_lock = threading.Lock()
+_cached_config = None
+_cached_at = None
+_generation = 0
+
+
+class CompiledTemplate:
+    """
+    Шаблон письма, заранее разобранный на куски (литерал, поле, формат).
+    Разбор выполняется один раз при загрузке настроек, рендер — простая склейка.
+    Если шаблон некорректен (неизвестное поле, сломанные скобки), valid = False.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.parts = []
+        self.valid = True
+
+        try:
+            for literal, field, spec, conversion in _formatter.parse(source):
+                if field is not None and field not in TEMPLATE_FIELDS:
+                    self.valid = False
+                    return
+                self.parts.append((literal, field, spec, conversion))
+        except ValueError:
+            self.valid = False
+
+    def render(self, context):
+        chunks = []
+        for literal, field, spec, conversion in self.parts:
+            chunks.append(literal)
+            if field is None:
+                continue
+            value = _formatter.convert_field(context[field], conversion)
+            chunks.append(format(value, spec or ""))
+        return "".join(chunks)
+
+
+class NotificationConfig:
+    """
+    Снимок EmailNotificationConfig с предкомпилированными шаблонами.
+    Отрендеренные письма запоминаются по (event.id, event.updated_at),
+    поэтому повторная отправка по неизменённому событию ничего не форматирует.
+    """
+
+    render_cache_size = 512
+
+    def __init__(self, config):
+        self.subject = CompiledTemplate(config.subject_template)
+        self.message = CompiledTemplate(config.message_template)
+        self.manual_recipients = [
+            e.strip() for e in config.recipients_list.split(",") if e.strip()
+        ]
+        self.send_to_all_users = config.send_to_all_users
+        self._rendered = OrderedDict()
+
+    def get_recipients(self):
+        recipients = set(self.manual_recipients)
+
+        if self.send_to_all_users:
+            User = get_user_model()
+            users_emails = User.objects.filter(email__isnull=False).exclude(email='').values_list('email', flat=True)
+            recipients.update(users_emails)
+
+        return sorted(recipients)
+
+    def render(self, event):
+        key = (event.pk, event.updated_at)
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            return rendered
+
+        rendered = self._render(event)
+        self._rendered[key] = rendered
+        if len(self._rendered) > self.render_cache_size:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def _render(self, event):
+        if self.subject.valid and self.message.valid:
+            context = {
+                "title": event.title,
+                "venue": event.venue.name if event.venue_id else "Не указано",
+                "date": str(event.start_at),
+                "description": event.description or "",
+            }
+            try:
+                return self.subject.render(context), self.message.render(context)
+            except (ValueError, TypeError):
+                pass
+
+        subject = f"Новое мероприятие: {event.title}"
+        message = f"Приглашаем на {event.title} ({event.start_at})"
+        return subject, message
+
+
+def get_notification_config():
+    """
+    Возвращает закэшированный в процессе NotificationConfig (или None, если настроек нет).
+    Кэш сбрасывается сигналами при сохранении/удалении EmailNotificationConfig,
+    а в других процессах (воркеры Celery) — по истечении EMAIL_NOTIFICATION_CONFIG_TTL.
+    """
+    global _cached_config, _cached_at
+
+    ttl = getattr(settings, "EMAIL_NOTIFICATION_CONFIG_TTL", 60)
+    now = time.monotonic()
+
+    with _lock:
+        if _cached_at is not None and now - _cached_at < ttl:
+            return _cached_config
+        generation = _generation
+
+    config = EmailNotificationConfig.objects.first()
+    compiled = NotificationConfig(config) if config else None
+
+    with _lock:
+        # Если настройки поменялись, пока мы читали БД, не кладём устаревший снимок.
+        if generation == _generation:
+            _cached_config = compiled
+            _cached_at = now
+    return compiled
+
+
+def invalidate_notification_config():
+    global _cached_config, _cached_at, _generation
+
+    with _lock:
+        _cached_config = None
+        _cached_at = None
+        _generation += 1
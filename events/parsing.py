@@ -0,0 +1,205 @@
+# events/parsing.py
+"""
+Разбор строк импорта мероприятий (колонки как в XLSX-импорте).
+
+Функции не обращаются к БД и возвращают только простые значения
+(str, datetime, float, int), поэтому большие файлы проверяются пачками
+строк в отдельных процессах (validate_rows), а в БД пишет один процесс.
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .dateparse import parse_import_datetime
+
+# Меньше строк проверяем в текущем процессе: запуск пула дороже самой проверки
+PARALLEL_MIN_ROWS = 5000
+CHUNK_ROWS = 2000
+
+# max_length полей Event.title и Venue.name: длиннее БД не примет
+TITLE_MAX_LENGTH = 255
+VENUE_NAME_MAX_LENGTH = 255
+
+
+def parse_coordinates(coord_str):
+    """
+    Парсит строку вида 'longitude, latitude' (например '37.61, 55.75') в пару (lon, lat).
+    Point строит тот, кто пишет в БД: в процессах пула GEOS не нужен.
+    """
+    try:
+        lon, lat = map(float, coord_str.replace(";", ",").split(","))
+    except (ValueError, AttributeError):
+        return None
+    return lon, lat
+
+def parse_excel_date(value, tz=None):
+    """
+    Превращает значение из Excel (datetime, серийный номер или строку) в aware datetime.
+    Разбор — в events/dateparse.py.
+    """
+    return parse_import_datetime(value, tz)
+
+
+def parse_event_row(line_no, row, tz=None):
+    """
+    Проверяет строку файла (колонки как в XLSX-импорте) и возвращает кортеж
+    (line_no, title, description, publish_at, start_at, end_at, venue_name, lon, lat, rating).
+    Бросает ValueError с понятным сообщением. tz — зона для дат без смещения.
+    """
+    tz = tz or timezone.get_current_timezone()
+    row = list(row) + [None] * (8 - len(row))
+    title, description, publish_at, start_at, end_at, venue_name, coords, rating = row[:8]
+
+    title = str(title).strip() if title else ""
+    if not title:
+        raise ValueError("Title is required")
+    if len(title) > TITLE_MAX_LENGTH:
+        raise ValueError(f"Title is longer than {TITLE_MAX_LENGTH} characters")
+
+    start_at = parse_excel_date(start_at, tz)
+    end_at = parse_excel_date(end_at, tz)
+    if start_at is None or end_at is None:
+        raise ValueError("Start and end time are required")
+    if end_at <= start_at:
+        raise ValueError("End time must be after start time")
+
+    venue_name = str(venue_name).strip() if venue_name else ""
+    if not venue_name:
+        raise ValueError("Venue name is required")
+    if len(venue_name) > VENUE_NAME_MAX_LENGTH:
+        raise ValueError(f"Venue name is longer than {VENUE_NAME_MAX_LENGTH} characters")
+
+    try:
+        rating = int(rating or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid rating '{rating}'")
+    if not 0 <= rating <= 25:
+        raise ValueError("Rating must be between 0 and 25")
+
+    lon, lat = (parse_coordinates(str(coords)) if coords else None) or (None, None)
+
+    return (
+        line_no,
+        title,
+        str(description or ""),
+        parse_excel_date(publish_at, tz),
+        start_at,
+        end_at,
+        venue_name,
+        lon,
+        lat,
+        rating,
+    )
+
+
+def make_import_key(title, start_at, venue_name):
+    """
+    Естественный ключ события из файла: название и площадка без учёта регистра,
+    начало в UTC. Хранится в Event.import_key.
+    """
+    raw = "\x1f".join([
+        title.strip().casefold(),
+        start_at.astimezone(dt_timezone.utc).isoformat(),
+        venue_name.strip().lower(),
+    ])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _validate_chunk(chunk):
+    """
+    Пачка (номер строки, значения) -> список (номер строки, кортеж или None, ошибка или None).
+    Выполняется в процессе пула, поэтому возвращает только то, что можно передать через pickle.
+    """
+    results = []
+    tz = timezone.get_current_timezone()
+    for line_no, row in chunk:
+        try:
+            results.append((line_no, parse_event_row(line_no, row, tz), None))
+        except ValueError as e:
+            results.append((line_no, None, str(e)))
+    return results
+
+
+def _init_worker():
+    # При запуске процессов через spawn/forkserver Django в них ещё не настроен
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def get_validation_workers():
+    workers = getattr(settings, "IMPORT_VALIDATION_WORKERS", 0)
+    workers = workers if workers > 0 else os.cpu_count() or 1
+    return min(workers, getattr(settings, "IMPORT_VALIDATION_MAX_WORKERS", 4))
+
+
+# Один пул на процесс (веб-воркер), создаётся при первом большом импорте.
+# (pid, число процессов, пул): после fork пул родителя не используем.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_validation_pool(workers):
+    """
+    ProcessPoolExecutor на workers процессов, общий для всех импортов этого процесса.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[:2] != (os.getpid(), workers):
+            if _pool[0] == os.getpid():
+                _pool[2].shutdown(wait=False)
+            _pool = None
+        if _pool is None:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            _pool = (os.getpid(), workers, executor)
+        return _pool[2]
+
+
+def _drop_validation_pool(executor):
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool[2] is executor:
+            _pool = None
+
+
+def validate_rows(rows, workers=None, chunk_rows=CHUNK_ROWS):
+    """
+    Проверяет строки файла и возвращает (parsed, errors) в порядке строк:
+    parsed — кортежи parse_event_row, errors — пары (номер строки, сообщение).
+
+    Если строк не меньше PARALLEL_MIN_ROWS и workers > 1, строки режутся на пачки
+    по chunk_rows и проверяются в общем пуле процессов (get_validation_pool).
+    executor.map отдаёт результаты в порядке пачек, так что номера ошибок
+    идут по возрастанию.
+    """
+    rows = list(rows)
+    workers = workers or get_validation_workers()
+
+    if workers <= 1 or len(rows) < PARALLEL_MIN_ROWS:
+        chunk_results = [_validate_chunk(rows)]
+    else:
+        chunks = [rows[i:i + chunk_rows] for i in range(0, len(rows), chunk_rows)]
+        executor = get_validation_pool(workers)
+        try:
+            chunk_results = list(executor.map(_validate_chunk, chunks))
+        except BrokenProcessPool:
+            # Процесс пула упал: следующий импорт поднимет новый пул
+            _drop_validation_pool(executor)
+            raise
+
+    parsed, errors = [], []
+    for results in chunk_results:
+        for line_no, values, error in results:
+            if error is None:
+                parsed.append(values)
+            else:
+                errors.append((line_no, error))
+    return parsed, errors
@@ -0,0 +1,33 @@
+# events/renderers.py
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Рендереры экспорта нужны только для content negotiation (Accept или ?format=):
+    сам файл строит view и отдаёт готовым HttpResponse/StreamingHttpResponse.
+    Ответы с ошибками EventViewSet.finalize_response переводит на JSONRenderer;
+    если данные всё же дошли сюда, они тоже сериализуются в JSON.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return JSONRenderer().render(data)
+
+
+class XLSXRenderer(ExportRenderer):
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    format = "xlsx"
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+
+class ParquetRenderer(ExportRenderer):
+    media_type = "application/vnd.apache.parquet"
+    format = "parquet"
@@ -0,0 +1,110 @@
+# events/seeding.py
+"""
+Генерация строк для seed_data.
+Модуль не импортирует модели Django: функции выполняются в процессах
+multiprocessing (в том числе spawn на Windows), где Django не настроен.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+
+from faker import Faker
+
+EVENT_TYPES = [
+    'Концерт', 'Выставка', 'Конференция', 'Фестиваль',
+    'Мастер-класс', 'Спектакль', 'Семинар', 'Воркшоп'
+]
+
+CITY_COORDS = [
+    (55.7558, 37.6173, 'Москва'),
+    (59.9343, 30.3351, 'Санкт-Петербург'),
+    (56.8389, 60.6057, 'Екатеринбург'),
+    (55.0084, 82.9357, 'Новосибирск'),
+    (43.1155, 131.8855, 'Владивосток'),
+    (56.0105, 92.8525, 'Красноярск')
+]
+
+# Порядок значений в строке события (attname полей Event)
+EVENT_FIELDS = [
+    "title", "description", "publish_at", "start_at", "end_at",
+    "author_id", "venue_id", "rating", "status", "created_at", "updated_at",
+]
+IMAGE_FIELDS = ["event_id", "image", "created_at"]
+
+# Faker медленный (десятки микросекунд на текст): на пачку один раз готовим
+# пул фраз и описаний и дальше только выбираем из него. Пул зависит от seed
+# пачки целиком, так что тексты разных пачек не повторяются
+TEXT_POOL_SIZE = 1000
+_pool = None
+
+
+def _text_pool(seed):
+    global _pool
+    if _pool is None or _pool[0] != seed:
+        fake = Faker('ru_RU')
+        fake.seed_instance(seed)
+        _pool = (seed, (
+            [fake.catch_phrase() for _ in range(TEXT_POOL_SIZE)],
+            [fake.text(max_nb_chars=500) for _ in range(TEXT_POOL_SIZE // 5)],
+        ))
+    return _pool[1]
+
+
+def generate_venue_rows(count, seed=0):
+    """
+    (name, lon, lat) для площадок. Номер в имени гарантирует уникальность.
+    """
+    rnd = random.Random(seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(seed)
+    rows = []
+    for i in range(count):
+        lat, lon, city = rnd.choice(CITY_COORDS)
+        rows.append((
+            f"{fake.company()} ({city}) #{i + 1}",
+            lon + rnd.uniform(-0.1, 0.1),
+            lat + rnd.uniform(-0.1, 0.1),
+        ))
+    return rows
+
+
+def generate_event_rows(task):
+    """
+    task = (seed, count, venue_ids, author_id, now_ts, statuses)
+    statuses = (DRAFT, PUBLISHED). Возвращает (event_rows, image_counts):
+    строки в порядке EVENT_FIELDS и число картинок для каждого события.
+    """
+    seed, count, venue_ids, author_id, now_ts, (draft, published) = task
+    rnd = random.Random(seed)
+    phrases, descriptions = _text_pool(seed)
+    now = datetime.fromtimestamp(now_ts, tz=timezone.utc)
+
+    rows = []
+    image_counts = []
+    for _ in range(count):
+        days_offset_start = rnd.randint(-60, 60)
+        start_at = now + timedelta(days=days_offset_start, hours=rnd.randint(10, 20))
+        end_at = start_at + timedelta(hours=rnd.randint(2, 8))
+        publish_at = now + timedelta(days=days_offset_start - rnd.randint(1, 14))
+
+        rows.append((
+            f"{rnd.choice(EVENT_TYPES)}: {rnd.choice(phrases)}",
+            rnd.choice(descriptions),
+            publish_at,
+            start_at,
+            end_at,
+            author_id,
+            rnd.choice(venue_ids),
+            rnd.randint(0, 25),
+            draft if publish_at > now else published,
+            now,
+            now,
+        ))
+        image_counts.append(rnd.randint(1, 3))
+    return rows, image_counts
+
+
+def image_rows(event_ids, image_counts, now, seed=0):
+    rnd = random.Random(seed)
+    for event_id, count in zip(event_ids, image_counts):
+        for _ in range(count):
+            yield (event_id, f'events/test_image/test_image_{rnd.randint(1, 10)}.jpg', now)
@@ -1,11 +1,27 @@
 # events/serializers.py
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 from drf_spectacular.utils import extend_schema_field
 
 from .models import Event, EventImage
 from venues.serializers import VenueSerializer
 from weather.serializers import WeatherSnapshotSerializer
 
+# Связанные данные, которые можно встроить в детали события: ?expand=weather,images
+EXPANDABLE_FIELDS = ("weather", "images")
+
+
+def parse_expand(value):
+    """
+    'weather,images' -> {"weather", "images"}. Неизвестные имена — ошибка 400.
+    """
+    expand = {part.strip() for part in (value or "").split(",") if part.strip()}
+    unknown = expand.difference(EXPANDABLE_FIELDS)
+    if unknown:
+        raise ValidationError({"expand": f"Неизвестные поля: {', '.join(sorted(unknown))}. Доступны: {', '.join(EXPANDABLE_FIELDS)}."})
+    return expand
+
+
 class EventImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = EventImage
@@ -30,9 +46,14 @@ class EventListSerializer(serializers.ModelSerializer):
         ]
 
 class EventDetailSerializer(serializers.ModelSerializer):
+    """
+    weather и images выводятся, только если запрошены в context["expand"]:
+    view подгружает под них select_related/Prefetch, иначе это лишние запросы.
+    Без "expand" в контексте (генерация схемы, вызов не из view) поля остаются.
+    """
     venue = VenueSerializer(read_only=True)
-    # weather = WeatherSnapshotSerializer(read_only=True)
-    # images = EventImageSerializer(many=True, read_only=True)
+    weather = WeatherSnapshotSerializer(read_only=True, help_text="Только при expand=weather.")
+    images = EventImageSerializer(many=True, read_only=True, help_text="Только при expand=images.")
 
     class Meta:
         model = Event
@@ -48,10 +69,19 @@ class EventDetailSerializer(serializers.ModelSerializer):
             "preview_image",
             "status",
             "author",
-            # "weather",
-            # "images",
+            "weather",
+            "images",
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get("expand")
+        if expand is None:
+            return
+        for name in EXPANDABLE_FIELDS:
+            if name not in expand:
+                self.fields.pop(name)
+
     def to_representation(self, instance):
         """
         Динамическое скрытие полей для обычных пользователей.
@@ -107,4 +137,18 @@ class EventImagesResponseSerializer(serializers.Serializer):
         return request.build_absolute_uri(url) if request else url
     
 class FileUploadSerializer(serializers.Serializer):
-    file = serializers.FileField()
\ No newline at end of file
+    file = serializers.FileField()
+
+class EventWeatherBulkSerializer(serializers.Serializer):
+    weather = serializers.DictField(
+        child=WeatherSnapshotSerializer(),
+        help_text="Сохранённые прогнозы по id события.",
+    )
+    pending = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="События без прогноза: он запрошен в фоне, повторите запрос позже.",
+    )
+    not_found = serializers.ListField(
+        child=serializers.IntegerField(),
+        help_text="Несуществующие или недоступные события.",
+    )
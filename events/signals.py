@@ -1,13 +1,15 @@
 # events/signals.py
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
-from .models import EventImage, Event, EventStatus, EmailNotificationConfig
-from django.contrib.auth.models import User
+from .models import SCHEDULE_FIELDS, EventImage, Event, EventStatus, EmailNotificationConfig
 
 from events.services import make_preview 
+from events.notifications import get_notification_config, invalidate_notification_config
 
+from core.dispatch import enqueue_on_commit
+from events.bulk import get_active_batch
 from events.tasks import send_event_notification_task
-from weather.tasks import set_event_weather_forecast_task
+from weather.tasks import forget_forecast_unavailable, set_event_weather_forecast_task
 
 @receiver(post_save, sender=EventImage)
 def generate_preview_on_save(sender, instance, created, **kwargs):
@@ -15,6 +17,12 @@ def generate_preview_on_save(sender, instance, created, **kwargs):
     Автоматически создаёт превью для события, если его нет,
     при добавлении новой картинки.
     """
+    batch = get_active_batch()
+    if batch is not None:
+        if created:
+            batch.add_images([instance])
+        return
+
     if created:
         event = instance.event
         if not event.preview_image and instance.image:
@@ -35,8 +43,33 @@ def update_preview_on_delete(sender, instance, **kwargs):
     """
     pass 
 
+def _schedule_changed(instance):
+    """
+    Поменялись ли начало или площадка по сравнению с загруженным из БД.
+    Экземпляр, собранный не из БД, считается изменённым. Поле, которое не загружалось
+    (defer/only), не сравниваем и не читаем: обращение к нему стоило бы запроса.
+    """
+    loaded = getattr(instance, "_loaded_values", None)
+    current = {name: instance.__dict__[name] for name in SCHEDULE_FIELDS if name in instance.__dict__}
+    if loaded is None:
+        changed = True
+    else:
+        changed = any(name in loaded and loaded[name] != value for name, value in current.items())
+    # Следующее сохранение того же экземпляра сравниваем уже с этими значениями
+    instance._loaded_values = {**(loaded or {}), **current}
+    return changed
+
 @receiver(pre_save, sender=Event)
 def reset_weather_on_change(sender, instance, **kwargs):
+    # При массовой записи не перечитываем строку: сравниваем с тем, что было загружено
+    # из БД, а погоду сбросит и запросит batch.flush()
+    batch = get_active_batch()
+    if batch is not None:
+        if instance.pk and _schedule_changed(instance):
+            instance.weather = None
+            batch.add_events([instance], reset_weather=True)
+        return
+
     if instance.status != EventStatus.PUBLISHED:
         return 
 
@@ -62,9 +95,17 @@ def reset_weather_on_change(sender, instance, **kwargs):
 def trigger_weather_update(sender, instance, created, **kwargs):
     """
     Запускает задачу обновления погоды, если был установлен флаг в pre_save.
+    Задача уходит в брокер только после коммита, иначе воркер может не найти событие.
     """
+    batch = get_active_batch()
+    if batch is not None:
+        batch.add_events([instance])
+        return
+
     if getattr(instance, '_need_weather_update', False):
-        set_event_weather_forecast_task.delay(instance.id)
+        # Дата или площадка поменялись — прежнее "прогноз недоступен" больше не верно
+        forget_forecast_unavailable(instance.id)
+        enqueue_on_commit(set_event_weather_forecast_task, instance.id)
 
 @receiver(post_save, sender=Event)
 def event_published_notification(sender, instance, created, update_fields=None, **kwargs):
@@ -81,40 +122,19 @@ def event_published_notification(sender, instance, created, update_fields=None,
     if not created and update_fields and 'status' not in update_fields:
         return
 
-    config = EmailNotificationConfig.objects.first()
-    if not config:
+    batch = get_active_batch()
+    if batch is not None:
+        batch.add_events([instance], notify=True)
         return
 
-    recipients = set()
-        
-    if config.recipients_list:
-        emails = [e.strip() for e in config.recipients_list.split(",") if e.strip()]
-        recipients.update(emails)
-            
-    if config.send_to_all_users:
-        users_emails = User.objects.filter(email__isnull=False).exclude(email='').values_list('email', flat=True)
-        recipients.update(users_emails)
-
-    if not recipients:
+    # Настройки берём из кэша процесса: без них рассылать нечего.
+    # Шаблоны и список адресатов раскрываются уже в воркере.
+    if get_notification_config() is None:
         return
 
-    context = {
-        "title": instance.title,
-        "venue": instance.venue.name if instance.venue else "Не указано",
-        "date": str(instance.start_at),
-        "description": instance.description or ""
-    }
+    enqueue_on_commit(send_event_notification_task, instance.id)
 
-    try:
-        subject = config.subject_template.format(**context)
-        message = config.message_template.format(**context)
-    except KeyError:
-        subject = f"Новое мероприятие: {instance.title}"
-        message = f"Приглашаем на {instance.title} ({instance.start_at})"
-
-    send_event_notification_task.delay(
-        event_id=instance.id,
-        subject=subject,
-        message=message,
-        recipient_list=list(recipients)
-    )
\ No newline at end of file
+@receiver(post_save, sender=EmailNotificationConfig)
+@receiver(post_delete, sender=EmailNotificationConfig)
+def reset_notification_config_cache(sender, **kwargs):
+    invalidate_notification_config()
@@ -0,0 +1,139 @@
+# events/sync.py
+"""
+Импорт в режиме sync: партнёр каждый день присылает полный каталог,
+а применяются только отличия.
+
+Строки сопоставляются с событиями по external_id (9-я колонка файла).
+Существующие события читаются одним запросом, сравнение идёт в памяти:
+неизменённые строки не пишутся вовсе, изменённые уходят одним bulk_update
+только по изменившимся полям, новые — одним bulk_create (черновиками).
+Построчных save() и сигналов нет; погода сбрасывается через suspend_event_signals
+только у событий, у которых сменились дата или площадка.
+События, которых нет в файле, не трогаются.
+"""
+import csv
+import zipfile
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import suspend_event_signals
+from .ingest import iter_csv_rows, iter_xlsx_rows
+from .models import Event, EventStatus
+from .parsing import validate_rows
+from .xlsx_services import load_venue_ids, resolve_venue_id
+
+EXTERNAL_ID_COLUMN = 8
+
+# Поля, которые sync переносит из файла (в порядке кортежа parse_event_row)
+SYNC_FIELDS = ["title", "description", "publish_at", "start_at", "end_at", "venue_id", "rating"]
+# При их изменении старый прогноз погоды больше не актуален
+WEATHER_FIELDS = {"start_at", "venue_id"}
+
+SYNC_BATCH_SIZE = 1000
+
+
+def _external_id(row):
+    value = row[EXTERNAL_ID_COLUMN] if len(row) > EXTERNAL_ID_COLUMN else None
+    if value is None:
+        return ""
+    # Excel отдаёт числовые id как float
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def sync_event_rows(rows, user):
+    """
+    rows — итерируемое (номер строки, значения).
+    Возвращает {"created", "updated", "unchanged", "errors"}.
+    """
+    errors = []
+    # номер строки -> external_id
+    external_ids = {}
+    seen = set()
+    valid_rows = []
+    for line_no, row in rows:
+        if not row or not row[0]:
+            continue
+        external_id = _external_id(row)
+        if not external_id:
+            errors.append((line_no, "External id is required"))
+        elif external_id in seen:
+            errors.append((line_no, f"Duplicate external id '{external_id}'"))
+        else:
+            seen.add(external_id)
+            external_ids[line_no] = external_id
+            valid_rows.append((line_no, row))
+
+    parsed, parse_errors = validate_rows(valid_rows)
+    errors += parse_errors
+
+    existing = Event.objects.only("id", "external_id", *SYNC_FIELDS).in_bulk(
+        [external_ids[values[0]] for values in parsed], field_name="external_id"
+    )
+
+    created, updated, unchanged = [], [], 0
+    changed_fields = set()
+    reset_weather = []
+    now = timezone.now()
+
+    with transaction.atomic(), suspend_event_signals() as batch:
+        venue_ids = load_venue_ids({values[6] for values in parsed})
+
+        for line_no, title, description, publish_at, start_at, end_at, venue_name, lon, lat, rating in parsed:
+            try:
+                venue_id = resolve_venue_id(venue_ids, venue_name, lon, lat)
+            except ValueError as e:
+                errors.append((line_no, str(e)))
+                continue
+
+            values = dict(zip(SYNC_FIELDS, (title, description, publish_at, start_at, end_at, venue_id, rating)))
+            event = existing.get(external_ids[line_no])
+            if event is None:
+                created.append(Event(
+                    **values,
+                    external_id=external_ids[line_no],
+                    author=user,
+                    status=EventStatus.DRAFT,
+                ))
+                continue
+
+            fields = [name for name, value in values.items() if getattr(event, name) != value]
+            if not fields:
+                unchanged += 1
+                continue
+            for name in fields:
+                setattr(event, name, values[name])
+            # bulk_update не трогает auto_now — от updated_at зависит кэш выгрузок
+            event.updated_at = now
+            changed_fields.update(fields)
+            updated.append(event)
+            if WEATHER_FIELDS.intersection(fields):
+                reset_weather.append(event)
+
+        Event.objects.bulk_create(created, batch_size=SYNC_BATCH_SIZE)
+        if updated:
+            Event.objects.bulk_update(updated, sorted(changed_fields) + ["updated_at"], batch_size=SYNC_BATCH_SIZE)
+        batch.add_events(reset_weather, reset_weather=True)
+
+    return {
+        "created": len(created),
+        "updated": len(updated),
+        "unchanged": unchanged,
+        "errors": [f"Row {line_no}: {message}" for line_no, message in sorted(errors)],
+    }
+
+
+def sync_events_from_xlsx(file_obj, user):
+    try:
+        return sync_event_rows(iter_xlsx_rows(file_obj), user)
+    except (zipfile.BadZipFile, OSError):
+        return {"created": 0, "errors": ["Файл поврежден или не является корректным XLSX."]}
+
+
+def sync_events_from_csv(file_obj, user):
+    try:
+        return sync_event_rows(iter_csv_rows(file_obj), user)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return {"created": 0, "errors": [f"Некорректный CSV: {e}"]}
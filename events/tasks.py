@@ -4,15 +4,35 @@ from celery import shared_task
 from django.core.mail import send_mail
 from django.utils import timezone
 from django.conf import settings
-from .models import Event, EventStatus
+from django.db import transaction
+from django.db.models import Q
+from .bulk import suspend_event_signals
+from .models import Event, EventImage, EventStatus
+from .notifications import get_notification_config
+from .services import make_preview
 
 @shared_task
-def send_event_notification_task(event_id, subject, message, recipient_list):
+def send_event_notification_task(event_id):
     """
     Асинхронная отправка email.
+    Письмо рендерится здесь, в воркере, по закэшированным шаблонам настроек рассылки.
     """
+    config = get_notification_config()
+    if config is None:
+        return "Notifications are not configured"
+
+    try:
+        event = Event.objects.select_related("venue").get(id=event_id)
+    except Event.DoesNotExist:
+        return "Event not found"
+
+    recipient_list = config.get_recipients()
+    if not recipient_list:
+        return "No recipients"
+
+    subject, message = config.render(event)
+
     try:
-        event = Event.objects.get(id=event_id)
         send_mail(
             subject=subject,
             message=message,
@@ -21,8 +41,6 @@ def send_event_notification_task(event_id, subject, message, recipient_list):
             fail_silently=False,
         )
         return f"Email sent for event {event.title}"
-    except Event.DoesNotExist:
-        return "Event not found"
     except Exception as e:
         return f"Error sending email: {e}"
 
@@ -30,19 +48,90 @@ def send_event_notification_task(event_id, subject, message, recipient_list):
 def publish_scheduled_events_task():
     """
     Периодическая задача: ищет черновики, у которых наступило время публикации.
+    Публикует их одним UPDATE, а погоду и письма ставит в очередь пачкой после коммита.
     """
     now = timezone.now()
-    # Ищем события: статус SCHEDULED и publish_at <= сейчас
-    events_to_publish = Event.objects.filter(
-        status=EventStatus.SCHEDULED,
-        publish_at__lte=now
+
+    with transaction.atomic(), suspend_event_signals() as batch:
+        # Ищем события: статус SCHEDULED и publish_at <= сейчас.
+        # skip_locked — чтобы два запуска по расписанию не опубликовали одно и то же.
+        ids = list(
+            Event.objects.filter(status=EventStatus.SCHEDULED, publish_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .values_list("id", flat=True)
+        )
+        if not ids:
+            return "No events to publish."
+
+        Event.objects.filter(id__in=ids).update(status=EventStatus.PUBLISHED, updated_at=now)
+        batch.add_events(ids, notify=True)
+
+    return f"Published {len(ids)} events."
+
+
+@shared_task
+def generate_event_previews_task(event_ids):
+    """
+    Создаёт превью для событий без обложки по первой загруженной картинке.
+    Используется после массовой записи (seed_data, импорт), где сигналы отключены.
+    """
+    events = Event.objects.filter(id__in=event_ids).filter(
+        Q(preview_image="") | Q(preview_image__isnull=True)
     )
-    
-    count = events_to_publish.count()
-    if count > 0:
-        for event in events_to_publish:
-            event.status = EventStatus.PUBLISHED
-            event.save(update_fields=['status']) # Это вызовет сигнал post_save
-            
-        return f"Published {count} events."
-    return "No events to publish."
+    first_images = {}
+    for image in EventImage.objects.filter(event__in=events).order_by("created_at", "id"):
+        first_images.setdefault(image.event_id, image)
+
+    created = 0
+    for event in events:
+        image = first_images.get(event.id)
+        if not image or not image.image:
+            continue
+        image.image.open()
+        event.preview_image.save(
+            f"preview_{event.id}.jpg",
+            make_preview(image.image.file),
+            save=False,
+        )
+        # update() вместо save(): не будим сигналы ради одного поля
+        Event.objects.filter(pk=event.pk).update(preview_image=event.preview_image.name)
+        created += 1
+
+    return f"Generated {created} previews."
+
+
+@shared_task
+def build_export_task(query_string, user_id, export_format):
+    """
+    Сборка большой или устаревшей выгрузки в фоне (см. events/export_cache.py).
+    Версия данных пересчитывается здесь: если события успели измениться,
+    собирается уже новая версия.
+    """
+    from django.contrib.auth import get_user_model
+    from django.contrib.auth.models import AnonymousUser
+    from django.core.cache import cache
+    from django.http import QueryDict
+
+    from .export_cache import build_export, export_queryset, fresh_export_path, get_export_entry, pending_key
+
+    user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    user = user or AnonymousUser()
+
+    queryset = export_queryset(query_string, user)
+    entry = get_export_entry(queryset, QueryDict(query_string), user, export_format)
+    try:
+        if fresh_export_path(entry) is None:
+            build_export(queryset, entry)
+    finally:
+        cache.delete(pending_key(entry))
+    return entry.path
+
+
+@shared_task
+def cleanup_exports_task():
+    """
+    Удаляет файлы выгрузок, на которые больше не указывает кэш.
+    """
+    from .export_cache import cleanup_exports
+
+    return cleanup_exports()
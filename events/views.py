@@ -1,22 +1,33 @@
 # events/views.py
+import importlib.util
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db.models import Prefetch
+from django.http import FileResponse, JsonResponse
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 
 from core.permissions import IsSuperUserOrReadOnly
 from .models import Event, EventImage, EventStatus
-from .serializers import EventImageSerializer, EventImagesUploadSerializer, EventImagesResponseSerializer, FileUploadSerializer, EventListSerializer, EventDetailSerializer, EventWriteSerializer
+from .serializers import parse_expand, EventImageSerializer, EventImagesUploadSerializer, EventImagesResponseSerializer, FileUploadSerializer, EventListSerializer, EventDetailSerializer, EventWriteSerializer, EventWeatherBulkSerializer
 from .services import make_preview
-from .xlsx_services import export_events_to_xlsx, import_events_from_xlsx
+from .xlsx_services import import_events_from_xlsx
+from .ingest import ingest_events_from_csv, ingest_events_from_xlsx
+from .sync import sync_events_from_csv, sync_events_from_xlsx
+from .export_cache import EXPORT_CONTENT_TYPES, build_export, fresh_export_path, get_export_entry, request_export
+from .renderers import CSVRenderer, ParquetRenderer, XLSXRenderer
 from .filters import EventFilter
 
-from venues.services import get_venue_coordinates
+from venues.schema import SPATIAL_FILTER_PARAMETERS
+from venues.services import with_venue_coordinates
 
 from weather.serializers import WeatherSnapshotSerializer
-from weather.models import WeatherSnapshot
-from weather.services import get_forecast_for_time
+from weather.tasks import is_forecast_unavailable, request_event_forecasts
 
 from drf_spectacular.utils import (
     extend_schema_view,
@@ -27,6 +38,10 @@ from drf_spectacular.utils import (
 )
 from drf_spectacular.types import OpenApiTypes
 
+BULK_WEATHER_MAX_IDS = 100
+# Запас к окну склейки задач прогноза: время на сам запрос к API
+WEATHER_RETRY_AFTER_MARGIN = 5
+
 @extend_schema_view(
     list=extend_schema(
         tags=["Мероприятия"],
@@ -56,7 +71,7 @@ from drf_spectacular.types import OpenApiTypes
                 type=OpenApiTypes.STR,
                 location=OpenApiParameter.QUERY,
                 required=False,
-                description="Сортировка: title, start_at, end_at. Пример: ordering=-start_at",
+                description="Сортировка: title, start_at, end_at, distance (только вместе с near). Пример: ordering=-start_at",
             ),
             OpenApiParameter(
                 name="rating_min",
@@ -108,6 +123,7 @@ from drf_spectacular.types import OpenApiTypes
                 many=True,
                 description="Фильтр по месту проведения (можно несколько): ?venue=1&venue=2",
             ),
+            *SPATIAL_FILTER_PARAMETERS,
         ],
         responses={
             200: OpenApiResponse(response=EventListSerializer(many=True), description="Список мероприятий."),
@@ -117,9 +133,23 @@ from drf_spectacular.types import OpenApiTypes
     retrieve=extend_schema(
         tags=["Мероприятия"],
         summary="Детали мероприятия",
-        description="Обычный пользователь может получить только PUBLISHED. Суперпользователь — любые статусы.",
+        description=(
+            "Обычный пользователь может получить только PUBLISHED. Суперпользователь — любые статусы.\n\n"
+            "expand=weather,images встраивает в ответ прогноз погоды и галерею — без отдельных запросов "
+            "к /weather/ и /images/. Число SQL-запросов не зависит от количества фотографий."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="expand",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Через запятую: weather, images.",
+            ),
+        ],
         responses={
             200: OpenApiResponse(response=EventDetailSerializer, description="Детали мероприятия."),
+            400: OpenApiResponse(description="Неизвестное значение expand."),
             404: OpenApiResponse(description="Мероприятие не найдено или скрыто (не PUBLISHED для обычного пользователя)."),
         },
     ),
@@ -165,9 +195,30 @@ from drf_spectacular.types import OpenApiTypes
         summary="Импорт мероприятий из XLSX",
         description=(
             "Доступно только суперпользователю. "
-            "Принимает multipart/form-data с файлом в поле file. "
-            "Если в файле есть некорректные строки, они вернутся в errors."
+            "Принимает multipart/form-data с файлом в поле file (XLSX или CSV с теми же колонками). "
+            "Если в файле есть некорректные строки, они вернутся в errors.\n\n"
+            "CSV и XLSX с mode=copy загружаются массово через COPY: корректные строки "
+            "записываются одной транзакцией, площадки ищутся и создаются одним запросом.\n\n"
+            "Импорт идемпотентен: события, уже созданные из такой же строки (название, начало, площадка), "
+            "не дублируются и считаются в skipped. Прерванная загрузка XLSX (mode=orm) при повторной "
+            "отправке того же файла продолжается с последней записанной пачки строк.\n\n"
+            "mode=sync — для полного каталога партнёра: 9-я колонка external_id. Новые id создаются черновиками, "
+            "у существующих событий обновляются только изменившиеся поля (updated), совпадающие строки "
+            "не пишутся (unchanged)."
         ),
+        parameters=[
+            OpenApiParameter(
+                name="mode",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=["orm", "copy", "sync"],
+                description=(
+                    "orm (по умолчанию) — пачками через ORM с чекпоинтами, copy — массово через COPY, "
+                    "sync — обновление по external_id."
+                ),
+            ),
+        ],
         request=FileUploadSerializer,
         responses={
             201: OpenApiResponse(description="Импорт завершён успешно."),
@@ -179,6 +230,7 @@ from drf_spectacular.types import OpenApiTypes
                 name="Пример частичного импорта с ошибками",
                 value={
                     "message": "Created 1 events.",
+                    "skipped": 0,
                     "errors": ["Row 2: End time must be after start time"],
                 },
                 response_only=True,
@@ -200,20 +252,53 @@ class EventViewSet(ModelViewSet):
         "title",
         "start_at",
         "end_at",
+        "distance",
     ]
     ordering = ["start_at"] 
 
     def get_queryset(self):
         qs = Event.objects.select_related("venue", "author")
-        
-        # if self.action == 'retrieve':
-        #    qs = qs.prefetch_related("images", "weather")
+
+        # Для чтения координаты площадки приходят из SQL готовыми float
+        if self.action in ("list", "retrieve"):
+            qs = with_venue_coordinates(qs)
+
+        if self.action == "retrieve":
+            expand = self.get_expand()
+            if "weather" in expand:
+                qs = qs.select_related("weather__venue")
+            if "images" in expand:
+                qs = qs.prefetch_related(
+                    Prefetch("images", queryset=EventImage.objects.order_by("-created_at"))
+                )
 
         user = self.request.user
         if user.is_authenticated and user.is_superuser:
             return qs
         return qs.filter(status=EventStatus.PUBLISHED)
 
+    def get_expand(self):
+        if not hasattr(self, "_expand"):
+            self._expand = parse_expand(self.request.query_params.get("expand"))
+        return self._expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # При генерации схемы (drf-spectacular) expand не задаём: в схеме нужны все поля.
+        # ?expand читает только retrieve, остальные действия отдают событие без вложений
+        if not getattr(self, "swagger_fake_view", False):
+            context["expand"] = self.get_expand() if self.action == "retrieve" else set()
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # У export рендереры — форматы файлов; ошибки (400/403/404/406) отдаём JSON,
+        # а не repr словаря под видом CSV/XLSX
+        if self.action == "export" and isinstance(response, Response) and response.status_code >= 400:
+            response.accepted_renderer = JSONRenderer()
+            response.accepted_media_type = JSONRenderer.media_type
+        return response
+
     def get_serializer_class(self):
         """
         Выбор сериализатора в зависимости от действия.
@@ -308,14 +393,91 @@ class EventViewSet(ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
     
+    @extend_schema(
+        tags=["Мероприятия / Экспорт"],
+        summary="Экспорт мероприятий (XLSX, CSV, Parquet)",
+        description=(
+            "Выгружает текущий отфильтрованный список мероприятий. Фильтры и поиск такие же, как в списке.\n\n"
+            "Формат выбирается заголовком Accept или параметром format: xlsx (по умолчанию), "
+            "csv или parquet (колоночный, для BI).\n\n"
+            f"Готовые выгрузки кэшируются по фильтрам и версии данных. Выгрузка больше {settings.EXPORT_ASYNC_ROWS} строк "
+            "собирается в фоне: ответ 202 с url и Retry-After, по этому url файл отдаётся, когда будет готов."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="format",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=["xlsx", "csv", "parquet"],
+                description="Формат файла; альтернатива заголовку Accept.",
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(description="Файл выгрузки в выбранном формате."),
+            202: OpenApiResponse(description="Выгрузка готовится, повторите запрос через Retry-After секунд."),
+            406: OpenApiResponse(description="Формат не поддерживается."),
+        },
+    )
+    @action(detail=False, methods=["get"], url_path="export", renderer_classes=[XLSXRenderer, CSVRenderer, ParquetRenderer])
+    def export(self, request):
+        """
+        GET /api/events/export/?format=csv
+        """
+        export_format = request.accepted_renderer.format
+        if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            return Response(
+                {"detail": "Экспорт в Parquet недоступен: не установлен pyarrow."},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+        return self._cached_export(request, export_format)
+
     @action(detail=False, methods=["get"], url_path="export-xlsx")
     def export_xlsx(self, request):
         """
         Экспорт отфильтрованных событий в XLSX.
         """
+        return self._cached_export(request, "xlsx")
+
+    def _cached_export(self, request, export_format):
+        """
+        Готовый файл текущей версии данных отдаётся из хранилища.
+        Небольшая выгрузка собирается прямо в запросе, большая — только в Celery:
+        ответ 202 со ссылкой, по которой нужно повторить запрос.
+        """
         # Используем filter_queryset, чтобы применились те же фильтры, что и в списке
         queryset = self.filter_queryset(self.get_queryset())
-        return export_events_to_xlsx(queryset)
+        entry = get_export_entry(queryset, request.query_params, request.user, export_format)
+
+        export_file = None
+        path = fresh_export_path(entry)
+        if path is not None:
+            try:
+                export_file = default_storage.open(path, "rb")
+            except FileNotFoundError:
+                # Файл удалила параллельная пересборка: действуем как при промахе
+                pass
+        if export_file is None:
+            if entry.rows > settings.EXPORT_ASYNC_ROWS:
+                request_export(entry, request.META.get("QUERY_STRING", ""), request.user)
+                response = JsonResponse(
+                    {
+                        "detail": "Выгрузка готовится, повторите запрос позже.",
+                        "rows": entry.rows,
+                        "url": request.build_absolute_uri(),
+                    },
+                    status=status.HTTP_202_ACCEPTED,
+                )
+                response["Retry-After"] = str(settings.EXPORT_RETRY_AFTER)
+                return response
+            export_file = default_storage.open(build_export(queryset, entry), "rb")
+
+        return FileResponse(
+            export_file,
+            as_attachment=True,
+            filename=entry.filename,
+            content_type=EXPORT_CONTENT_TYPES[export_format],
+        )
 
     @action(detail=False, methods=["post"], url_path="import-xlsx", parser_classes=[MultiPartParser, FormParser], serializer_class=FileUploadSerializer)
     def import_xlsx(self, request):
@@ -326,22 +488,105 @@ class EventViewSet(ModelViewSet):
         if not file_obj:
             return Response({"error": "No file uploaded"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Вызываем сервис импорта
-        result = import_events_from_xlsx(file_obj, request.user)
-        
+        # Вызываем сервис импорта: CSV и mode=copy идут через COPY в staging-таблицу,
+        # mode=sync обновляет события по external_id
+        is_csv = file_obj.name.lower().endswith(".csv")
+        mode = request.query_params.get("mode")
+        if mode == "sync":
+            result = (sync_events_from_csv if is_csv else sync_events_from_xlsx)(file_obj, request.user)
+        elif is_csv:
+            result = ingest_events_from_csv(file_obj, request.user)
+        elif mode == "copy":
+            result = ingest_events_from_xlsx(file_obj, request.user)
+        else:
+            result = import_events_from_xlsx(file_obj, request.user)
+
+        stats = {key: result[key] for key in ("skipped", "updated", "unchanged") if key in result}
         if result["errors"]:
             return Response({
                 "message": f"Created {result['created']} events.",
+                **stats,
                 "errors": result["errors"]
             }, status=status.HTTP_400_BAD_REQUEST) # Или 200, если частичный успех ок
             
-        return Response({"message": f"Successfully imported {result['created']} events."}, status=status.HTTP_201_CREATED)
+        return Response({
+            "message": f"Successfully imported {result['created']} events.",
+            **stats,
+        }, status=status.HTTP_201_CREATED)
     
+    @extend_schema(
+        tags=["Мероприятия / Погода"],
+        summary="Погода для списка событий",
+        description=(
+            "Возвращает сохранённые прогнозы сразу для нескольких событий одним запросом (до 100 id). "
+            "Для событий без прогноза он запрашивается в фоне, их id возвращаются в pending."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=True,
+                description="id событий через запятую, например ids=1,2,3.",
+            ),
+        ],
+        responses={
+            200: EventWeatherBulkSerializer,
+            400: OpenApiResponse(description="Некорректный список ids."),
+        }
+    )
+    @action(detail=False, methods=['get'], url_path='weather', url_name='bulk-weather')
+    def bulk_weather(self, request):
+        """
+        GET /api/events/weather/?ids=1,2,3
+        """
+        try:
+            ids = sorted({int(part) for part in request.query_params.get("ids", "").split(",") if part.strip()})
+        except ValueError:
+            return Response({"ids": "Ожидается список целых id через запятую."}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids or len(ids) > BULK_WEATHER_MAX_IDS:
+            return Response(
+                {"ids": f"Передайте от 1 до {BULK_WEATHER_MAX_IDS} id."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        events = (
+            self.get_queryset()
+            .filter(id__in=ids)
+            .select_related(None)
+            .select_related("weather__venue")
+        )
+
+        weather, pending = {}, []
+        for event in events:
+            if event.weather is not None:
+                weather[str(event.id)] = event.weather
+            else:
+                pending.append(event.id)
+
+        request_event_forecasts(pending)
+
+        found = {int(event_id) for event_id in weather} | set(pending)
+        serializer = EventWeatherBulkSerializer({
+            "weather": weather,
+            "pending": pending,
+            "not_found": [event_id for event_id in ids if event_id not in found],
+        })
+        return Response(serializer.data)
+
     @extend_schema(
         tags=["Мероприятия / Погода"],
         summary="Получить погоду для события",
-        description="Возвращает сохраненный прогноз погоды. Если прогноза нет в БД, пытается получить его онлайн и сохранить.",
-        responses={200: WeatherSnapshotSerializer, 404: OpenApiResponse(description="Прогноз недоступен")}
+        description=(
+            "Возвращает сохраненный прогноз погоды. Внешний API в запросе не вызывается: "
+            "если прогноза ещё нет, он запрашивается в фоне и возвращается 202 с заголовком Retry-After."
+        ),
+        responses={
+            200: WeatherSnapshotSerializer,
+            202: OpenApiResponse(description="Прогноз запрошен, повторите запрос через Retry-After секунд."),
+            400: OpenApiResponse(description="У события не указана площадка или координаты."),
+            404: OpenApiResponse(description="Прогноз недоступен"),
+        }
     )
     @action(detail=True, methods=['get'], url_path='weather')
     def get_weather(self, request, pk=None):
@@ -356,28 +601,18 @@ class EventViewSet(ModelViewSet):
                 {"detail": "У события не указана площадка или координаты."}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
-        
-        lat, lon = get_venue_coordinates(event.venue)
 
-        weather_data = get_forecast_for_time(
-            float(lat), 
-            float(lon), 
-            event.start_at
-        )
-
-        if not weather_data:
+        if is_forecast_unavailable(event.id):
             return Response(
                 {"detail": "Прогноз погоды на эту дату пока недоступен (или дата слишком далеко)."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        snapshot = WeatherSnapshot.objects.create(
-            venue=event.venue,
-            **weather_data
-        )
-        
-        event.weather = snapshot
-        event.save(update_fields=['weather'])
+        request_event_forecasts([event.id])
 
-        serializer = WeatherSnapshotSerializer(snapshot)
-        return Response(serializer.data)
\ No newline at end of file
+        response = Response(
+            {"detail": "Прогноз запрошен, повторите запрос позже."},
+            status=status.HTTP_202_ACCEPTED
+        )
+        response["Retry-After"] = str(settings.WEATHER_FORECAST_COALESCE_SECONDS + WEATHER_RETRY_AFTER_MARGIN)
+        return response
@@ -1,153 +1,290 @@
+import hashlib
 import openpyxl
+import re
 import zipfile
 
 from io import BytesIO 
 
-from datetime import datetime
-
 from django.http import HttpResponse
 from django.contrib.gis.geos import Point
-from django.db import transaction
-from django.utils.timezone import make_aware
+from django.db import DatabaseError, IntegrityError, transaction
 
 from venues.models import Venue
-from .models import Event, EventStatus
+from venues.services import normalize_venue_name, venue_resolver
+from .exports import EXPORT_HEADERS, export_rows
+from .models import Event, EventImport, EventImportStatus, EventStatus
+from .parsing import make_import_key, validate_rows
 
-def parse_coordinates(coord_str):
-    """
-    Парсит строку вида 'longitude, latitude' (например '37.61, 55.75') в Point.
-    """
-    try:
-        lon, lat = map(float, coord_str.replace(";", ",").split(","))
-        return Point(lon, lat, srid=4326)
-    except (ValueError, AttributeError):
-        return None
+# Строк файла на одну транзакцию и один чекпоинт EventImport
+IMPORT_CHUNK_ROWS = 1000
+# Сколько раз перечитываем import_key, если параллельный импорт вставил те же события
+IMPORT_CONFLICT_RETRIES = 3
+# Номер строки в сообщении об ошибке чекпоинта ("Row 12: ...")
+ERROR_LINE_RE = re.compile(r"^Row (\d+):")
 
-def parse_excel_date(value):
-    """
-    Превращает значение из Excel (datetime или строку) в Aware Datetime (UTC).
-    """
-    if not value:
-        return None
-        
-    dt = value
-    
-    if isinstance(value, str):
-        try:
-            dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-        except ValueError:
-            try:
-                dt = datetime.strptime(value, "%Y-%m-%d")
-            except ValueError:
-                return None
-
-    if isinstance(dt, datetime):
-        if dt.tzinfo is None:
-            return make_aware(dt)
-        return dt
-        
-    return None
 
 def export_events_to_xlsx(queryset):
     """
     Генерирует XLSX-файл из QuerySet событий.
     Возвращает HttpResponse с файлом.
     """
+    response = HttpResponse(
+        content=build_xlsx(queryset),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    response["Content-Disposition"] = 'attachment; filename="events_export.xlsx"'
+    return response
+
+
+def build_xlsx(queryset):
+    """
+    Содержимое XLSX-файла (bytes) для QuerySet событий.
+    """
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "Events"
 
-    headers = [
-        "Дата публикации", 
-        "Дата начала", 
-        "Дата завершения", 
-        "Место проведения", 
-        "Рейтинг"
-    ]
-    ws.append(headers)
+    ws.append(EXPORT_HEADERS)
 
-    for event in queryset:
+    for publish_at, start_at, end_at, venue, rating in export_rows(queryset):
         ws.append([
-            event.publish_at.strftime("%Y-%m-%d %H:%M") if event.publish_at else "",
-            event.start_at.strftime("%Y-%m-%d %H:%M"),
-            event.end_at.strftime("%Y-%m-%d %H:%M"),
-            event.venue.name,
-            event.rating
+            publish_at.strftime("%Y-%m-%d %H:%M") if publish_at else "",
+            start_at.strftime("%Y-%m-%d %H:%M"),
+            end_at.strftime("%Y-%m-%d %H:%M"),
+            venue,
+            rating
         ])
 
     buffer = BytesIO()
     wb.save(buffer)
-    buffer.seek(0)
-    content = buffer.getvalue()
+    return buffer.getvalue()
 
-    response = HttpResponse(
-        content=content,
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-    )
-    response["Content-Disposition"] = 'attachment; filename="events_export.xlsx"'
-    return response
+
+def file_checksum(file_obj):
+    """
+    SHA-256 содержимого загруженного файла. Позиция чтения возвращается в начало.
+    """
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file_obj.seek(0)
+    return digest.hexdigest()
+
+
+def _take_until(items, position, last_line):
+    """
+    Элементы items (отсортированы по номеру строки) с position и до last_line включительно.
+    """
+    end = position
+    while end < len(items) and items[end][0] <= last_line:
+        end += 1
+    return items[position:end], end
+
+
+def load_venue_ids(names):
+    """
+    {normalize_venue_name(имя): venue_id} для найденных площадок — одним запросом
+    (дальше из кэша VenueResolver).
+    """
+    return {
+        normalize_venue_name(name): venue_id
+        for name, venue_id in venue_resolver.resolve_many(names).items()
+    }
+
+
+def resolve_venue_id(venue_ids, venue_name, lon, lat):
+    """
+    id площадки из venue_ids, а если её нет — создаёт площадку по координатам
+    и запоминает в venue_ids. Без координат бросает ValueError.
+    """
+    venue_key = normalize_venue_name(venue_name)
+    venue_id = venue_ids.get(venue_key)
+    if venue_id is None:
+        if lon is None:
+            raise ValueError(f"Venue '{venue_name}' not found and no coords")
+        point = Point(lon, lat, srid=4326)
+        venue_id = Venue.objects.create(name=venue_name, location=point).pk
+        venue_ids[venue_key] = venue_id
+    return venue_id
 
 
-def import_events_from_xlsx(file_obj, user):
+def _write_chunk(parsed, user, venue_ids):
+    """
+    Одна пачка проверенных строк. Площадки без совпадения создаются по координатам,
+    новые события вставляются одним INSERT (_insert_new_events).
+    Возвращает (создано, пропущено, ошибки).
+    """
+    errors = []
+    events = {}
+    skipped = 0
+
+    for i, title, description, publish_at, start_at, end_at, venue_name, lon, lat, rating in parsed:
+        try:
+            venue_id = resolve_venue_id(venue_ids, venue_name, lon, lat)
+        except ValueError as e:
+            errors.append((i, str(e)))
+            continue
+
+        import_key = make_import_key(title, start_at, venue_name)
+        if import_key in events:
+            # Та же строка повторяется внутри файла
+            skipped += 1
+            continue
+        events[import_key] = Event(
+            title=title,
+            description=description,
+            publish_at=publish_at,
+            start_at=start_at,
+            end_at=end_at,
+            venue_id=venue_id,
+            rating=rating,
+            author=user,
+            status=EventStatus.DRAFT,
+            import_key=import_key,
+        )
+
+    created, duplicates = _insert_new_events(events)
+    return created, skipped + duplicates, errors
+
+
+def _insert_new_events(events):
+    """
+    Вставляет события {import_key: Event}, которых ещё нет в БД.
+    Возвращает (создано, уже существовало) — именно то, что вставил этот вызов.
+
+    Без ignore_conflicts: иначе INSERT молча пропустит ключи, вставленные
+    параллельным импортом, а мы посчитаем их созданными. Если такой конфликт
+    случился, перечитываем существующие ключи и повторяем.
+    """
+    for attempt in range(IMPORT_CONFLICT_RETRIES):
+        existing = set(
+            Event.objects.filter(import_key__in=list(events)).values_list("import_key", flat=True)
+        )
+        new_events = [event for key, event in events.items() if key not in existing]
+        try:
+            with transaction.atomic():
+                Event.objects.bulk_create(new_events)
+        except IntegrityError:
+            if attempt == IMPORT_CONFLICT_RETRIES - 1:
+                raise
+        else:
+            return len(new_events), len(existing)
+
+
+def _write_rows(parsed, user, venue_ids):
+    """
+    То же, что _write_chunk, но каждая строка — в своей точке сохранения:
+    строку, которую отвергла БД, записываем в ошибки и идём дальше.
+    Вызывается внутри transaction.atomic().
+    """
+    created = skipped = 0
+    errors = []
+    for values in parsed:
+        # В строке одна площадка: если её создали в откатанной точке сохранения — забываем
+        venue_key = normalize_venue_name(values[6])
+        venue_known = venue_key in venue_ids
+        try:
+            with transaction.atomic():
+                row_created, row_skipped, row_errors = _write_chunk([values], user, venue_ids)
+        except DatabaseError as e:
+            if not venue_known:
+                venue_ids.pop(venue_key, None)
+            errors.append((values[0], str(e).strip()))
+            continue
+        created += row_created
+        skipped += row_skipped
+        errors += row_errors
+    return created, skipped, errors
+
+
+def _failed_lines(errors):
+    """
+    Номера строк из сообщений об ошибках чекпоинта.
+    """
+    return {int(match.group(1)) for match in map(ERROR_LINE_RE.match, errors) if match}
+
+
+def import_events_from_xlsx(file_obj, user, chunk_rows=IMPORT_CHUNK_ROWS):
     """
     Читает XLSX файл и создает события.
-    Возвращает статистику (создано, ошибок).
+    Возвращает статистику (создано, пропущено как уже существующие, ошибок).
+
+    Строки пишутся пачками по chunk_rows, каждая пачка — в своей транзакции
+    вместе с чекпоинтом EventImport. Если импорт прервался, повторная загрузка
+    того же файла продолжит со следующей пачки. Уже импортированные события
+    узнаются по import_key и не дублируются. Если БД отвергла пачку целиком,
+    она повторяется построчно (_write_rows), и в ошибки попадают только плохие строки.
+
+    Повторная загрузка уже импортированного файла проверяет и пишет только
+    строки из checkpoint.errors; остальные считаются пропущенными.
     """
+    checksum = file_checksum(file_obj)
     try:
         wb = openpyxl.load_workbook(file_obj, data_only=True)
     except (zipfile.BadZipFile, OSError):
         return {"created": 0, "errors": ["Файл поврежден или не является корректным XLSX."]}
     ws = wb.active
-    
-    created_count = 0
-    errors = []
 
-    rows = ws.iter_rows(min_row=2, values_only=True)
-    
-    for i, row in enumerate(rows, start=2):
+    checkpoint, _ = EventImport.objects.get_or_create(author=user, checksum=checksum)
+    if checkpoint.status == EventImportStatus.DONE:
+        # Файл уже загружался целиком: повторяем только строки, которые раньше
+        # упали (например, из-за площадки), остальные уже в БД
+        retry_lines = _failed_lines(checkpoint.errors)
+        checkpoint.skipped_count += checkpoint.created_count
+        checkpoint.created_count = 0
+        checkpoint.errors = []
+    else:
+        retry_lines = set()
+    checkpoint.status = EventImportStatus.RUNNING
+    checkpoint.save()
+
+    rows = [
+        (i, row) for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2)
+        if row and row[0] and (i > checkpoint.last_line or i in retry_lines)
+    ]
+    # Разбор строк — чистый CPU, на больших файлах идёт в нескольких процессах.
+    # Запись в БД остаётся здесь, в одном процессе.
+    parsed, errors = validate_rows(rows)
+
+    venue_ids = load_venue_ids({values[6] for values in parsed})
+
+    parsed_pos = errors_pos = 0
+    for start in range(0, len(rows), chunk_rows):
+        chunk_last_line = rows[min(start + chunk_rows, len(rows)) - 1][0]
+        chunk_parsed, parsed_pos = _take_until(parsed, parsed_pos, chunk_last_line)
+        chunk_errors, errors_pos = _take_until(errors, errors_pos, chunk_last_line)
+
+        # Площадки, созданные в пачке, запоминаем только если она закоммитилась
+        chunk_venue_ids = dict(venue_ids)
         try:
             with transaction.atomic():
-                if not row or not row[0]:
-                    continue
-
-                title = row[0]
-                description = row[1] or ""
-                publish_at = row[2] 
-                start_at = row[3]
-                end_at = row[4]
-                venue_name = row[5]
-                coords_str = str(row[6])
-                rating = row[7] or 0
-                
-                start_at = parse_excel_date(start_at)
-                end_at = parse_excel_date(end_at)
-                publish_at = parse_excel_date(publish_at)
-
-                point = parse_coordinates(coords_str)
-                if not point:
-                    venue = Venue.objects.filter(name=venue_name).first()
-                    if not venue:
-                        raise ValueError(f"Venue '{venue_name}' not found and no coords")
-                else:
-                    venue, _ = Venue.objects.get_or_create(
-                        name=venue_name,
-                        defaults={"location": point}
-                    )
-
-                Event.objects.create(
-                    title=title,
-                    description=description,
-                    publish_at=publish_at,
-                    start_at=start_at,
-                    end_at=end_at,
-                    venue=venue,
-                    rating=rating,
-                    author=user,
-                    status=EventStatus.DRAFT
-                )
-                created_count += 1
-
+                try:
+                    with transaction.atomic():
+                        created, skipped, write_errors = _write_chunk(chunk_parsed, user, chunk_venue_ids)
+                except DatabaseError:
+                    chunk_venue_ids = dict(venue_ids)
+                    created, skipped, write_errors = _write_rows(chunk_parsed, user, chunk_venue_ids)
+                chunk_errors = sorted(chunk_errors + write_errors)
+                checkpoint.last_line = chunk_last_line
+                checkpoint.created_count += created
+                checkpoint.skipped_count += skipped
+                checkpoint.errors += [f"Row {i}: {message}" for i, message in chunk_errors]
+                checkpoint.save()
         except Exception as e:
-            errors.append(f"Row {i}: {str(e)}")
+            checkpoint.refresh_from_db()
+            checkpoint.status = EventImportStatus.FAILED
+            checkpoint.save(update_fields=["status", "updated_at"])
+            return {
+                "created": checkpoint.created_count,
+                "skipped": checkpoint.skipped_count,
+                "errors": checkpoint.errors + [f"Rows {rows[start][0]}-{chunk_last_line}: {e}"],
+            }
+        venue_ids = chunk_venue_ids
 
-    return {"created": created_count, "errors": errors}
+    checkpoint.status = EventImportStatus.DONE
+    checkpoint.save(update_fields=["status", "updated_at"])
+    return {
+        "created": checkpoint.created_count,
+        "skipped": checkpoint.skipped_count,
+        "errors": checkpoint.errors,
+    }
@@ -3,6 +3,9 @@ import pytest
 from rest_framework.test import APIClient
 from pytest_factoryboy import register
 from tests.factories import UserFactory, VenueFactory, EventFactory
+from django.core.cache import cache
+from events.notifications import invalidate_notification_config
+from venues.services import venue_resolver
 
 register(UserFactory)
 register(VenueFactory)
@@ -11,3 +14,32 @@ register(EventFactory)
 @pytest.fixture
 def api_client():
     return APIClient()
+
+
+@pytest.fixture(autouse=True)
+def reset_process_caches():
+    # Кэши процесса переживают откат транзакции теста — чистим их явно.
+    invalidate_notification_config()
+    venue_resolver.clear()
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # Выгрузки и картинки пишутся в default_storage — не засоряем media/ проекта
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def fake_weather():
+    """
+    Локальная заглушка Open-Meteo вместо сети (см. weather/fake_provider.py).
+    В adapter.behaviour можно менять latency/error_rate и смотреть счётчики запросов.
+    """
+    from weather.fake_provider import install_fake_provider, uninstall_fake_provider
+
+    adapter = install_fake_provider()
+    yield adapter
+    uninstall_fake_provider()
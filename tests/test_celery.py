@@ -12,7 +12,7 @@ from weather.models import WeatherSnapshot
 
 @override_settings(CELERY_TASK_ALWAYS_EAGER=True)
 @pytest.mark.django_db
-def test_publish_chain_weather_and_email(event_factory, mocker):
+def test_publish_chain_weather_and_email(event_factory, mocker, django_capture_on_commit_callbacks):
     """
     Проверяет при наступлении даты publish_at: Планировщик -> Публикация -> Сигнал -> Погода + Email
     """
@@ -35,7 +35,9 @@ def test_publish_chain_weather_and_email(event_factory, mocker):
     event = event_factory(status=EventStatus.SCHEDULED, publish_at=past)
     
     mail.outbox = []
-    publish_scheduled_events_task()
+    # Задачи уходят в очередь только после коммита транзакции
+    with django_capture_on_commit_callbacks(execute=True):
+        publish_scheduled_events_task()
     
     event.refresh_from_db()
     
@@ -89,4 +91,260 @@ def test_update_weather_snapshots_periodic(venue_factory, mocker):
     assert s2.temperature_celsius == 22.0
     
     assert "Updated Park Gorky" in results
-    assert "Updated VDNH" in results
\ No newline at end of file
+    assert "Updated VDNH" in results
+
+@pytest.mark.django_db
+def test_notification_config_cached_and_invalidated_on_save(event_factory, django_assert_num_queries):
+    """
+    Настройки рассылки читаются из БД один раз и сбрасываются при сохранении.
+    Письмо по неизменённому событию рендерится один раз.
+    """
+    from events.notifications import get_notification_config
+
+    config = EmailNotificationConfig.objects.create(
+        subject_template="Ура! {title}",
+        message_template="{title} @ {venue}",
+        send_to_all_users=False,
+    )
+
+    first = get_notification_config()
+    with django_assert_num_queries(0):
+        assert get_notification_config() is first
+
+    event = event_factory(title="Jazz", status=EventStatus.DRAFT)
+    subject, message = first.render(event)
+    assert subject == "Ура! Jazz"
+    assert message == f"Jazz @ {event.venue.name}"
+    assert first.render(event) is first.render(event)
+
+    config.subject_template = "Новое: {title}"
+    config.save()
+
+    second = get_notification_config()
+    assert second is not first
+    assert second.render(event)[0] == "Новое: Jazz"
+
+
+@pytest.mark.django_db
+def test_notification_broken_template_falls_back(event_factory):
+    from events.notifications import get_notification_config
+
+    EmailNotificationConfig.objects.create(
+        subject_template="{unknown} {title",
+        send_to_all_users=False,
+    )
+    event = event_factory(title="Jazz", status=EventStatus.DRAFT)
+
+    subject, _ = get_notification_config().render(event)
+    assert subject == "Новое мероприятие: Jazz"
+
+
+@pytest.mark.django_db
+def test_tasks_dispatched_once_after_commit(event_factory, mocker, django_capture_on_commit_callbacks):
+    """
+    Внутри транзакции задачи копятся, дедуплицируются и уходят одной пачкой после коммита.
+    """
+    from weather.tasks import set_event_weather_forecast_task
+
+    mock_send = mocker.patch('core.dispatch.send_batch')
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        event = event_factory(status=EventStatus.PUBLISHED)
+        event.start_at += timedelta(hours=1)
+        event.end_at += timedelta(hours=1)
+        event.save()
+        mock_send.assert_not_called()
+
+    # Один flush на транзакцию, остальные колбэки — пустые отметки намерений
+    assert sum(callback.__name__ == "flush" for callback in callbacks) == 1
+    mock_send.assert_called_once()
+    intents = mock_send.call_args.args[0]
+    assert intents == [(set_event_weather_forecast_task, (event.id,), {})]
+
+
+@pytest.mark.django_db
+def test_suspend_event_signals_runs_side_effects_once(event_factory, mocker, django_capture_on_commit_callbacks):
+    """
+    При массовой записи построчные сигналы молчат, а погода и письма
+    ставятся в очередь одним шагом на выходе из блока.
+    """
+    from events.bulk import suspend_event_signals
+    from events.models import Event
+    from events.tasks import send_event_notification_task
+    from weather.tasks import set_event_weather_forecast_task
+
+    EmailNotificationConfig.objects.create(send_to_all_users=False, recipients_list="[email protected]")
+    mock_send = mocker.patch('core.dispatch.send_batch')
+    mock_refetch = mocker.spy(Event.objects, 'get')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with suspend_event_signals() as batch:
+            published = event_factory(status=EventStatus.PUBLISHED)
+            draft = event_factory(status=EventStatus.DRAFT)
+            published.save()
+            assert batch.event_ids == {published.id, draft.id}
+
+    mock_refetch.assert_not_called()
+    mock_send.assert_called_once()
+    intents = mock_send.call_args.args[0]
+    assert intents == [
+        (set_event_weather_forecast_task, (published.id,), {}),
+        (send_event_notification_task, (published.id,), {}),
+    ]
+
+
+@pytest.mark.django_db
+def test_suspend_event_signals_resets_weather_on_reschedule(event_factory, mocker, django_capture_on_commit_callbacks):
+    """
+    Перенос события внутри массовой записи сбрасывает старый прогноз
+    и ставит новый, не перечитывая строку из БД.
+    """
+    from events.bulk import suspend_event_signals
+    from events.models import Event
+    from weather.tasks import set_event_weather_forecast_task
+
+    snapshot = WeatherSnapshot.objects.create(
+        venue=event_factory().venue,
+        temperature_celsius=10.0,
+        humidity_percent=70,
+        pressure_mmhg=745,
+        wind_speed_ms=1.0,
+        wind_direction="N",
+    )
+    # Через update(), чтобы сигналы не поставили прогноз ещё до блока
+    event = event_factory(status=EventStatus.DRAFT)
+    Event.objects.filter(pk=event.pk).update(status=EventStatus.PUBLISHED, weather=snapshot)
+    event = Event.objects.get(pk=event.pk)
+    mock_send = mocker.patch('core.dispatch.send_batch')
+    mock_refetch = mocker.spy(Event.objects, 'get')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with suspend_event_signals() as batch:
+            event.title = "Renamed"
+            event.save()
+            assert batch.reset_weather_ids == set()
+
+            # start_at не загружался — не считаем его изменённым и не дочитываем
+            partial = Event.objects.filter(pk=event.pk).only("id", "title").first()
+            partial.title = "Renamed again"
+            partial.save()
+            assert batch.reset_weather_ids == set()
+
+            event.start_at += timedelta(days=1)
+            event.end_at += timedelta(days=1)
+            event.save()
+            assert batch.reset_weather_ids == {event.id}
+
+    mock_refetch.assert_not_called()
+    event.refresh_from_db()
+    assert event.weather_id is None
+    intents = [intent for call in mock_send.call_args_list for intent in call.args[0]]
+    assert (set_event_weather_forecast_task, (event.id,), {}) in intents
+
+
+@pytest.mark.django_db
+def test_tasks_from_rolled_back_savepoint_not_dispatched(event_factory, mocker, django_capture_on_commit_callbacks):
+    """
+    Задачи, поставленные во вложенном atomic, который откатился, после коммита не отправляются;
+    остальные уходят одной пачкой.
+    """
+    from django.db import transaction
+    from core.dispatch import enqueue_on_commit
+    from events.tasks import send_event_notification_task
+    from weather.tasks import set_event_weather_forecast_task
+
+    event = event_factory(status=EventStatus.DRAFT)
+    mock_send = mocker.patch('core.dispatch.send_batch')
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        enqueue_on_commit(set_event_weather_forecast_task, event.id)
+        try:
+            with transaction.atomic():
+                enqueue_on_commit(send_event_notification_task, event.id)
+                enqueue_on_commit(set_event_weather_forecast_task, event.id)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            enqueue_on_commit(send_event_notification_task, event.id)
+        enqueue_on_commit(set_event_weather_forecast_task, event.id)
+
+    assert sum(callback.__name__ == "flush" for callback in callbacks) == 1
+    mock_send.assert_called_once()
+    intents = mock_send.call_args.args[0]
+    assert intents == [
+        (set_event_weather_forecast_task, (event.id,), {}),
+        (send_event_notification_task, (event.id,), {}),
+    ]
+
+
+@pytest.mark.django_db
+def test_weather_forecast_tasks_coalesced(event_factory, mocker):
+    """
+    Из нескольких постановок прогноза для одного события выполняется только последняя.
+    """
+    from celery.app.task import Task
+    from weather.tasks import set_event_weather_forecast_task
+
+    mock_apply = mocker.patch.object(Task, 'apply_async')
+    mock_weather = mocker.patch('weather.tasks.get_forecast_for_time')
+    mock_weather.return_value = {
+        "temperature_celsius": 10.0,
+        "humidity_percent": 70,
+        "pressure_mmhg": 745,
+        "wind_speed_ms": 1.0,
+        "wind_direction": 45
+    }
+
+    event = event_factory(status=EventStatus.DRAFT)
+    set_event_weather_forecast_task.apply_async((event.id,))
+    set_event_weather_forecast_task.delay(event.id)
+    # Вызов с именованным аргументом тоже перевыпускает токен
+    set_event_weather_forecast_task.delay(event_id=event.id)
+
+    tokens = [c.args[1]["coalesce_token"] for c in mock_apply.call_args_list]
+    assert len(set(tokens)) == 3
+    assert all(c.kwargs["countdown"] > 0 for c in mock_apply.call_args_list)
+
+    for stale in tokens[:-1]:
+        assert set_event_weather_forecast_task(event.id, coalesce_token=stale).startswith("Superseded")
+    mock_weather.assert_not_called()
+
+    set_event_weather_forecast_task(event.id, coalesce_token=tokens[-1])
+    mock_weather.assert_called_once()
+    assert WeatherSnapshot.objects.count() == 1
+
+@pytest.mark.django_db
+def test_weather_breaker_opens_and_short_circuits(api_client, event_factory, mocker, settings, fake_weather):
+    """
+    После N ошибок API предохранитель размыкается: запросы не отправляются,
+    задача прогноза уходит в retry, health показывает деградацию.
+    """
+    from django.urls import reverse
+    from weather.breaker import CircuitOpenError, WeatherProviderError, weather_breaker
+    from weather.services import get_forecast_for_time
+    from weather.tasks import set_event_weather_forecast_task
+
+    settings.WEATHER_BREAKER_FAILURE_THRESHOLD = 2
+    fake_weather.behaviour.error_rate = 1.0
+    when = timezone.now()
+
+    for _ in range(2):
+        with pytest.raises(WeatherProviderError):
+            get_forecast_for_time(55.75, 37.61, when)
+    assert weather_breaker.state() == weather_breaker.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        get_forecast_for_time(55.75, 37.61, when)
+    assert fake_weather.behaviour.requests == 2
+
+    event = event_factory(status=EventStatus.PUBLISHED)
+    retry = mocker.patch.object(set_event_weather_forecast_task, 'retry', side_effect=RuntimeError("retry"))
+    with pytest.raises(RuntimeError):
+        set_event_weather_forecast_task(event.id)
+    assert retry.call_args.kwargs["countdown"] > 0
+
+    response = api_client.get(reverse('weather-health'))
+    assert response.status_code == 200
+    assert response.data["state"] == "open"
+    assert response.data["degraded"] is True
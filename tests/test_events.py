@@ -133,7 +133,10 @@ def test_event_delete_forbidden_for_user(api_client, user_factory, event_factory
 
 @pytest.mark.django_db
 def test_get_weather_action(api_client, event_factory, mocker):
-    mock_weather = mocker.patch('events.views.get_forecast_for_time')
+    from weather.tasks import set_event_weather_forecast_task
+
+    send_batch = mocker.patch('weather.tasks.send_batch')
+    mock_weather = mocker.patch('weather.tasks.get_forecast_for_time')
     mock_weather.return_value = {
         "temperature_celsius": 25.0,
         "humidity_percent": 50,
@@ -145,8 +148,87 @@ def test_get_weather_action(api_client, event_factory, mocker):
     event = event_factory(status=EventStatus.PUBLISHED)
     
     url = reverse('events-get-weather', args=[event.id])
+
+    # Внешний API в запросе не вызывается: прогноз ставится в очередь
+    response = api_client.get(url)
+    assert response.status_code == 202
+    assert "Retry-After" in response
+    mock_weather.assert_not_called()
+    send_batch.assert_called_once()
+
+    # Воркер отработал — следующий запрос отдаёт сохранённый прогноз
+    set_event_weather_forecast_task(event.id)
     response = api_client.get(url)
-    
     assert response.status_code == 200
     assert response.data['temperature_celsius'] == 25.0
     mock_weather.assert_called_once()
+
+@pytest.mark.django_db
+def test_bulk_weather_returns_stored_and_queues_missing(api_client, event_factory, mocker, django_assert_max_num_queries):
+    from weather.models import WeatherSnapshot
+
+    send_batch = mocker.patch('weather.tasks.send_batch')
+
+    with_weather = event_factory(status=EventStatus.PUBLISHED)
+    with_weather.weather = WeatherSnapshot.objects.create(
+        venue=with_weather.venue, temperature_celsius=20.0, humidity_percent=40,
+        pressure_mmhg=750, wind_direction="N", wind_speed_ms=2.0,
+    )
+    with_weather.save(update_fields=["weather"])
+    without_weather = event_factory(status=EventStatus.PUBLISHED)
+    draft = event_factory(status=EventStatus.DRAFT)
+
+    url = reverse('events-bulk-weather')
+    ids = f"{with_weather.id},{without_weather.id},{draft.id}"
+
+    with django_assert_max_num_queries(1):
+        response = api_client.get(url, {"ids": ids})
+
+    assert response.status_code == 200
+    assert response.data["weather"][str(with_weather.id)]["temperature_celsius"] == 20.0
+    assert response.data["pending"] == [without_weather.id]
+    assert response.data["not_found"] == [draft.id]
+
+    # Повторный запрос не ставит задачу ещё раз
+    api_client.get(url, {"ids": ids})
+    send_batch.assert_called_once()
+
+    assert api_client.get(url, {"ids": "1,abc"}).status_code == 400
+
+@pytest.mark.django_db
+def test_event_detail_expand(api_client, event_factory, django_assert_num_queries):
+    from events.models import EventImage
+    from weather.models import WeatherSnapshot
+
+    event = event_factory(status=EventStatus.PUBLISHED)
+    event.weather = WeatherSnapshot.objects.create(
+        venue=event.venue, temperature_celsius=20.0, humidity_percent=40,
+        pressure_mmhg=750, wind_direction="N", wind_speed_ms=2.0,
+    )
+    event.save(update_fields=["weather"])
+    url = reverse('events-detail', args=[event.id])
+
+    response = api_client.get(url)
+    assert "weather" not in response.data and "images" not in response.data
+
+    for count in (1, 10):
+        EventImage.objects.bulk_create(
+            EventImage(event=event, image=f"events/images/{event.id}-{count}-{n}.jpg") for n in range(count)
+        )
+        # Событие с площадкой и погодой — один запрос, галерея — второй
+        with django_assert_num_queries(2):
+            response = api_client.get(url, {"expand": "weather,images"})
+        assert response.status_code == 200
+        assert response.data["weather"]["venue_name"] == event.venue.name
+        assert len(response.data["images"]) == event.images.count()
+
+    assert api_client.get(url, {"expand": "weather,author"}).status_code == 400
+
+
+def test_event_detail_schema_documents_expandable_fields():
+    from drf_spectacular.generators import SchemaGenerator
+
+    schema = SchemaGenerator().get_schema(request=None, public=True)
+
+    properties = schema["components"]["schemas"]["EventDetail"]["properties"]
+    assert {"weather", "images"} <= set(properties)
@@ -103,4 +103,49 @@ def test_ordering_events_all_fields(api_client, event_factory):
     res = response.data['results']
     assert res[0]['id'] == e3.id
     assert res[1]['id'] == e2.id
-    assert res[2]['id'] == e1.id
\ No newline at end of file
+    assert res[2]['id'] == e1.id
+
+@pytest.mark.django_db
+def test_filter_events_near_point(api_client, event_factory, venue_factory):
+    """
+    Гео-фильтр near/radius_km и сортировка по расстоянию.
+    """
+    from django.contrib.gis.geos import Point
+
+    kremlin = venue_factory(name="Kremlin", location=Point(37.6175, 55.7520))
+    arbat = venue_factory(name="Arbat", location=Point(37.5910, 55.7494))
+    piter = venue_factory(name="Hermitage", location=Point(30.3146, 59.9398))
+
+    e_kremlin = event_factory(venue=kremlin, status=EventStatus.PUBLISHED)
+    e_arbat = event_factory(venue=arbat, status=EventStatus.PUBLISHED)
+    event_factory(venue=piter, status=EventStatus.PUBLISHED)
+
+    url = reverse('events-list')
+
+    response = api_client.get(url, {'near': '55.7558,37.6173', 'radius_km': 5, 'ordering': 'distance'})
+    assert response.status_code == 200
+    ids = [r['id'] for r in response.data['results']]
+    assert ids == [e_kremlin.id, e_arbat.id]
+
+    response = api_client.get(url, {'bbox': '30.0,59.0,31.0,60.5'})
+    assert [r['venue']['name'] for r in response.data['results']] == ["Hermitage"]
+
+    response = api_client.get(url, {'near': 'not-a-point'})
+    assert response.status_code == 400
+
+    # Без near distance не аннотируется, сортировка по нему пропускается
+    response = api_client.get(url, {'ordering': 'distance'})
+    assert response.status_code == 200
+    assert response.data['count'] == 3
+
+
+@pytest.mark.django_db
+def test_filter_venues_near_point(api_client, venue_factory):
+    from django.contrib.gis.geos import Point
+
+    venue_factory(name="Near", location=Point(37.62, 55.75))
+    venue_factory(name="Far", location=Point(30.31, 59.94))
+
+    response = api_client.get(reverse('venues-list'), {'near': '55.75,37.61', 'radius_km': 50})
+    assert response.status_code == 200
+    assert [v['name'] for v in response.data['results']] == ["Near"]
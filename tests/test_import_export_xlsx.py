@@ -4,7 +4,10 @@ import openpyxl
 from django.urls import reverse
 from io import BytesIO
 
+from events import parsing
+from events.export_cache import build_export
 from events.models import EventStatus
+from events.tasks import build_export_task
 
 @pytest.mark.django_db
 def test_import_xlsx_success(api_client, user_factory, venue_factory):
@@ -53,10 +56,409 @@ def test_export_xlsx(api_client, event_factory):
     assert response.status_code == 200
     assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     
-    file_content = BytesIO(response.content)
+    file_content = BytesIO(b"".join(response.streaming_content))
     wb = openpyxl.load_workbook(file_content)
     ws = wb.active
     
     rows = list(ws.rows)
     assert len(rows) == 6 
     assert rows[0][0].value == "Дата публикации" 
+
+@pytest.mark.django_db
+def test_import_xlsx_resolves_venues_in_one_query(api_client, user_factory, venue_factory, django_assert_max_num_queries):
+    from venues.services import venue_resolver
+
+    admin = user_factory(is_superuser=True)
+    venue = venue_factory(name="Test Venue")
+    venue_resolver.clear()
+
+    assert venue_resolver.resolve_many(["test venue ", "Missing"]) == {"test venue ": venue.id}
+    # Повторный поиск идёт из кэша, без запросов к БД
+    with django_assert_max_num_queries(0):
+        assert venue_resolver.resolve("TEST VENUE") == venue.id
+
+    venue.name = "Renamed Venue"
+    venue.save()
+    assert venue_resolver.resolve("Test Venue") is None
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["title", "description", "publish_at", "start_at", "end_at", "venue_name", "coords", "rating"])
+    for n in range(3):
+        ws.append([f"Party {n}", "", "", "2026-01-01 10:00:00", "2026-01-01 12:00:00", "renamed venue", "", 5])
+
+    file_obj = BytesIO()
+    wb.save(file_obj)
+    file_obj.seek(0)
+    file_obj.name = "events.xlsx"
+
+    api_client.force_authenticate(user=admin)
+    response = api_client.post(reverse('events-import-xlsx'), {"file": file_obj}, format='multipart')
+
+    assert response.status_code == 201
+    assert venue.events.count() == 3
+
+@pytest.mark.django_db
+def test_import_csv_copy_ingest(api_client, user_factory, venue_factory):
+    """
+    CSV идёт через COPY в staging-таблицу: площадки находятся без учёта регистра
+    или создаются по координатам, плохие строки возвращаются с номерами.
+    """
+    from events.models import Event
+
+    admin = user_factory(is_superuser=True)
+    venue = venue_factory(name="Test Venue")
+    api_client.force_authenticate(user=admin)
+
+    content = "\n".join([
+        "title,description,publish_at,start_at,end_at,venue_name,coords,rating",
+        "Party,Desc,,2026-01-01 10:00:00,2026-01-01 12:00:00,test venue,,5",
+        "Backwards,,,2026-01-01 12:00:00,2026-01-01 10:00:00,Test Venue,,5",
+        "Lost,,,2026-01-01 10:00:00,2026-01-01 12:00:00,Nowhere,,5",
+        "New place,,,2026-01-01 10:00:00,2026-01-01 12:00:00,New Venue,\"37.61, 55.75\",7",
+        "x" * 256 + ",,,2026-01-01 10:00:00,2026-01-01 12:00:00,Test Venue,,5",
+        "Long venue,,,2026-01-01 10:00:00,2026-01-01 12:00:00," + "v" * 256 + ",\"37.61, 55.75\",5",
+    ]).encode()
+    file_obj = BytesIO(content)
+    file_obj.name = "events.csv"
+
+    response = api_client.post(reverse('events-import-xlsx'), {"file": file_obj}, format='multipart')
+
+    assert response.status_code == 400
+    assert response.data["message"] == "Created 2 events."
+    assert response.data["errors"] == [
+        "Row 3: End time must be after start time",
+        "Row 4: Venue 'Nowhere' not found and no coords",
+        "Row 6: Title is longer than 255 characters",
+        "Row 7: Venue name is longer than 255 characters",
+    ]
+    assert Event.objects.filter(venue=venue, title="Party", status=EventStatus.DRAFT).exists()
+    assert Event.objects.filter(venue__name="New Venue", rating=7).exists()
+
+@pytest.mark.django_db
+def test_export_formats_negotiated(api_client, event_factory):
+    event_factory.create_batch(3, status=EventStatus.PUBLISHED)
+    event_factory(status=EventStatus.DRAFT)
+    url = reverse('events-export')
+
+    response = api_client.get(url, {"format": "csv"})
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/csv')
+    lines = b"".join(response.streaming_content).decode("utf-8-sig").splitlines()
+    assert lines[0] == "Дата публикации,Дата начала,Дата завершения,Место проведения,Рейтинг"
+    assert len(lines) == 4
+
+    response = api_client.get(url, HTTP_ACCEPT="text/csv")
+    assert response['Content-Type'].startswith('text/csv')
+
+    response = api_client.get(url)
+    assert response['Content-Type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = api_client.get(url, {"format": "parquet"})
+    assert response.status_code == 200
+    table = pq.read_table(BytesIO(b"".join(response.streaming_content)))
+    assert table.num_rows == 3
+    assert table.column_names == ["publish_at", "start_at", "end_at", "venue", "rating"]
+
+@pytest.mark.django_db
+def test_export_errors_rendered_as_json(api_client):
+    url = reverse('events-export')
+
+    response = api_client.get(url, {"format": "csv", "rating_min": "abc"})
+    assert response.status_code == 400
+    assert response['Content-Type'] == 'application/json'
+    assert "rating_min" in response.json()
+
+    response = api_client.get(url, HTTP_ACCEPT="image/png")
+    assert response.status_code == 406
+    assert response['Content-Type'] == 'application/json'
+    assert "detail" in response.json()
+
+@pytest.mark.django_db
+def test_export_cached_until_data_changes(api_client, event_factory, mocker):
+    event = event_factory(status=EventStatus.PUBLISHED)
+    event_factory(status=EventStatus.PUBLISHED)
+    url = reverse('events-export')
+    build = mocker.patch("events.views.build_export", wraps=build_export)
+
+    first = b"".join(api_client.get(url, {"format": "csv", "ordering": "title"}).streaming_content)
+    # Порядок параметров и посторонние параметры на ключ не влияют
+    response = api_client.get(url + "?ordering=title&format=csv&x=1")
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) == first
+    assert build.call_count == 1
+
+    event.rating = 9
+    event.save()
+    response = api_client.get(url, {"format": "csv", "ordering": "title"})
+    assert b"".join(response.streaming_content) != first
+    assert build.call_count == 2
+
+    # Старая версия удалена при пересборке, осиротевший файл — задачей очистки
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from events.export_cache import EXPORT_DIR, cleanup_exports
+
+    default_storage.save(f"{EXPORT_DIR}/orphan-0.csv", ContentFile(b"stale"))
+    assert len(default_storage.listdir(EXPORT_DIR)[1]) == 2
+    assert cleanup_exports(grace_seconds=-60) == 1
+    assert len(default_storage.listdir(EXPORT_DIR)[1]) == 1
+    assert api_client.get(url, {"format": "csv", "ordering": "title"}).status_code == 200
+    assert build.call_count == 2
+
+    # Файл из кэша пропал (его удалила параллельная пересборка) — собираем заново, а не 500
+    (name,) = default_storage.listdir(EXPORT_DIR)[1]
+    default_storage.delete(f"{EXPORT_DIR}/{name}")
+    response = api_client.get(url, {"format": "csv", "ordering": "title"})
+    assert response.status_code == 200
+    assert b"".join(response.streaming_content) != b""
+    assert build.call_count == 3
+
+
+@pytest.mark.django_db
+def test_build_export_keeps_name_chosen_by_storage(event_factory):
+    """
+    Если entry.path занят (параллельная сборка), хранилище сохраняет файл
+    под другим именем — в кэш попадает именно оно.
+    """
+    from django.core.files.base import ContentFile
+    from django.core.files.storage import default_storage
+    from django.contrib.auth.models import AnonymousUser
+    from django.http import QueryDict
+    from events.export_cache import fresh_export_path, get_export_entry
+    from events.models import Event
+
+    event_factory(status=EventStatus.PUBLISHED)
+    queryset = Event.objects.filter(status=EventStatus.PUBLISHED)
+    entry = get_export_entry(queryset, QueryDict(""), AnonymousUser(), "csv")
+    default_storage.save(entry.path, ContentFile(b"other build"))
+
+    path = build_export(queryset, entry)
+    assert path != entry.path
+    assert fresh_export_path(entry) == path
+
+@pytest.mark.django_db
+def test_large_export_built_in_background(api_client, event_factory, settings, mocker):
+    settings.EXPORT_ASYNC_ROWS = 1
+    event_factory.create_batch(2, status=EventStatus.PUBLISHED)
+    url = reverse('events-export-xlsx')
+    delay = mocker.patch("events.tasks.build_export_task.delay")
+
+    response = api_client.get(url)
+    assert response.status_code == 202
+    assert response["Retry-After"] == str(settings.EXPORT_RETRY_AFTER)
+    assert response.json()["rows"] == 2
+    api_client.get(url)
+    delay.assert_called_once_with("", None, "xlsx")
+
+    build_export_task(*delay.call_args.args)
+    response = api_client.get(url)
+    assert response.status_code == 200
+    rows = list(openpyxl.load_workbook(BytesIO(b"".join(response.streaming_content))).active.rows)
+    assert len(rows) == 3
+
+def test_validate_rows_parallel_keeps_row_order(monkeypatch):
+    monkeypatch.setattr(parsing, "PARALLEL_MIN_ROWS", 10)
+    rows = [
+        (i, [f"Party {i}", "", "", "2026-01-01 10:00:00", "2026-01-01 12:00:00" if i % 7 else "2025-01-01", "Venue", "37.61, 55.75", 5])
+        for i in range(2, 52)
+    ]
+
+    parsed, errors = parsing.validate_rows(rows, workers=2, chunk_rows=8)
+
+    assert (parsed, errors) == parsing.validate_rows(rows, workers=1)
+    assert [line_no for line_no, _ in errors] == [7, 14, 21, 28, 35, 42, 49]
+    assert errors[0][1] == "End time must be after start time"
+    assert parsed[0][7:] == (37.61, 55.75, 5)
+    # Пул процессов общий для импортов, а не новый на каждый запрос
+    assert parsing.get_validation_pool(2) is parsing.get_validation_pool(2)
+
+def test_validation_workers_capped(settings, monkeypatch):
+    monkeypatch.setattr(parsing.os, "cpu_count", lambda: 64)
+    settings.IMPORT_VALIDATION_WORKERS = 0
+    settings.IMPORT_VALIDATION_MAX_WORKERS = 4
+    assert parsing.get_validation_workers() == 4
+    settings.IMPORT_VALIDATION_WORKERS = 2
+    assert parsing.get_validation_workers() == 2
+
+def test_parse_import_datetime_formats():
+    from datetime import date, datetime, timezone as dt_timezone
+    from events.dateparse import parse_import_datetime
+
+    utc = dt_timezone.utc
+    expected = datetime(2026, 12, 31, 18, 30, tzinfo=utc)
+    for value in ["2026-12-31 18:30:00", "2026-12-31T18:30", "31.12.2026 18:30", "31/12/2026 18:30", 46387.7708333333]:
+        assert parse_import_datetime(value, utc) == expected, value
+
+    assert parse_import_datetime("2026-12-31", utc) == datetime(2026, 12, 31, tzinfo=utc)
+    assert parse_import_datetime(date(2026, 12, 31), utc) == datetime(2026, 12, 31, tzinfo=utc)
+    assert parse_import_datetime("2026-12-31 18:30:00+03:00", utc).utcoffset().total_seconds() == 3 * 3600
+    assert parse_import_datetime(25569, utc) == datetime(1970, 1, 1, tzinfo=utc)
+    for value in ["", "garbage", "32.12.2026", True, -1, 5, 25568.5]:
+        assert parse_import_datetime(value, utc) is None
+
+def _xlsx(rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.append(["title", "description", "publish_at", "start_at", "end_at", "venue_name", "coords", "rating"])
+    for row in rows:
+        ws.append(row)
+    file_obj = BytesIO()
+    wb.save(file_obj)
+    file_obj.seek(0)
+    file_obj.name = "events.xlsx"
+    return file_obj
+
+@pytest.mark.django_db
+def test_import_xlsx_idempotent_and_resumable(api_client, user_factory, venue_factory):
+    import hashlib
+    from events.models import Event, EventImport, EventImportStatus
+
+    admin = user_factory(is_superuser=True)
+    venue_factory(name="Test Venue")
+    api_client.force_authenticate(user=admin)
+    url = reverse('events-import-xlsx')
+    rows = [
+        [f"Party {n}", "", "", f"2026-01-0{n + 1} 10:00:00", f"2026-01-0{n + 1} 12:00:00", "Test Venue", "", 5]
+        for n in range(4)
+    ]
+
+    response = api_client.post(url, {"file": _xlsx(rows)}, format='multipart')
+    assert response.status_code == 201
+    response = api_client.post(url, {"file": _xlsx(rows)}, format='multipart')
+    assert response.status_code == 201
+    assert response.data["skipped"] == 4
+    assert Event.objects.count() == 4
+
+    # Импорт другого файла прервался после строки 3 (первые две строки записаны)
+    Event.objects.all().delete()
+    file_obj = _xlsx(rows[:2] + [["Party X"] + rows[2][1:]] + rows[3:])
+    checksum = hashlib.sha256(file_obj.getvalue()).hexdigest()
+    EventImport.objects.create(author=admin, checksum=checksum, last_line=3, created_count=2)
+
+    response = api_client.post(url, {"file": file_obj}, format='multipart')
+    assert response.status_code == 201
+    assert set(Event.objects.values_list("title", flat=True)) == {"Party X", "Party 3"}
+    checkpoint = EventImport.objects.get(checksum=checksum)
+    assert (checkpoint.status, checkpoint.last_line, checkpoint.created_count) == (EventImportStatus.DONE, 5, 4)
+
+@pytest.mark.django_db
+def test_import_xlsx_retries_failed_chunk_row_by_row(api_client, user_factory, venue_factory, mocker):
+    from django.db import DatabaseError
+    from events import xlsx_services
+    from events.models import Event, EventImport, EventImportStatus
+
+    admin = user_factory(is_superuser=True)
+    venue_factory(name="Test Venue")
+    api_client.force_authenticate(user=admin)
+    rows = [
+        [f"Party {n}", "", "", f"2026-01-0{n + 1} 10:00:00", f"2026-01-0{n + 1} 12:00:00", "Test Venue", "", 5]
+        for n in range(3)
+    ]
+    rows.append(["x" * 256] + rows[0][1:])
+
+    write_chunk = xlsx_services._write_chunk
+
+    def fail_on_batches(parsed, user, venue_ids):
+        if len(parsed) > 1:
+            raise DatabaseError("value too long")
+        return write_chunk(parsed, user, venue_ids)
+
+    mocker.patch('events.xlsx_services._write_chunk', side_effect=fail_on_batches)
+    response = api_client.post(reverse('events-import-xlsx'), {"file": _xlsx(rows)}, format='multipart')
+
+    assert response.status_code == 400
+    assert Event.objects.count() == 3
+    assert response.data["errors"] == ["Row 5: Title is longer than 255 characters"]
+    assert EventImport.objects.get().status == EventImportStatus.DONE
+
+@pytest.mark.django_db
+def test_import_reupload_retries_only_failed_rows(api_client, user_factory, venue_factory, mocker):
+    from events.models import Event
+
+    admin = user_factory(is_superuser=True)
+    venue_factory(name="Test Venue")
+    api_client.force_authenticate(user=admin)
+    url = reverse('events-import-xlsx')
+    rows = [
+        [f"Party {n}", "", "", f"2026-01-0{n + 1} 10:00:00", f"2026-01-0{n + 1} 12:00:00", "Test Venue", "", 5]
+        for n in range(3)
+    ]
+    rows.append(["Party New", "", "", "2026-01-05 10:00:00", "2026-01-05 12:00:00", "New Venue", "", 5])
+
+    response = api_client.post(url, {"file": _xlsx(rows)}, format='multipart')
+    assert response.data["errors"] == ["Row 5: Venue 'New Venue' not found and no coords"]
+
+    # Площадку завели вручную — при повторной загрузке проверяется только строка 5
+    venue_factory(name="New Venue")
+    validate = mocker.patch('events.xlsx_services.validate_rows', wraps=parsing.validate_rows)
+    response = api_client.post(url, {"file": _xlsx(rows)}, format='multipart')
+
+    assert response.status_code == 201
+    assert (response.data["created"], response.data["skipped"], response.data["errors"]) == (1, 3, [])
+    assert [i for i, row in validate.call_args.args[0]] == [5]
+    assert Event.objects.count() == 4
+
+@pytest.mark.django_db
+def test_insert_new_events_counts_only_own_inserts(user_factory, venue_factory, event_factory, mocker):
+    from django.db.models import QuerySet
+    from events.models import Event
+    from events.xlsx_services import _insert_new_events
+
+    user = user_factory()
+    venue = venue_factory()
+    event_factory(import_key="taken", venue=venue)
+    events = {
+        key: event_factory.build(import_key=key, venue=venue, author=user)
+        for key in ("taken", "free")
+    }
+
+    # Первая проверка не видит "taken" — как если бы его вставил параллельный импорт
+    values_list = QuerySet.values_list
+    calls = []
+
+    def stale_first(queryset, *fields, **kwargs):
+        calls.append(fields)
+        return [] if len(calls) == 1 else values_list(queryset, *fields, **kwargs)
+
+    mocker.patch.object(QuerySet, 'values_list', autospec=True, side_effect=stale_first)
+    assert _insert_new_events(events) == (1, 1)
+    assert Event.objects.filter(import_key="free").count() == 1
+
+@pytest.mark.django_db
+def test_import_sync_updates_changed_rows_only(api_client, user_factory, venue_factory, event_factory, django_assert_max_num_queries):
+    from datetime import datetime, timezone as dt_timezone
+    from events.models import Event
+
+    admin = user_factory(is_superuser=True)
+    venue = venue_factory(name="Test Venue")
+    start = datetime(2026, 1, 1, 10, tzinfo=dt_timezone.utc)
+    end = datetime(2026, 1, 1, 12, tzinfo=dt_timezone.utc)
+    same = event_factory(external_id="1", title="Same", description="", publish_at=None,
+                         start_at=start, end_at=end, venue=venue, rating=5)
+    changed = event_factory(external_id="2", title="Old title", description="", publish_at=None,
+                            start_at=start, end_at=end, venue=venue, rating=5)
+    same_updated_at = Event.objects.get(pk=same.pk).updated_at
+
+    api_client.force_authenticate(user=admin)
+    file_obj = _xlsx([
+        ["Same", "", "", "2026-01-01 10:00:00", "2026-01-01 12:00:00", "Test Venue", "", 5, 1],
+        ["New title", "", "", "2026-01-01 10:00:00", "2026-01-01 12:00:00", "Test Venue", "", 7, 2],
+        ["Fresh", "", "", "2026-02-01 10:00:00", "2026-02-01 12:00:00", "Test Venue", "", 0, "3"],
+        ["No id", "", "", "2026-02-01 10:00:00", "2026-02-01 12:00:00", "Test Venue", "", 0],
+    ])
+
+    # Число запросов не зависит от числа строк: снимок, площадки, bulk_create, bulk_update
+    with django_assert_max_num_queries(8):
+        response = api_client.post(reverse('events-import-xlsx') + "?mode=sync", {"file": file_obj}, format='multipart')
+
+    assert response.status_code == 400
+    assert response.data["errors"] == ["Row 5: External id is required"]
+    assert (response.data["updated"], response.data["unchanged"]) == (1, 1)
+    assert response.data["message"] == "Created 1 events."
+
+    changed.refresh_from_db()
+    assert (changed.title, changed.rating) == ("New title", 7)
+    assert Event.objects.get(pk=same.pk).updated_at == same_updated_at
+    assert Event.objects.get(external_id="3").status == EventStatus.DRAFT
@@ -96,4 +96,104 @@ def test_venue_delete_forbidden_for_user(api_client, user_factory, venue_factory
     response = api_client.delete(url)
     assert response.status_code == 403
     
-    assert Venue.objects.filter(id=venue.id).exists()
\ No newline at end of file
+    assert Venue.objects.filter(id=venue.id).exists()
+@pytest.mark.django_db
+def test_venue_tiles_clustered_and_invalidated(api_client, venue_factory, event_factory):
+    """
+    Тайл карты группирует площадки и сбрасывается из кэша при изменении площадок.
+    """
+    from events.models import EventStatus
+
+    venues = venue_factory.create_batch(3)
+    event_factory(venue=venues[0], status=EventStatus.PUBLISHED)
+    event_factory(venue=venues[1], status=EventStatus.DRAFT)
+
+    url = reverse('venues-tiles', kwargs={"z": 0, "x": 0, "y": 0})
+
+    response = api_client.get(url, {"output": "json"})
+    assert response.status_code == 200
+    assert len(response.data) == 1
+    assert response.data[0]["venues"] == 3
+    assert response.data[0]["events"] == 1
+
+    venue_factory()
+    response = api_client.get(url, {"output": "json"})
+    assert response.data[0]["venues"] == 4
+
+    response = api_client.get(url)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert response["Cache-Control"].startswith("public,")
+
+    response = api_client.get(reverse('venues-tiles', kwargs={"z": 1, "x": 5, "y": 0}))
+    assert response.status_code == 404
+
+@override_settings(VENUES_PUBLIC_READ_ACCESS=False)
+@pytest.mark.django_db
+def test_venue_tiles_private_without_public_access(api_client, user_factory):
+    api_client.force_authenticate(user=user_factory(is_superuser=True))
+    response = api_client.get(reverse('venues-tiles', kwargs={"z": 0, "x": 0, "y": 0}))
+    assert response.status_code == 200
+    assert response["Cache-Control"].startswith("private,")
+
+@pytest.mark.django_db
+def test_venue_lean_serialization_matches_geos(venue_factory, event_factory):
+    """
+    Координаты из ST_Y/ST_X совпадают с координатами из GEOS-объекта, location не загружается.
+    """
+    from django.contrib.gis.geos import Point
+    from events.models import Event
+    from events.serializers import EventListSerializer
+    from venues.serializers import VenueSerializer
+    from venues.services import with_venue_coordinates
+
+    venue = venue_factory(location=Point(92.8526, 56.0106))
+    event_factory(venue=venue)
+
+    plain = VenueSerializer(Venue.objects.get(pk=venue.pk)).data
+    lean_venue = Venue.objects.with_coordinates().get(pk=venue.pk)
+    assert "location" in lean_venue.get_deferred_fields()
+    assert VenueSerializer(lean_venue).data == plain
+
+    lean_event = with_venue_coordinates(Event.objects.select_related("venue")).get()
+    assert EventListSerializer(lean_event).data["venue"] == plain
+    assert "location" in lean_event.venue.get_deferred_fields()
+
+@pytest.mark.django_db
+def test_venue_weather_history_range_and_resolution(api_client, user_factory, venue_factory):
+    """
+    История погоды фильтруется по from/to и прореживается по часам в БД.
+    """
+    from datetime import datetime, timezone
+    from weather.models import WeatherSnapshot
+
+    api_client.force_authenticate(user=user_factory(is_superuser=True))
+    venue = venue_factory()
+    times = [
+        datetime(2026, 3, 1, 10, 5, tzinfo=timezone.utc),
+        datetime(2026, 3, 1, 10, 45, tzinfo=timezone.utc),
+        datetime(2026, 3, 1, 11, 15, tzinfo=timezone.utc),
+        datetime(2026, 3, 5, 9, 0, tzinfo=timezone.utc),
+    ]
+    for temperature, created_at in enumerate(times):
+        snapshot = WeatherSnapshot.objects.create(
+            venue=venue, temperature_celsius=temperature, humidity_percent=50,
+            pressure_mmhg=750, wind_direction="N", wind_speed_ms=1.0,
+        )
+        # created_at — auto_now_add, проставляем время задним числом
+        WeatherSnapshot.objects.filter(id=snapshot.id).update(created_at=created_at)
+
+    url = reverse('venues-weather', kwargs={"pk": venue.id})
+
+    response = api_client.get(url, {"from": "2026-03-01", "to": "2026-03-01"})
+    assert response.status_code == 200
+    assert response.data["count"] == 3
+
+    response = api_client.get(url, {"from": "2026-03-01", "to": "2026-03-02", "resolution": "hour"})
+    assert response.status_code == 200
+    assert [point["samples"] for point in response.data] == [2, 1]
+    assert response.data[0]["temperature_celsius"] == 0.5
+    assert response.data[0]["temperature_max"] == 1
+
+    response = api_client.get(url, {"resolution": "minute"})
+    assert response.status_code == 400
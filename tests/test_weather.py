@@ -0,0 +1,154 @@
+# tests/test_weather.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from weather.forecast import ForecastTable
+from weather.services import get_forecasts_for_times
+
+
+def test_forecast_table_indexes_by_utc_hour():
+    """
+    Локальное время из ответа API переводится в UTC по utc_offset_seconds,
+    час события находится без перебора списка.
+    """
+    hours = 24
+    table = ForecastTable.from_payload({
+        "utc_offset_seconds": 7 * 3600,
+        "hourly": {
+            "time": [f"2026-03-01T{h:02d}:00" for h in range(hours)],
+            "temperature_2m": list(range(hours)),
+            "relative_humidity_2m": [50] * hours,
+            "pressure_msl": [1000.0] * hours,
+            "wind_speed_10m": [None] * hours,
+            "wind_direction_10m": [90] * hours,
+        },
+    })
+
+    # 03:30 UTC = 10:30 по местному времени площадки
+    forecast = table.get(datetime(2026, 3, 1, 3, 30, tzinfo=timezone.utc))
+    assert forecast["temperature_celsius"] == 10
+    assert forecast["pressure_mmhg"] == 750
+    assert forecast["wind_speed_ms"] == 0.0
+
+    before, first = table.get_many([
+        datetime(2026, 2, 28, 16, 0, tzinfo=timezone.utc),
+        datetime(2026, 2, 28, 17, 0, tzinfo=timezone.utc),
+    ])
+    assert before is None
+    assert first["temperature_celsius"] == 0
+
+
+def test_forecast_table_half_hour_offset():
+    """
+    Смещение +05:30 не округляется до часа: 04:45 UTC — это 10:15 местного времени.
+    """
+    hours = 24
+    table = ForecastTable.from_payload({
+        "utc_offset_seconds": 5 * 3600 + 30 * 60,
+        "hourly": {
+            "time": [f"2026-03-01T{h:02d}:00" for h in range(hours)],
+            "temperature_2m": list(range(hours)),
+        },
+    })
+
+    assert table.get(datetime(2026, 3, 1, 4, 45, tzinfo=timezone.utc))["temperature_celsius"] == 10
+    assert table.get(datetime(2026, 3, 1, 4, 15, tzinfo=timezone.utc))["temperature_celsius"] == 9
+    assert table.get(datetime(2026, 2, 28, 18, 15, tzinfo=timezone.utc)) is None
+
+
+@pytest.mark.django_db
+def test_forecasts_for_many_times_in_one_request(fake_weather):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    moments = [start + timedelta(hours=h) for h in range(0, 48, 6)]
+
+    forecasts = get_forecasts_for_times(55.75, 37.61, moments)
+
+    assert fake_weather.behaviour.requests == 1
+    assert all(forecast is not None for forecast in forecasts)
+    assert len({forecast["temperature_celsius"] for forecast in forecasts}) > 1
+
+
+@pytest.mark.django_db
+def test_forecast_at_horizon_edge(fake_weather, settings):
+    """
+    Запас в день после события не выходит за горизонт прогноза:
+    последний доступный день не превращается в "прогноза нет".
+    """
+    today = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0)
+    last_day = today + timedelta(days=settings.WEATHER_FORECAST_DAYS - 1)
+
+    assert get_forecasts_for_times(55.75, 37.61, [last_day])[0] is not None
+    assert fake_weather.behaviour.requests == 1
+
+    # За горизонтом API не спрашиваем вовсе
+    assert get_forecasts_for_times(55.75, 37.61, [last_day + timedelta(days=2)]) == [None]
+    assert fake_weather.behaviour.requests == 1
+
+
+@pytest.mark.django_db
+def test_throttled_response_is_provider_error(mocker):
+    """
+    408/429 — не "прогноза нет", а ошибка API: считается предохранителем
+    и передаёт Retry-After. Прочие 4xx по-прежнему дают None.
+    """
+    import requests
+    from weather.breaker import ProviderThrottledError
+
+    def respond(status, headers=None):
+        response = requests.Response()
+        response.status_code = status
+        response.headers.update(headers or {})
+        response._content = b"{}"
+        return response
+
+    session = mocker.patch('weather.services.get_session').return_value
+    record_failure = mocker.patch('weather.services.weather_breaker.record_failure')
+    when = datetime.now(timezone.utc) + timedelta(days=1)
+
+    session.get.return_value = respond(429, {"Retry-After": "30"})
+    with pytest.raises(ProviderThrottledError) as exc_info:
+        get_forecasts_for_times(55.75, 37.61, [when])
+    assert exc_info.value.retry_after == 30
+    record_failure.assert_called_once()
+
+    session.get.return_value = respond(400)
+    assert get_forecasts_for_times(55.75, 37.61, [when]) == [None]
+    record_failure.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_single_forecast_requests_one_local_day(fake_weather, mocker):
+    """
+    Для одного события запрашивается только его местная дата (оценка по долготе),
+    а не три дня с запасом.
+    """
+    from weather import services
+
+    fetch = mocker.spy(services, "fetch_forecast_table")
+    # 10:00 UTC в Москве (37.6° в.д.) — 12:30 по солнечному времени, далеко от полуночи
+    moment = (datetime.now(timezone.utc) + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+    assert services.get_forecast_for_time(55.75, 37.61, moment) is not None
+    _, _, start_date, end_date = fetch.call_args.args
+    assert start_date == end_date == moment.date()
+
+
+@pytest.mark.django_db
+def test_snapshot_task_fetches_forecasts_once_per_venue(fake_weather, venue_factory, event_factory):
+    from events.models import Event, EventStatus
+    from weather.tasks import update_weather_snapshots
+
+    venue = venue_factory()
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    events = [
+        event_factory(venue=venue, status=EventStatus.PUBLISHED, start_at=start + timedelta(hours=h), end_at=start + timedelta(hours=h + 2))
+        for h in (0, 5, 30)
+    ]
+    fake_weather.behaviour.requests = 0
+
+    update_weather_snapshots()
+
+    # Текущая погода площадки и один запрос прогноза на все её события
+    assert fake_weather.behaviour.requests == 2
+    assert Event.objects.filter(id__in=[e.id for e in events], weather__isnull=False).count() == 3
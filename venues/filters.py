@@ -0,0 +1,109 @@
+# venues/filters.py
+import django_filters
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.geos import Point, Polygon
+from django.db.models import BooleanField, F, FloatField, Func, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from .models import Venue
+
+GEOGRAPHY_POINT = PointField(geography=True, srid=4326)
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 500
+
+
+class DWithin(Func):
+    function = "ST_DWithin"
+    output_field = BooleanField()
+
+
+class GeogDistance(Func):
+    function = "ST_Distance"
+    output_field = FloatField()
+
+
+def as_geography(expression):
+    """
+    location::geography(POINT,4326) — то же выражение, что и в GiST-индексе Venue,
+    поэтому ST_DWithin по нему использует индекс и считает расстояние в метрах.
+    """
+    return Cast(expression, GEOGRAPHY_POINT)
+
+
+def geography_point(lat, lon):
+    point = Point(lon, lat, srid=4326)
+    return Func(Value(point.ewkt), function="ST_GeogFromText", output_field=GEOGRAPHY_POINT)
+
+
+def parse_near(value):
+    try:
+        lat, lon = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValidationError({"near": "Ожидается 'lat,lon', например near=55.75,37.61."})
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValidationError({"near": "Координаты вне допустимого диапазона."})
+    return lat, lon
+
+
+def parse_bbox(value):
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(","))
+    except ValueError:
+        raise ValidationError({"bbox": "Ожидается 'min_lon,min_lat,max_lon,max_lat'."})
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise ValidationError({"bbox": "Минимальные значения должны быть меньше максимальных."})
+    polygon = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+    polygon.srid = 4326
+    return polygon
+
+
+class SpatialFilterSet(django_filters.FilterSet):
+    """
+    Базовый FilterSet с гео-фильтрами по точке площадки:
+    ?near=lat,lon&radius_km=5 — в радиусе (ST_DWithin по geography, в метрах);
+    ?bbox=min_lon,min_lat,max_lon,max_lat — в прямоугольнике карты.
+    При near в выдачу добавляется distance (метры), по нему можно сортировать: ?ordering=distance.
+    """
+
+    location_field = "location"
+
+    near = django_filters.CharFilter(method="filter_passthrough", label="Точка 'lat,lon'")
+    radius_km = django_filters.NumberFilter(method="filter_passthrough", label="Радиус, км")
+    bbox = django_filters.CharFilter(method="filter_bbox", label="Прямоугольник 'min_lon,min_lat,max_lon,max_lat'")
+
+    def filter_passthrough(self, queryset, name, value):
+        # near и radius_km применяются вместе в filter_queryset
+        return queryset
+
+    def filter_bbox(self, queryset, name, value):
+        polygon = parse_bbox(value)
+        return queryset.filter(**{f"{self.location_field}__coveredby": polygon})
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        near = self.form.cleaned_data.get("near")
+        if not near:
+            # distance только вместе с near: ?ordering=distance без него
+            # пропускает core.filters.OrderingFilter
+            return queryset
+
+        lat, lon = parse_near(near)
+        radius_km = self.form.cleaned_data.get("radius_km") or DEFAULT_RADIUS_KM
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValidationError({"radius_km": f"Радиус должен быть в пределах (0, {MAX_RADIUS_KM}] км."})
+
+        location = as_geography(F(self.location_field))
+        point = geography_point(lat, lon)
+
+        return queryset.filter(
+            DWithin(location, point, Value(float(radius_km) * 1000))
+        ).annotate(distance=GeogDistance(location, point))
+
+
+class VenueFilter(SpatialFilterSet):
+    class Meta:
+        model = Venue
+        fields = []
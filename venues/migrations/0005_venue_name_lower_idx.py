@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('venues', '0004_venue_location_geog_gist'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='venue',
+            index=models.Index(django.db.models.functions.text.Lower('name'), name='venue_name_lower_idx'),
+        ),
+    ]
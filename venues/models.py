@@ -1,14 +1,50 @@
 # venues/models.py
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import GistIndex
+from django.db.models.functions import Cast, Lower
+
+
+class Latitude(models.Func):
+    function = "ST_Y"
+    output_field = models.FloatField()
+
+
+class Longitude(models.Func):
+    function = "ST_X"
+    output_field = models.FloatField()
+
+
+class VenueQuerySet(models.QuerySet):
+    def with_coordinates(self):
+        """
+        Широта/долгота считаются в SQL (ST_Y/ST_X) и приходят обычными float,
+        а сам location не загружается — без разбора EWKB и создания GEOS-объектов.
+        """
+        return self.defer("location").annotate(
+            latitude=Latitude("location"),
+            longitude=Longitude("location"),
+        )
+
 
 class Venue(models.Model):
     name = models.CharField(max_length=255, unique=True)
     location = models.PointField(srid=4326)
 
+    objects = VenueQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Площадка"
         verbose_name_plural = "Площадки"
         ordering = ["name"]
+        indexes = [
+            # Для ST_DWithin по geography (поиск "рядом со мной" в метрах)
+            GistIndex(
+                Cast("location", output_field=models.PointField(geography=True, srid=4326)),
+                name="venue_location_geog_gist",
+            ),
+            # Поиск площадки по имени без учёта регистра (импорт, VenueResolver)
+            models.Index(Lower("name"), name="venue_name_lower_idx"),
+        ]
 
     def __str__(self):
         return self.name
\ No newline at end of file
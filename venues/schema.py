@@ -0,0 +1,28 @@
+# venues/schema.py
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+
+# Общие параметры гео-фильтров (venues.filters.SpatialFilterSet) для списков площадок и мероприятий
+SPATIAL_FILTER_PARAMETERS = [
+    OpenApiParameter(
+        name="near",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="Точка 'lat,lon': только объекты в радиусе radius_km от неё. Пример: near=55.75,37.61",
+    ),
+    OpenApiParameter(
+        name="radius_km",
+        type=OpenApiTypes.NUMBER,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="Радиус поиска для near, км (по умолчанию 10, максимум 500).",
+    ),
+    OpenApiParameter(
+        name="bbox",
+        type=OpenApiTypes.STR,
+        location=OpenApiParameter.QUERY,
+        required=False,
+        description="Видимая область карты 'min_lon,min_lat,max_lon,max_lat'.",
+    ),
+]
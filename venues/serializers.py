@@ -24,8 +24,31 @@ class VenueSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'location']
         extra_kwargs = {'location': {'required': True}}
 
+    def get_attribute(self, instance):
+        """
+        Во вложенном виде (EventListSerializer.venue) координаты могут быть
+        аннотированы на родителе как venue_latitude/venue_longitude
+        (см. venues.services.with_venue_coordinates) — переносим их на площадку.
+        """
+        venue = super().get_attribute(instance)
+        latitude = getattr(instance, f"{self.source}_latitude", None)
+        if venue is not None and latitude is not None:
+            venue.latitude = latitude
+            venue.longitude = getattr(instance, f"{self.source}_longitude")
+        return venue
+
     def to_representation(self, instance):
         ret = super().to_representation(instance)
+
+        # Быстрый путь: готовые float из ST_Y/ST_X, без GEOS
+        latitude = getattr(instance, "latitude", None)
+        if latitude is not None:
+            ret['location'] = {
+                "latitude": latitude,
+                "longitude": instance.longitude,
+            }
+            return ret
+
         if instance.location:
             ret['location'] = {
                 "latitude": instance.location.y,
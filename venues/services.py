@@ -1,12 +1,41 @@
 # venues/services.py
+import threading
+import time
+from collections import OrderedDict
+
 from django.contrib.gis.geos import Point
+from django.db.models.functions import Lower
+
+from .models import Latitude, Longitude, Venue
+
+
+def with_venue_coordinates(queryset, relation="venue"):
+    """
+    То же, что Venue.objects.with_coordinates(), но для связанной площадки:
+    в queryset добавляются {relation}_latitude/{relation}_longitude,
+    а {relation}__location не загружается.
+    VenueSerializer, вложенный под именем relation, подхватит их сам.
+    """
+    return queryset.defer(f"{relation}__location").annotate(**{
+        f"{relation}_latitude": Latitude(f"{relation}__location"),
+        f"{relation}_longitude": Longitude(f"{relation}__location"),
+    })
 
 def get_venue_coordinates(venue):
     """
     Извлекает (lat, lon) из объекта Venue, обрабатывая разные форматы location.
     Возвращает кортеж (lat, lon) или (None, None).
     """
-    if not venue or not venue.location:
+    if not venue:
+        return None, None
+
+    # Быстрый путь: координаты уже посчитаны в SQL (Venue.objects.with_coordinates())
+    lat = getattr(venue, "latitude", None)
+    lon = getattr(venue, "longitude", None)
+    if lat is not None and lon is not None:
+        return lat, lon
+
+    if not venue.location:
         return None, None
 
     loc = venue.location
@@ -37,3 +66,94 @@ def get_venue_coordinates(venue):
             return None, None
 
     return lat, lon
+
+
+def normalize_venue_name(name):
+    """
+    Ключ для поиска площадки по имени без учёта регистра.
+    Совпадает с выражением индекса venue_name_lower_idx (lower(name)).
+    """
+    return str(name).strip().lower()
+
+
+class VenueResolver:
+    """
+    Кэш "имя площадки -> id" в памяти процесса (LRU).
+    В своём процессе записи обновляются сигналами post_save/post_delete Venue,
+    изменения из других процессов подхватываются по истечении ttl.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_name = OrderedDict()
+        self._by_id = {}
+
+    def resolve(self, name):
+        return self.resolve_many([name]).get(name)
+
+    def resolve_many(self, names):
+        """
+        Возвращает {исходное имя: venue_id} для найденных площадок.
+        Всё, чего нет в кэше, достаётся одним запросом по lower(name).
+        """
+        keys = {name: normalize_venue_name(name) for name in names if name}
+        found = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for key in set(keys.values()):
+                entry = self._by_name.get(key)
+                if entry is not None and entry[1] > now:
+                    self._by_name.move_to_end(key)
+                    found[key] = entry[0]
+
+        missing = set(keys.values()) - found.keys()
+        if missing:
+            rows = (
+                Venue.objects.annotate(name_lower=Lower("name"))
+                .filter(name_lower__in=missing)
+                .order_by("id")
+                .values_list("name_lower", "id")
+            )
+            fetched = {}
+            for key, venue_id in rows:
+                # Имена уникальны с учётом регистра: при коллизии берём самую старую площадку
+                fetched.setdefault(key, venue_id)
+            found.update(fetched)
+
+            with self._lock:
+                for key, venue_id in fetched.items():
+                    self._store(key, venue_id, now)
+
+        return {name: found[key] for name, key in keys.items() if key in found}
+
+    def remember(self, name, venue_id):
+        with self._lock:
+            self._store(normalize_venue_name(name), venue_id, time.monotonic())
+
+    def forget(self, venue_id):
+        with self._lock:
+            for key in self._by_id.pop(venue_id, ()):
+                self._by_name.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._by_name.clear()
+            self._by_id.clear()
+
+    def _store(self, key, venue_id, now):
+        old = self._by_name.pop(key, None)
+        if old is not None:
+            self._by_id.get(old[0], set()).discard(key)
+
+        self._by_name[key] = (venue_id, now + self.ttl)
+        self._by_id.setdefault(venue_id, set()).add(key)
+
+        while len(self._by_name) > self.maxsize:
+            evicted_key, (evicted_id, _) = self._by_name.popitem(last=False)
+            self._by_id.get(evicted_id, set()).discard(evicted_key)
+
+
+venue_resolver = VenueResolver()
@@ -0,0 +1,28 @@
+# venues/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import Venue
+from .services import venue_resolver
+from .tiles import invalidate_tiles
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def reset_tiles_cache(sender, **kwargs):
+    """
+    Площадку добавили, переместили или удалили — закэшированные тайлы устарели.
+    """
+    invalidate_tiles()
+
+
+@receiver(post_save, sender=Venue)
+def update_venue_resolver_on_save(sender, instance, **kwargs):
+    # Имя могло поменяться: убираем все старые ключи этой площадки,
+    # новый запоминаем только после коммита, чтобы не закэшировать откатившийся id
+    venue_resolver.forget(instance.pk)
+    transaction.on_commit(lambda: venue_resolver.remember(instance.name, instance.pk))
+
+@receiver(post_delete, sender=Venue)
+def update_venue_resolver_on_delete(sender, instance, **kwargs):
+    venue_resolver.forget(instance.pk)
@@ -0,0 +1,136 @@
+# venues/tiles.py
+from django.core.cache import cache
+from django.db import connection
+
+from events.models import Event, EventStatus
+from .models import Venue
+
+# Ширина мира в EPSG:3857, метры
+WORLD_WIDTH_M = 40075016.68557849
+# На сколько ячеек по стороне режем тайл при кластеризации
+CLUSTER_GRID = 64
+MAX_ZOOM = 22
+
+TILE_CACHE_TIMEOUT = 60 * 5
+TILE_VERSION_KEY = "venues:tiles:version"
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+CLUSTERS_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom
+),
+points AS (
+    SELECT
+        v.id,
+        v.name,
+        ST_Transform(v.location, 3857) AS geom,
+        count(e.id) AS events
+    FROM {venue_table} v
+    CROSS JOIN bounds b
+    LEFT JOIN {event_table} e ON e.venue_id = v.id AND e.status = %(published)s
+    WHERE v.location && ST_Transform(b.geom, 4326)
+    GROUP BY v.id
+),
+clusters AS (
+    SELECT
+        ST_Centroid(ST_Collect(geom)) AS geom,
+        count(*)::integer AS venues,
+        sum(events)::integer AS events,
+        CASE WHEN count(*) = 1 THEN min(id) END AS venue_id,
+        CASE WHEN count(*) = 1 THEN min(name) END AS name
+    FROM points
+    GROUP BY ST_SnapToGrid(geom, %(cell)s)
+)
+"""
+
+MVT_SQL = CLUSTERS_SQL + """
+SELECT ST_AsMVT(tile, 'venues', 4096, 'geom')
+FROM (
+    SELECT ST_AsMVTGeom(c.geom, b.geom) AS geom, c.venues, c.events, c.venue_id, c.name
+    FROM clusters c, bounds b
+) AS tile
+"""
+
+JSON_SQL = CLUSTERS_SQL + """
+SELECT
+    ST_Y(ST_Transform(geom, 4326)) AS latitude,
+    ST_X(ST_Transform(geom, 4326)) AS longitude,
+    venues,
+    events,
+    venue_id,
+    name
+FROM clusters
+ORDER BY venues DESC
+"""
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _params(z, x, y):
+    return {
+        "z": z,
+        "x": x,
+        "y": y,
+        "cell": WORLD_WIDTH_M / 2 ** z / CLUSTER_GRID,
+        "published": EventStatus.PUBLISHED,
+    }
+
+
+def _sql(template):
+    return template.format(
+        event_table=connection.ops.quote_name(Event._meta.db_table),
+        venue_table=connection.ops.quote_name(Venue._meta.db_table),
+    )
+
+
+def build_mvt_tile(z, x, y):
+    """
+    Mapbox Vector Tile со слоем venues: точки площадок, сгруппированные
+    по сетке ST_SnapToGrid, с количеством площадок и опубликованных событий.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(MVT_SQL), _params(z, x, y))
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b""
+
+
+def build_json_tile(z, x, y):
+    """
+    Те же кластеры, что и в MVT, но списком словарей.
+    Для одиночной площадки заполнены venue_id и name.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_sql(JSON_SQL), _params(z, x, y))
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def get_tiles_version():
+    return cache.get_or_set(TILE_VERSION_KEY, 1, timeout=None)
+
+
+def invalidate_tiles():
+    """
+    Сбрасывает все закэшированные тайлы разом: меняем версию в ключе,
+    старые записи просто истекут по таймауту.
+    """
+    try:
+        cache.incr(TILE_VERSION_KEY)
+    except ValueError:
+        cache.set(TILE_VERSION_KEY, 2, timeout=None)
+
+
+def get_tile(z, x, y, output="mvt"):
+    """
+    Тайл из кэша или из БД. Кэш сбрасывается при изменении площадок;
+    количество событий в тайле может отставать не больше чем на TILE_CACHE_TIMEOUT.
+    """
+    key = f"venues:tiles:{get_tiles_version()}:{output}:{z}:{x}:{y}"
+    tile = cache.get(key)
+    if tile is None:
+        tile = build_json_tile(z, x, y) if output == "json" else build_mvt_tile(z, x, y)
+        cache.set(key, tile, timeout=TILE_CACHE_TIMEOUT)
+    return tile
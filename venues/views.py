@@ -2,22 +2,33 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework import status
+from django.http import HttpResponse
+from django.conf import settings
 
-from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiResponse, OpenApiExample
+from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiResponse, OpenApiExample, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
 
 from core.permissions import IsSuperUserOrPublicReadIfAllowed
+from .filters import VenueFilter
 from .models import Venue
+from .schema import SPATIAL_FILTER_PARAMETERS
 from .serializers import VenueSerializer
+from .tiles import MVT_CONTENT_TYPE, TILE_CACHE_TIMEOUT, get_tile, is_valid_tile
 
-from weather.serializers import WeatherSnapshotSerializer
-from weather.models import WeatherSnapshot
+from weather.history import RESOLUTIONS, get_history_series, get_snapshots, parse_history_params
+from weather.serializers import WeatherHistoryPointSerializer, WeatherSnapshotSerializer
 
 @extend_schema_view(
     list=extend_schema(
         tags=["Площадки"],
         summary="Список площадок",
-        description="Возвращает список площадок (мест проведения).",
+        description=(
+            "Возвращает список площадок (мест проведения).\n\n"
+            "Поддерживаются гео-фильтры near/radius_km и bbox, сортировка ordering=name|distance."
+        ),
+        parameters=SPATIAL_FILTER_PARAMETERS,
         responses={
             200: OpenApiResponse(response=VenueSerializer(many=True), description="Список площадок."),
             403: OpenApiResponse(description="Только для superuser (если публичный доступ отключен)."),
@@ -109,25 +120,72 @@ class VenueViewSet(ModelViewSet):
     queryset = Venue.objects.all()
     serializer_class = VenueSerializer
     permission_classes = [IsSuperUserOrPublicReadIfAllowed]
+    filterset_class = VenueFilter
+    ordering_fields = ["name", "distance"]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        # При записи нужен настоящий location, при чтении хватает float из SQL
+        if self.request.method in SAFE_METHODS:
+            qs = qs.with_coordinates()
+        return qs
 
     @extend_schema(
         tags=["Площадки / Погода"],
         summary="История погоды на площадке",
-        description="Возвращает список всех сохраненных снимков погоды для данной площадки.",
+        description=(
+            "Возвращает снимки погоды для данной площадки, свежие сверху (с пагинацией).\n\n"
+            "from/to ограничивают период. С resolution=hour|day вместо снимков возвращается "
+            "прореженный ряд без пагинации: средние значения за час/день по возрастанию времени "
+            "(по умолчанию — последние 30 дней)."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="from",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Начало периода (ISO 8601, включительно).",
+            ),
+            OpenApiParameter(
+                name="to",
+                type=OpenApiTypes.DATETIME,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description="Конец периода (ISO 8601, не включительно; дата — до конца дня).",
+            ),
+            OpenApiParameter(
+                name="resolution",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=list(RESOLUTIONS),
+                description="Шаг агрегации: hour или day.",
+            ),
+        ],
         responses={
-            200: WeatherSnapshotSerializer(many=True),
+            200: OpenApiResponse(
+                response=WeatherSnapshotSerializer(many=True),
+                description="Снимки погоды или, с resolution, список WeatherHistoryPoint.",
+            ),
+            400: OpenApiResponse(description="Некорректные from/to/resolution."),
             404: OpenApiResponse(description="Площадка не найдена"),
         }
     )
     @action(detail=True, methods=['get'])
     def weather(self, request, pk=None):
         """
-        GET /api/venues/{id}/weather/
-        Возвращает список снимков погоды для конкретной площадки.
+        GET /api/venues/{id}/weather/?from=&to=&resolution=
+        Возвращает снимки погоды (или прореженный ряд) для конкретной площадки.
         """
         venue = self.get_object()
-        
-        snapshots = WeatherSnapshot.objects.filter(venue=venue).order_by('-created_at')
+        start, end, resolution = parse_history_params(request.query_params)
+
+        if resolution:
+            series = get_history_series(venue.id, start, end, resolution)
+            return Response(WeatherHistoryPointSerializer(series, many=True).data)
+
+        snapshots = get_snapshots(venue.id, start, end).select_related("venue")
         
         page = self.paginate_queryset(snapshots)
         if page is not None:
@@ -135,4 +193,52 @@ class VenueViewSet(ModelViewSet):
             return self.get_paginated_response(serializer.data)
 
         serializer = WeatherSnapshotSerializer(snapshots, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+    @extend_schema(
+        tags=["Площадки / Карта"],
+        summary="Тайл карты площадок",
+        description=(
+            "Возвращает тайл z/x/y (схема XYZ, EPSG:3857) с площадками, сгруппированными по сетке. "
+            "У каждого кластера есть venues (число площадок) и events (опубликованные мероприятия), "
+            "у одиночной площадки — venue_id и name.\n\n"
+            "По умолчанию ответ — Mapbox Vector Tile (слой venues), с output=json — список кластеров."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="output",
+                type=OpenApiTypes.STR,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                enum=["mvt", "json"],
+                description="Формат ответа: mvt (по умолчанию) или json.",
+            ),
+        ],
+        responses={
+            200: OpenApiResponse(description="application/vnd.mapbox-vector-tile или JSON-список кластеров."),
+            404: OpenApiResponse(description="Тайл вне допустимого диапазона."),
+        }
+    )
+    @action(detail=False, methods=['get'], url_path=r'tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)')
+    def tiles(self, request, z=None, x=None, y=None):
+        """
+        GET /api/venues/tiles/{z}/{x}/{y}/
+        """
+        z, x, y = int(z), int(x), int(y)
+        if not is_valid_tile(z, x, y):
+            return Response({"detail": "Тайл вне допустимого диапазона."}, status=status.HTTP_404_NOT_FOUND)
+
+        output = request.query_params.get("output", "mvt")
+        if output not in ("mvt", "json"):
+            return Response({"output": "Допустимые значения: mvt, json."}, status=status.HTTP_400_BAD_REQUEST)
+
+        tile = get_tile(z, x, y, output)
+
+        if output == "json":
+            response = Response(tile)
+        else:
+            response = HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
+        # Закрытые тайлы (только для персонала) общим прокси кэшировать нельзя
+        visibility = "public" if getattr(settings, "VENUES_PUBLIC_READ_ACCESS", False) else "private"
+        response["Cache-Control"] = f"{visibility}, max-age={TILE_CACHE_TIMEOUT}"
+        return response
@@ -0,0 +1,130 @@
+# weather/breaker.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class WeatherProviderError(Exception):
+    """Погодный API не ответил или ответил ошибкой."""
+
+
+class ProviderThrottledError(WeatherProviderError):
+    """API ответил 408/429: данные есть, но повторить нужно позже (retry_after секунд или None)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(WeatherProviderError):
+    """Запрос не отправлялся: предохранитель разомкнут."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Weather provider circuit is open, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Предохранитель для внешнего API. Состояние хранится в общем кэше (Redis),
+    поэтому одно на все процессы: веб и воркеры Celery.
+
+    closed — запросы идут, ошибки считаются в окне failure_window;
+    open — после failure_threshold ошибок за окно запросы не отправляются recovery_timeout секунд;
+    half-open — после паузы пропускается один пробный запрос: успех замыкает цепь, ошибка снова размыкает.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def failure_threshold(self):
+        return settings.WEATHER_BREAKER_FAILURE_THRESHOLD
+
+    @property
+    def recovery_timeout(self):
+        return settings.WEATHER_BREAKER_RECOVERY_SECONDS
+
+    @property
+    def failure_window(self):
+        return settings.WEATHER_BREAKER_FAILURE_WINDOW
+
+    def _key(self, suffix):
+        return f"breaker:{self.name}:{suffix}"
+
+    def _opened_until(self):
+        return cache.get(self._key("opened_until"))
+
+    def state(self):
+        opened_until = self._opened_until()
+        if opened_until is None:
+            return self.CLOSED
+        if time.time() < opened_until:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def retry_after(self):
+        opened_until = self._opened_until()
+        if opened_until is None:
+            return 0
+        return max(int(opened_until - time.time()) + 1, 1)
+
+    def before_request(self):
+        """
+        Вызывается перед запросом. Бросает CircuitOpenError, если запрос отправлять нельзя.
+        """
+        state = self.state()
+        if state == self.CLOSED:
+            return
+        # В half-open пробный запрос делает только тот, кто первым занял ключ
+        if state == self.HALF_OPEN and cache.add(self._key("probe"), True, timeout=self.recovery_timeout):
+            return
+        raise CircuitOpenError(self.retry_after())
+
+    def record_success(self):
+        if self._opened_until() is not None or cache.get(self._key("failures")):
+            cache.delete_many([self._key("failures"), self._key("opened_until"), self._key("probe")])
+
+    def record_failure(self):
+        if self.state() != self.CLOSED:
+            # Пробный запрос не прошёл — снова размыкаем на полный интервал
+            self._open()
+            return
+
+        key = self._key("failures")
+        if cache.add(key, 1, timeout=self.failure_window):
+            failures = 1
+        else:
+            try:
+                failures = cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=self.failure_window)
+                failures = 1
+
+        if failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self):
+        cache.set(self._key("opened_until"), time.time() + self.recovery_timeout, timeout=None)
+        cache.delete_many([self._key("failures"), self._key("probe")])
+
+    def reset(self):
+        cache.delete_many([self._key("failures"), self._key("opened_until"), self._key("probe")])
+
+    def status(self):
+        state = self.state()
+        return {
+            "name": self.name,
+            "state": state,
+            "failures": cache.get(self._key("failures"), 0),
+            "failure_threshold": self.failure_threshold,
+            "retry_after": self.retry_after() if state == self.OPEN else 0,
+        }
+
+
+weather_breaker = CircuitBreaker("open-meteo")
@@ -0,0 +1,201 @@
+# weather/fake_provider.py
+"""
+Заглушка Open-Meteo для нагрузочных тестов и локальной разработки.
+
+Отвечает детерминированными данными (одинаковые координаты и час — одинаковая погода)
+с настраиваемой задержкой и долей ошибок. Два способа подключения:
+- FakeOpenMeteoAdapter — транспорт requests внутри процесса, без сети (бенчмарки, тесты);
+- make_server() — настоящий HTTP-сервер (команда fake_weather_server) для воркеров Celery.
+"""
+import json
+import math
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+
+# Тот же список, что разбирает ForecastTable: заглушка и парсер не разойдутся
+from .forecast import HOURLY_FIELDS
+
+
+def _weather_at(lat, lon, moment):
+    """
+    Значения погоды для точки и часа: плавные суточные колебания,
+    сдвинутые в зависимости от координат.
+    """
+    hours = moment.timestamp() / 3600
+    phase = (lat * 7 + lon * 13) % 24
+    daily = math.sin((hours + phase) / 24 * 2 * math.pi)
+    return {
+        "temperature_2m": round(12 - abs(lat) / 6 + 8 * daily, 1),
+        "relative_humidity_2m": int(60 - 25 * daily),
+        "surface_pressure": round(1000 + 10 * math.cos(hours / 37 + lon), 1),
+        "pressure_msl": round(1013 + 10 * math.cos(hours / 37 + lon), 1),
+        "wind_speed_10m": round(3 + 2 * abs(math.sin(hours / 11 + lat)), 1),
+        "wind_direction_10m": int((hours * 15 + lon * 10) % 360),
+    }
+
+
+def build_payload(params, now=None):
+    """
+    Ответ в формате Open-Meteo /v1/forecast для current=... или hourly=... (+ start_date/end_date).
+    Возвращает (status, payload).
+    """
+    try:
+        lat = float(params["latitude"])
+        lon = float(params["longitude"])
+    except (KeyError, ValueError):
+        return 400, {"error": True, "reason": "latitude and longitude are required"}
+
+    # Как timezone=auto у настоящего API: время в ответе местное.
+    # Зона — целые часы по долготе, этого хватает, чтобы проверять перевод в UTC
+    offset = timedelta(hours=round(lon / 15))
+    payload = {
+        "latitude": lat,
+        "longitude": lon,
+        "utc_offset_seconds": int(offset.total_seconds()),
+        "timezone": f"UTC{round(lon / 15):+d}",
+    }
+    now = now or datetime.now(timezone.utc)
+
+    if "current" in params:
+        moment = now.replace(minute=0, second=0, microsecond=0)
+        values = _weather_at(lat, lon, moment)
+        payload["current"] = {"time": (moment + offset).strftime("%Y-%m-%dT%H:%M")}
+        payload["current"].update({field: values[field] for field in params["current"].split(",") if field in values})
+
+    if "hourly" in params:
+        try:
+            start = date.fromisoformat(params.get("start_date", now.date().isoformat()))
+            end = date.fromisoformat(params.get("end_date", start.isoformat()))
+        except ValueError:
+            return 400, {"error": True, "reason": "Invalid date"}
+        # Как у настоящего API: прогноз только на 16 дней, считая сегодня
+        if end > now.date() + timedelta(days=15):
+            return 400, {"error": True, "reason": "Parameter 'end_date' is out of allowed range"}
+
+        fields = [field for field in params["hourly"].split(",") if field in HOURLY_FIELDS]
+        hourly = {"time": []}
+        hourly.update({field: [] for field in fields})
+
+        local = datetime.combine(start, datetime.min.time(), tzinfo=timezone.utc)
+        while local.date() <= end:
+            values = _weather_at(lat, lon, local - offset)
+            hourly["time"].append(local.strftime("%Y-%m-%dT%H:%M"))
+            for field in fields:
+                hourly[field].append(values[field])
+            local += timedelta(hours=1)
+        payload["hourly"] = hourly
+
+    return 200, payload
+
+
+class FakeBehaviour:
+    """
+    Задержка и доля ошибок (503), общие для адаптера и сервера.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def respond(self, params):
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate and self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            return 503, {"error": True, "reason": "Service temporarily unavailable (fake)"}
+        return build_payload(params)
+
+
+class FakeOpenMeteoAdapter(BaseAdapter):
+    """
+    Транспорт requests, отвечающий вместо Open-Meteo прямо в процессе:
+
+        adapter = install_fake_provider(latency=0.05, error_rate=0.1)
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, seed=None):
+        super().__init__()
+        self.behaviour = FakeBehaviour(latency, error_rate, seed)
+
+    def send(self, request, **kwargs):
+        query = parse_qs(urlsplit(request.url).query)
+        status, payload = self.behaviour.respond({key: values[-1] for key, values in query.items()})
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = json.dumps(payload).encode()
+        response.headers["Content-Type"] = "application/json"
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def install_fake_provider(latency=0.0, error_rate=0.0, seed=None):
+    """
+    Подменяет транспорт общей сессии weather.services для адреса WEATHER_API_URL.
+    Возвращает адаптер (в behaviour — счётчики запросов и ошибок).
+    """
+    from django.conf import settings
+
+    from .services import get_session
+
+    adapter = FakeOpenMeteoAdapter(latency, error_rate, seed)
+    get_session().mount(settings.WEATHER_API_URL, adapter)
+    return adapter
+
+
+def uninstall_fake_provider():
+    from django.conf import settings
+
+    from .services import get_session
+
+    session = get_session()
+    session.adapters.pop(settings.WEATHER_API_URL, None)
+
+
+class FakeOpenMeteoHandler(BaseHTTPRequestHandler):
+    behaviour = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path != "/v1/forecast":
+            status, payload = 404, {"error": True, "reason": "Not found"}
+        else:
+            query = parse_qs(url.query)
+            status, payload = self.behaviour.respond({key: values[-1] for key, values in query.items()})
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Под нагрузкой лог каждого запроса только мешает
+        pass
+
+
+def make_server(host="127.0.0.1", port=8765, latency=0.0, error_rate=0.0, seed=None):
+    handler = type("Handler", (FakeOpenMeteoHandler,), {"behaviour": FakeBehaviour(latency, error_rate, seed)})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,103 @@
+# weather/forecast.py
+import math
+from array import array
+from datetime import datetime, timedelta, timezone
+
+HOURLY_FIELDS = (
+    "temperature_2m",
+    "relative_humidity_2m",
+    "pressure_msl",
+    "wind_speed_10m",
+    "wind_direction_10m",
+)
+
+
+def epoch_hour(moment):
+    """
+    Номер часа от начала эпохи (UTC). Aware datetime — любая таймзона.
+    """
+    return math.floor(moment.timestamp() / 3600)
+
+
+class ForecastTable:
+    """
+    Почасовой прогноз Open-Meteo, разобранный один раз в компактные буферы array('d').
+    Строки индексируются номером местного часа площадки от эпохи, поэтому любой момент
+    находится за O(1): index = epoch_hour(moment + смещение) - first_hour.
+    Смещение хранится в секундах: у зон вроде +05:30 часы API сдвинуты на полчаса от UTC.
+    Пропуски (null в API) хранятся как NaN.
+    """
+
+    def __init__(self, first_hour, columns, positions=None, utc_offset=timedelta(0)):
+        self.first_hour = first_hour
+        self.utc_offset = utc_offset
+        self.columns = columns
+        # Если часы в ответе идут с разрывами, индекс строится явно
+        self.positions = positions
+        self.size = len(next(iter(columns.values()), ()))
+
+    @classmethod
+    def from_payload(cls, data):
+        """
+        data — JSON ответа /v1/forecast с hourly=... Время в hourly.time локальное
+        для площадки (timezone=auto); запрошенные моменты переводим в него
+        через utc_offset_seconds (см. index_of).
+        """
+        hourly = data.get("hourly") or {}
+        times = hourly.get("time") or []
+        utc_offset = timedelta(seconds=data.get("utc_offset_seconds") or 0)
+
+        hours = [epoch_hour(datetime.fromisoformat(t).replace(tzinfo=timezone.utc)) for t in times]
+
+        columns = {}
+        for field in HOURLY_FIELDS:
+            values = hourly.get(field) or []
+            columns[field] = array("d", (
+                math.nan if i >= len(values) or values[i] is None else float(values[i])
+                for i in range(len(times))
+            ))
+
+        positions = None
+        if hours and hours[-1] - hours[0] != len(hours) - 1:
+            positions = {hour: i for i, hour in enumerate(hours)}
+
+        return cls(hours[0] if hours else 0, columns, positions, utc_offset)
+
+    def index_of(self, moment):
+        # Местное время площадки, записанное как UTC, — так же, как ключи строк
+        hour = epoch_hour(moment + self.utc_offset)
+        if self.positions is not None:
+            return self.positions.get(hour)
+        index = hour - self.first_hour
+        return index if 0 <= index < self.size else None
+
+    def row(self, index):
+        """
+        Значения строки в формате полей WeatherSnapshot (как раньше возвращал get_forecast_for_time).
+        None, если в API нет ключевых значений для этого часа.
+        """
+        temperature = self.columns["temperature_2m"][index]
+        if math.isnan(temperature):
+            return None
+
+        def value(field, default=0.0):
+            v = self.columns[field][index]
+            return default if math.isnan(v) else v
+
+        return {
+            "temperature_celsius": temperature,
+            "humidity_percent": int(value("relative_humidity_2m")),
+            "pressure_mmhg": int(value("pressure_msl", 1013.0) * 0.75006),
+            "wind_speed_ms": value("wind_speed_10m"),
+            "wind_direction": int(value("wind_direction_10m")),
+        }
+
+    def get(self, moment):
+        index = self.index_of(moment)
+        return None if index is None else self.row(index)
+
+    def get_many(self, moments):
+        """
+        Прогнозы для списка моментов за один проход по уже разобранным буферам.
+        """
+        return [self.get(moment) for moment in moments]
@@ -0,0 +1,98 @@
+# weather/history.py
+from datetime import datetime, time, timedelta
+
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import WeatherSnapshot
+
+RESOLUTIONS = {
+    "hour": TruncHour,
+    "day": TruncDay,
+}
+
+DEFAULT_RANGE = timedelta(days=30)
+# Ограничиваем число точек в ответе: ~2200 часов или ~3 года по дням
+MAX_RANGE = {
+    "hour": timedelta(days=93),
+    "day": timedelta(days=366 * 3),
+}
+
+
+def parse_bound(value, name, end=False):
+    """
+    Принимает ISO datetime или дату. Дата в to означает "до конца дня".
+    """
+    dt = parse_datetime(value)
+    if dt is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: "Ожидается дата или datetime в формате ISO 8601."})
+        dt = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    if timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
+
+
+def parse_history_params(params):
+    """
+    Разбирает ?from=&to=&resolution= и возвращает (start, end, resolution).
+    Без resolution границы необязательны; с resolution по умолчанию берутся последние 30 дней.
+    """
+    resolution = params.get("resolution")
+    if resolution is not None and resolution not in RESOLUTIONS:
+        raise ValidationError({"resolution": "Допустимые значения: hour, day."})
+
+    start = parse_bound(params["from"], "from") if params.get("from") else None
+    end = parse_bound(params["to"], "to", end=True) if params.get("to") else None
+
+    if start and end and start >= end:
+        raise ValidationError({"from": "from должен быть раньше to."})
+
+    if resolution:
+        end = end or timezone.now()
+        start = start or end - DEFAULT_RANGE
+        if end - start > MAX_RANGE[resolution]:
+            raise ValidationError({
+                "from": f"Для resolution={resolution} диапазон не больше {MAX_RANGE[resolution].days} дней."
+            })
+
+    return start, end, resolution
+
+
+def get_snapshots(venue_id, start=None, end=None):
+    """
+    Снимки площадки за [start, end), свежие сверху.
+    Обслуживается индексом (venue, -created_at).
+    """
+    qs = WeatherSnapshot.objects.filter(venue_id=venue_id)
+    if start:
+        qs = qs.filter(created_at__gte=start)
+    if end:
+        qs = qs.filter(created_at__lt=end)
+    return qs.order_by("-created_at")
+
+
+def get_history_series(venue_id, start, end, resolution):
+    """
+    Прореженный ряд для графиков: агрегаты по date_trunc(resolution, created_at),
+    посчитанные в БД. Точки идут по возрастанию времени, пустые интервалы пропускаются.
+    """
+    return list(
+        get_snapshots(venue_id, start, end)
+        .annotate(bucket=RESOLUTIONS[resolution]("created_at"))
+        .values("bucket")
+        .annotate(
+            temperature_celsius=Avg("temperature_celsius"),
+            temperature_min=Min("temperature_celsius"),
+            temperature_max=Max("temperature_celsius"),
+            humidity_percent=Avg("humidity_percent"),
+            pressure_mmhg=Avg("pressure_mmhg"),
+            wind_speed_ms=Avg("wind_speed_ms"),
+            samples=Count("id"),
+        )
+        .order_by("bucket")
+    )
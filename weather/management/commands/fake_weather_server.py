@@ -0,0 +1,39 @@
+# weather/management/commands/fake_weather_server.py
+from django.core.management.base import BaseCommand
+
+from weather.fake_provider import make_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local Open-Meteo stand-in for load tests. "
+        "Point workers at it with WEATHER_API_URL=http://<host>:<port>/v1/forecast"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before every response")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 503 responses, 0..1")
+        parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible errors")
+
+    def handle(self, *args, **options):
+        server = make_server(
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency_ms"] / 1000,
+            error_rate=options["error_rate"],
+            seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Fake Open-Meteo on http://{options['host']}:{options['port']}/v1/forecast "
+            f"(latency {options['latency_ms']} ms, error rate {options['error_rate']})"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            behaviour = server.RequestHandlerClass.behaviour
+            self.stdout.write(f"Served {behaviour.requests} requests, {behaviour.errors} errors")
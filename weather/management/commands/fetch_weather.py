@@ -2,6 +2,7 @@
 from django.core.management.base import BaseCommand
 from venues.models import Venue
 from weather.models import WeatherSnapshot
+from weather.breaker import WeatherProviderError
 from weather.services import fetch_weather_for_venue
 
 class Command(BaseCommand):
@@ -11,7 +12,11 @@ class Command(BaseCommand):
         venues = Venue.objects.all()
         for venue in venues:
             self.stdout.write(f"Fetching weather for {venue.name}...")
-            weather_data = fetch_weather_for_venue(venue)
+            try:
+                weather_data = fetch_weather_for_venue(venue)
+            except WeatherProviderError as e:
+                self.stdout.write(self.style.ERROR(f"✗ Failed for {venue.name}: {e}"))
+                continue
             if weather_data:
                 WeatherSnapshot.objects.create(venue=venue, **weather_data)
                 self.stdout.write(self.style.SUCCESS(f"✓ Saved weather for {venue.name}"))
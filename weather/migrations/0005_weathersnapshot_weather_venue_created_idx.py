@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0004_alter_weathersnapshot_wind_direction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='weathersnapshot',
+            index=models.Index(fields=['venue', '-created_at'], name='weather_venue_created_idx'),
+        ),
+    ]
@@ -15,6 +15,10 @@ class WeatherSnapshot(models.Model):
         verbose_name = "Снимок погоды"
         verbose_name_plural = "Архив погоды"
         ordering = ["-created_at"]
+        indexes = [
+            # История погоды площадки за период (VenueViewSet.weather)
+            models.Index(fields=["venue", "-created_at"], name="weather_venue_created_idx"),
+        ]
 
     def __str__(self):
         return f"Weather at {self.venue.name} on {self.created_at}"
@@ -18,3 +18,26 @@ class WeatherSnapshotSerializer(serializers.ModelSerializer):
             "created_at",
         ]
         read_only_fields = ["created_at"]
+
+
+class WeatherHistoryPointSerializer(serializers.Serializer):
+    """
+    Точка прореженного ряда: средние значения за час/день и число снимков в нём.
+    """
+    bucket = serializers.DateTimeField()
+    temperature_celsius = serializers.FloatField()
+    temperature_min = serializers.FloatField()
+    temperature_max = serializers.FloatField()
+    humidity_percent = serializers.FloatField()
+    pressure_mmhg = serializers.FloatField()
+    wind_speed_ms = serializers.FloatField()
+    samples = serializers.IntegerField()
+
+
+class WeatherProviderHealthSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    state = serializers.ChoiceField(choices=["closed", "open", "half-open"])
+    degraded = serializers.BooleanField()
+    failures = serializers.IntegerField()
+    failure_threshold = serializers.IntegerField()
+    retry_after = serializers.IntegerField(help_text="Секунд до пробного запроса (для open).")
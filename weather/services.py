@@ -1,10 +1,47 @@
 # weather/services.py
+import threading
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+
 import requests
 
+from django.conf import settings
+from django.utils import timezone
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from venues.services import get_venue_coordinates
+from .breaker import ProviderThrottledError, WeatherProviderError, weather_breaker
+from .forecast import HOURLY_FIELDS, ForecastTable
+
+_session = None
+_session_lock = threading.Lock()
+
+# Таймаут запроса и превышение лимита: прогноз есть, просто не сейчас
+THROTTLED_STATUSES = (408, 429)
+
+# Насколько поясное время может отличаться от солнечного (Китай, Испания, летнее время)
+LOCAL_TIME_SLACK = timedelta(hours=3)
+
+
+def get_session():
+    """
+    Общая для процесса requests.Session: соединения с API переиспользуются (keep-alive),
+    а не открываются заново на каждую площадку. Создаётся лениво — уже после fork воркера.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                # Один быстрый повтор на случай сетевого сбоя; дальше решают предохранитель и retry задачи
+                retry = Retry(total=1, backoff_factor=0.5, status_forcelist=[500, 502, 503, 504])
+                adapter = HTTPAdapter(max_retries=retry, pool_maxsize=20)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
 
 def degrees_to_direction(degrees):
     """Преобразует градусы направления ветра в текстовые обозначения."""
@@ -19,87 +56,134 @@ def hpa_to_mmhg(hpa):
 def fetch_weather_for_venue(venue):
     """
     Получает текущую погоду для venue через Open-Meteo API.
-    Возвращает словарь с данными погоды или None при ошибке.
+    Возвращает словарь с данными погоды. Если API недоступен или предохранитель
+    разомкнут, бросает WeatherProviderError (CircuitOpenError).
     """
     lat, lon = get_venue_coordinates(venue)
 
-    url = (
-        f"https://api.open-meteo.com/v1/forecast"
-        f"?latitude={lat}&longitude={lon}"
-        f"&current=temperature_2m,relative_humidity_2m,surface_pressure,wind_speed_10m,wind_direction_10m"
-        f"&timezone=auto"
-    )
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "current": "temperature_2m,relative_humidity_2m,surface_pressure,wind_speed_10m,wind_direction_10m",
+        "timezone": "auto",
+    }
 
-    session = requests.Session()
-    retry = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-    adapter = HTTPAdapter(max_retries=retry)
-    session.mount("https://", adapter)
+    weather_breaker.before_request()
 
     try:
-        response = session.get(url, timeout=20)
+        response = get_session().get(settings.WEATHER_API_URL, params=params, timeout=20)
         response.raise_for_status()
         data = response.json()
-        current = data.get("current", {})
-
-        return {
-            "temperature_celsius": current.get("temperature_2m", 0.0),
-            "humidity_percent": current.get("relative_humidity_2m", 0.0),
-            "pressure_mmhg": hpa_to_mmhg(current.get("surface_pressure", 1013.0)),
-            "wind_speed_ms": current.get("wind_speed_10m", 0.0),
-            "wind_direction": degrees_to_direction(current.get("wind_direction_10m", 0.0)),
-        }
-    except Exception as e:
-        print(f"Error fetching weather for {venue.name}: {e}")
-        return None
+    except (requests.RequestException, ValueError) as e:
+        weather_breaker.record_failure()
+        raise WeatherProviderError(f"Error fetching weather for {venue.name}: {e}") from e
+
+    weather_breaker.record_success()
+    current = data.get("current", {})
+
+    return {
+        "temperature_celsius": current.get("temperature_2m", 0.0),
+        "humidity_percent": current.get("relative_humidity_2m", 0.0),
+        "pressure_mmhg": hpa_to_mmhg(current.get("surface_pressure", 1013.0)),
+        "wind_speed_ms": current.get("wind_speed_10m", 0.0),
+        "wind_direction": degrees_to_direction(current.get("wind_direction_10m", 0.0)),
+    }
 
-def get_forecast_for_time(lat, lon, target_datetime):
+def parse_retry_after(value):
     """
-    Получает прогноз погоды на конкретный час.
-    target_datetime: datetime объект (start_at события)
+    Заголовок Retry-After (секунды или HTTP-дата) -> секунды ожидания или None.
     """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return int(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0, int((retry_at - timezone.now()).total_seconds()))
 
-    date_str = target_datetime.strftime('%Y-%m-%d')
-    hour_str = target_datetime.strftime('%Y-%m-%dT%H:00')
 
-    url = "https://api.open-meteo.com/v1/forecast"
+def fetch_forecast_table(lat, lon, start_date, end_date):
+    """
+    Запрашивает почасовой прогноз на даты [start_date, end_date] и возвращает ForecastTable.
+    None, если прогноза на эти даты нет; при недоступности API
+    бросает WeatherProviderError (CircuitOpenError, а на 408/429 — ProviderThrottledError).
+    """
     params = {
         "latitude": lat,
         "longitude": lon,
-        "hourly": "temperature_2m,relative_humidity_2m,pressure_msl,wind_speed_10m,wind_direction_10m",
-        "start_date": date_str,
-        "end_date": date_str,
+        "hourly": ",".join(HOURLY_FIELDS),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
         "timezone": "auto"
     }
 
+    weather_breaker.before_request()
+
     try:
-        response = requests.get(url, params=params, timeout=5)
+        response = get_session().get(settings.WEATHER_API_URL, params=params, timeout=5)
+        if response.status_code in THROTTLED_STATUSES:
+            raise ProviderThrottledError(
+                f"Weather API Error: {response.status_code}",
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        if 400 <= response.status_code < 500:
+            # API доступен, но прогноза на эту дату нет (например, слишком далеко вперёд)
+            weather_breaker.record_success()
+            return None
         response.raise_for_status()
         data = response.json()
+    except ProviderThrottledError:
+        weather_breaker.record_failure()
+        raise
+    except (requests.RequestException, ValueError) as e:
+        weather_breaker.record_failure()
+        raise WeatherProviderError(f"Weather API Error: {e}") from e
+
+    weather_breaker.record_success()
+    try:
+        return ForecastTable.from_payload(data)
+    except (TypeError, ValueError):
+        return None
 
-        hourly_data = data.get("hourly", {})
-        times = hourly_data.get("time", [])
-        
-        try:
-            index = -1
-            for i, t in enumerate(times):
-                if t.startswith(hour_str):
-                    index = i
-                    break
-            
-            if index == -1:
-                return None
-
-            return {
-                "temperature_celsius": hourly_data["temperature_2m"][index],
-                "humidity_percent": hourly_data["relative_humidity_2m"][index],
-                "pressure_mmhg": int(hourly_data["pressure_msl"][index] * 0.75006),
-                "wind_speed_ms": hourly_data["wind_speed_10m"][index],
-                "wind_direction": hourly_data["wind_direction_10m"][index],
-            }
-
-        except (ValueError, IndexError):
-            return None
 
-    except Exception as e:
-        print(f"Weather API Error: {e}")
-        return None
+def estimate_local_date(moment, lon, slack=timedelta(0)):
+    """
+    Дата по солнечному времени долготы (15° на час), сдвинутому на slack.
+    """
+    return (moment + timedelta(hours=float(lon) / 15) + slack).date()
+
+
+def get_forecasts_for_times(lat, lon, target_datetimes):
+    """
+    Прогнозы для нескольких моментов в одной точке одним запросом к API.
+    Возвращает список той же длины (None там, где прогноза нет).
+    """
+    if not target_datetimes:
+        return []
+
+    # Даты в запросе локальные для площадки. Таймзону площадки мы не знаем,
+    # поэтому оцениваем местное время по долготе с запасом LOCAL_TIME_SLACK:
+    # обычно это одна дата, и лишние сутки прогноза не запрашиваются.
+    # Конец не должен выходить за горизонт прогноза, иначе API ответит 400 на весь запрос.
+    horizon = timezone.now().date() + timedelta(days=settings.WEATHER_FORECAST_DAYS - 1)
+    start_date = estimate_local_date(min(target_datetimes), lon, -LOCAL_TIME_SLACK)
+    end_date = min(estimate_local_date(max(target_datetimes), lon, LOCAL_TIME_SLACK), horizon)
+    if start_date > end_date:
+        return [None] * len(target_datetimes)
+
+    table = fetch_forecast_table(lat, lon, start_date, end_date)
+    if table is None:
+        return [None] * len(target_datetimes)
+    return table.get_many(target_datetimes)
+
+
+def get_forecast_for_time(lat, lon, target_datetime):
+    """
+    Получает прогноз погоды на конкретный час.
+    target_datetime: datetime объект (start_at события)
+    Возвращает None, если прогноза на этот час нет; при недоступности API
+    бросает WeatherProviderError (CircuitOpenError).
+    """
+    return get_forecasts_for_times(lat, lon, [target_datetime])[0]
@@ -1,29 +1,177 @@
-from celery import shared_task
-from events.models import Event
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from celery import Task, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from core.dispatch import send_batch
+
+from events.models import Event, EventStatus
 from venues.models import Venue
+from weather.breaker import CircuitOpenError, WeatherProviderError
 from weather.models import WeatherSnapshot
-from weather.services import fetch_weather_for_venue, get_forecast_for_time
+from weather.services import fetch_weather_for_venue, get_forecast_for_time, get_forecasts_for_times
 
 from venues.services import get_venue_coordinates
 
-@shared_task
-def update_weather_snapshots():
+FORECAST_TOKEN_TTL = 60 * 60
+# Сколько помним, что прогноз на дату события недоступен (слишком далеко вперёд)
+FORECAST_UNAVAILABLE_TTL = 60 * 15
+
+
+def forecast_token_key(event_id):
+    return f"weather:forecast:token:{event_id}"
+
+
+def forecast_pending_key(event_id):
+    return f"weather:forecast:pending:{event_id}"
+
+
+def forecast_unavailable_key(event_id):
+    return f"weather:forecast:unavailable:{event_id}"
+
+
+def is_forecast_unavailable(event_id):
+    return cache.get(forecast_unavailable_key(event_id)) is not None
+
+
+def forget_forecast_unavailable(event_id):
+    cache.delete(forecast_unavailable_key(event_id))
+
+
+def request_event_forecasts(event_ids):
+    """
+    Ставит фоновый запрос прогноза для событий, которых запросили из API.
+    cache.add атомарен, поэтому на одно событие за WEATHER_FORECAST_PENDING_SECONDS
+    уходит одна задача, сколько бы клиентов ни спрашивали погоду.
+    Возвращает id событий, для которых задача поставлена сейчас.
+    """
+    queued = []
+    for event_id in event_ids:
+        if cache.add(forecast_pending_key(event_id), True, timeout=settings.WEATHER_FORECAST_PENDING_SECONDS):
+            queued.append(event_id)
+
+    if queued:
+        send_batch([(set_event_weather_forecast_task, (event_id,), {}) for event_id in queued])
+    return queued
+
+
+class CoalescedForecastTask(Task):
+    """
+    Debounce для задач прогноза по одному событию.
+    При каждой постановке в очередь в кэш (Redis) пишется новый токен для event_id,
+    а задача откладывается на WEATHER_FORECAST_COALESCE_SECONDS.
+    Выполняется только задача с последним токеном, остальные выходят сразу, без запросов к API.
+    """
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        kwargs = dict(kwargs or {})
+        # id события — первый позиционный аргумент или event_id=... (.delay(event_id=1))
+        event_id = args[0] if args else kwargs.get("event_id")
+        # Повторы (retry) уже несут свой токен — их не перевыпускаем
+        if event_id is not None and "coalesce_token" not in kwargs:
+            token = uuid.uuid4().hex
+            cache.set(forecast_token_key(event_id), token, timeout=FORECAST_TOKEN_TTL)
+            kwargs["coalesce_token"] = token
+            options.setdefault("countdown", settings.WEATHER_FORECAST_COALESCE_SECONDS)
+        return super().apply_async(args, kwargs, **options)
+
+def upcoming_events_by_venue(venue_ids):
+    """
+    {venue_id: [Event]} для опубликованных событий в пределах горизонта прогноза.
+    """
+    now = timezone.now()
+    events = Event.objects.filter(
+        venue_id__in=venue_ids,
+        status=EventStatus.PUBLISHED,
+        start_at__gte=now,
+        start_at__lt=now + timedelta(days=settings.WEATHER_FORECAST_DAYS),
+    ).only("id", "venue_id", "start_at")
+
+    grouped = defaultdict(list)
+    for event in events:
+        grouped[event.venue_id].append(event)
+    return grouped
+
+
+def refresh_venue_forecasts(venue, events):
+    """
+    Прогнозы для всех событий площадки одним запросом к API (get_forecasts_for_times).
+    Возвращает количество событий, получивших прогноз.
+    """
+    lat, lon = get_venue_coordinates(venue)
+    if lat is None or lon is None:
+        return 0
+
+    forecasts = get_forecasts_for_times(float(lat), float(lon), [event.start_at for event in events])
+    found = [(event, forecast) for event, forecast in zip(events, forecasts) if forecast]
+    if not found:
+        return 0
+
+    snapshots = WeatherSnapshot.objects.bulk_create(
+        WeatherSnapshot(venue=venue, **forecast) for _, forecast in found
+    )
+    for (event, _), snapshot in zip(found, snapshots):
+        event.weather = snapshot
+    # bulk_update — без сигналов Event: прогноз не меняет ни дату, ни статус
+    Event.objects.bulk_update([event for event, _ in found], ["weather"])
+    return len(found)
+
+
+@shared_task(bind=True, max_retries=3)
+def update_weather_snapshots(self, venue_ids=None):
     """
     Периодическая задача: пробегается по всем Venues и сохраняет погоду.
+    Заодно обновляет прогнозы предстоящих событий — один запрос на площадку,
+    сколько бы событий на ней ни было.
+    Если предохранитель погодного API разомкнут, оставшиеся площадки
+    переносятся в retry с задержкой до его восстановления, а не перебираются впустую.
     """
     venues = Venue.objects.all()
+    if venue_ids is not None:
+        venues = venues.filter(id__in=venue_ids)
+    venues = list(venues)
+    events_by_venue = upcoming_events_by_venue([venue.id for venue in venues])
+
     results = []
-    for venue in venues:
-        weather_data = fetch_weather_for_venue(venue)
+    for i, venue in enumerate(venues):
+        try:
+            weather_data = fetch_weather_for_venue(venue)
+        except CircuitOpenError as exc:
+            remaining = [v.id for v in venues[i:]]
+            raise self.retry(kwargs={"venue_ids": remaining}, countdown=exc.retry_after, exc=exc)
+        except WeatherProviderError:
+            weather_data = None
+
         if weather_data:
             WeatherSnapshot.objects.create(venue=venue, **weather_data)
             results.append(f"Updated {venue.name}")
         else:
             results.append(f"Failed {venue.name}")
+
+        if venue.id in events_by_venue:
+            try:
+                refresh_venue_forecasts(venue, events_by_venue[venue.id])
+            except CircuitOpenError as exc:
+                # Текущая погода площадки уже сохранена, прогнозы её событий обновит следующий запуск
+                remaining = [v.id for v in venues[i + 1:]]
+                if remaining:
+                    raise self.retry(kwargs={"venue_ids": remaining}, countdown=exc.retry_after, exc=exc)
+            except WeatherProviderError:
+                pass
     return results
 
-@shared_task
-def set_event_weather_forecast_task(event_id):
+@shared_task(base=CoalescedForecastTask, bind=True, max_retries=5)
+def set_event_weather_forecast_task(self, event_id, coalesce_token=None):
+    if coalesce_token is not None:
+        latest = cache.get(forecast_token_key(event_id))
+        # None — токен истёк, более новых запросов точно не было
+        if latest is not None and latest != coalesce_token:
+            return "Superseded by a newer forecast request"
+
     try:
         event = Event.objects.get(id=event_id)
         
@@ -32,13 +180,22 @@ def set_event_weather_forecast_task(event_id):
 
         lat, lon = get_venue_coordinates(event.venue)
 
-        weather_data = get_forecast_for_time(
-            float(lat), 
-            float(lon), 
-            event.start_at
-        )
+        try:
+            weather_data = get_forecast_for_time(
+                float(lat), 
+                float(lon), 
+                event.start_at
+            )
+        except WeatherProviderError as exc:
+            # API лежит: не держим слот воркера, а повторяем после паузы предохранителя
+            # Retry-After от API (429) или пауза предохранителя
+            countdown = getattr(exc, "retry_after", None)
+            if countdown is None:
+                countdown = settings.WEATHER_BREAKER_RECOVERY_SECONDS
+            raise self.retry(exc=exc, countdown=countdown)
 
         if not weather_data:
+            cache.set(forecast_unavailable_key(event_id), True, timeout=FORECAST_UNAVAILABLE_TTL)
             return "Weather forecast not available (too far in future?)"
 
         snapshot = WeatherSnapshot.objects.create(
@@ -1,7 +1,14 @@
+# weather/urls.py
+from django.urls import path
+
+from .views import WeatherHealthView
+
 # from rest_framework.routers import DefaultRouter
 # from .views import WeatherSnapshotViewSet
 
 # router = DefaultRouter()
 # router.register(r"", WeatherSnapshotViewSet, basename="weather")
 
-# urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path("health/", WeatherHealthView.as_view(), name="weather-health"),
+]
@@ -1,12 +1,16 @@
 # weather.views.py
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from drf_spectacular.utils import extend_schema_view, extend_schema, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter
 
+from .breaker import weather_breaker
 from .models import WeatherSnapshot
-from .serializers import WeatherSnapshotSerializer
+from .serializers import WeatherProviderHealthSerializer, WeatherSnapshotSerializer
 
 
 @extend_schema_view(
@@ -49,4 +53,28 @@ from .serializers import WeatherSnapshotSerializer
 )
 class WeatherSnapshotViewSet(ReadOnlyModelViewSet):
     queryset = WeatherSnapshot.objects.select_related("venue")
-    serializer_class = WeatherSnapshotSerializer
\ No newline at end of file
+    serializer_class = WeatherSnapshotSerializer
+
+
+class WeatherHealthView(APIView):
+    """
+    GET /api/weather/health/
+    Состояние предохранителя погодного API. Всегда 200: при разомкнутой цепи
+    сервис работает в деградированном режиме (отдаёт сохранённые данные), а не лежит.
+    """
+    permission_classes = [AllowAny]
+
+    @extend_schema(
+        tags=["Погода"],
+        summary="Состояние погодного API",
+        description=(
+            "Возвращает состояние предохранителя погодного API: closed — запросы идут, "
+            "open — API недоступен, запросы не отправляются retry_after секунд, "
+            "half-open — пропускается пробный запрос."
+        ),
+        responses={200: WeatherProviderHealthSerializer},
+    )
+    def get(self, request):
+        status = weather_breaker.status()
+        status["degraded"] = status["state"] != weather_breaker.CLOSED
+        return Response(WeatherProviderHealthSerializer(status).data)